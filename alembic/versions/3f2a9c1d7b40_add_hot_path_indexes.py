@@ -0,0 +1,58 @@
+"""add hot path indexes
+
+为提交、班级成员、通知、批改、课程和作业表的常用查询添加索引。
+
+应用启动(create_db_and_tables)会按模型补建缺失的索引，因此已存在的索引会被跳过，
+迁移对新建库和已有库都可以直接执行。
+
+Revision ID: 3f2a9c1d7b40
+Revises:
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "3f2a9c1d7b40"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (索引名, 表名, 列)，与模型中的 Index 声明一致
+INDEXES = [
+    ("ix_submissions_assignment_id_submission_time", "submissions", ["assignment_id", "submission_time"]),
+    ("ix_submissions_student_id_assignment_id", "submissions", ["student_id", "assignment_id"]),
+    ("ix_class_members_class_id_role_user_id", "class_members", ["class_id", "role", "user_id"]),
+    ("ix_class_members_user_id_class_id", "class_members", ["user_id", "class_id"]),
+    ("ix_notifications_user_id_created_at", "notifications", ["user_id", "created_at"]),
+    ("ix_notifications_user_id_is_read_created_at", "notifications", ["user_id", "is_read", "created_at"]),
+    ("ix_gradings_submission_id", "gradings", ["submission_id"]),
+    ("ix_courses_class_id", "courses", ["class_id"]),
+    ("ix_courses_teacher_id", "courses", ["teacher_id"]),
+    ("ix_assignments_course_id_due_date", "assignments", ["course_id", "due_date"]),
+]
+
+
+def _existing_indexes(table_name: str) -> set:
+    """
+    获取表上已存在的索引名，离线模式无法查询数据库，返回空集合
+    """
+    if context.is_offline_mode():
+        return set()
+    inspector = sa.inspect(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes(table_name)}
+
+
+def upgrade() -> None:
+    for name, table_name, columns in INDEXES:
+        if name not in _existing_indexes(table_name):
+            op.create_index(name, table_name, columns)
+
+
+def downgrade() -> None:
+    for name, table_name, _ in reversed(INDEXES):
+        if context.is_offline_mode() or name in _existing_indexes(table_name):
+            op.drop_index(name, table_name=table_name)
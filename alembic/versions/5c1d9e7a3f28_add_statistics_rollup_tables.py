@@ -0,0 +1,108 @@
+"""add statistics rollup tables
+
+添加统计汇总表(assignment_statistics、student_statistics)、分数草图表
+(assignment_score_sketches、course_score_sketches)和实体计数表(entity_counters)。
+
+迁移只建表，不写入数据：应用启动时 ensure_statistics_built 发现汇总表、草图或计数为空
+而已有原始记录时，会从原始记录重建。应用启动(create_db_and_tables)也会按模型创建缺失的表，
+已存在的表会被跳过。
+
+Revision ID: 5c1d9e7a3f28
+Revises: 8b6e1f0a2c57
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import List
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5c1d9e7a3f28"
+down_revision = "8b6e1f0a2c57"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(table_name: str) -> bool:
+    """
+    判断表是否已存在，离线模式无法查询数据库，视为不存在
+    """
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def _score_statistics_columns() -> List[sa.Column]:
+    """
+    作业汇总表和学生汇总表共有的列，与 ScoreStatisticsBase 一致
+    """
+    return [
+        sa.Column("submission_count", sa.Integer(), nullable=False),
+        sa.Column("graded_count", sa.Integer(), nullable=False),
+        sa.Column("score_sum", sa.Float(), nullable=False),
+        sa.Column("score_sum_squares", sa.Float(), nullable=False),
+        sa.Column("min_score", sa.Float(), nullable=True),
+        sa.Column("max_score", sa.Float(), nullable=True),
+        *[sa.Column(f"bucket_{index}", sa.Integer(), nullable=False) for index in range(10)],
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade() -> None:
+    if not _table_exists("assignment_statistics"):
+        op.create_table(
+            "assignment_statistics",
+            *_score_statistics_columns(),
+            sa.Column("assignment_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["assignment_id"], ["assignments.id"]),
+            sa.PrimaryKeyConstraint("assignment_id"),
+        )
+    if not _table_exists("student_statistics"):
+        op.create_table(
+            "student_statistics",
+            *_score_statistics_columns(),
+            sa.Column("student_id", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["student_id"], ["users.id"]),
+            sa.PrimaryKeyConstraint("student_id"),
+        )
+    if not _table_exists("assignment_score_sketches"):
+        op.create_table(
+            "assignment_score_sketches",
+            sa.Column("assignment_id", sa.Integer(), nullable=False),
+            sa.Column("bin_index", sa.Integer(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["assignment_id"], ["assignments.id"]),
+            sa.PrimaryKeyConstraint("assignment_id", "bin_index"),
+        )
+    if not _table_exists("course_score_sketches"):
+        op.create_table(
+            "course_score_sketches",
+            sa.Column("course_id", sa.Integer(), nullable=False),
+            sa.Column("bin_index", sa.Integer(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["course_id"], ["courses.id"]),
+            sa.PrimaryKeyConstraint("course_id", "bin_index"),
+        )
+    if not _table_exists("entity_counters"):
+        op.create_table(
+            "entity_counters",
+            sa.Column("name", sa.String(length=50), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.Column("verified_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("name"),
+        )
+
+
+def downgrade() -> None:
+    for table_name in (
+        "entity_counters",
+        "course_score_sketches",
+        "assignment_score_sketches",
+        "student_statistics",
+        "assignment_statistics",
+    ):
+        if context.is_offline_mode() or _table_exists(table_name):
+            op.drop_table(table_name)
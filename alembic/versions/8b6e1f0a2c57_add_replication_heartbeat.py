@@ -0,0 +1,44 @@
+"""add replication heartbeat
+
+添加复制心跳表，主库定时更新，用于计算只读副本的复制延迟。
+
+应用启动(create_db_and_tables)会按模型创建缺失的表，已存在时跳过。
+
+Revision ID: 8b6e1f0a2c57
+Revises: 3f2a9c1d7b40
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8b6e1f0a2c57"
+down_revision = "3f2a9c1d7b40"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists() -> bool:
+    """
+    判断复制心跳表是否已存在，离线模式无法查询数据库，视为不存在
+    """
+    if context.is_offline_mode():
+        return False
+    return sa.inspect(op.get_bind()).has_table("replication_heartbeat")
+
+
+def upgrade() -> None:
+    if not _table_exists():
+        op.create_table(
+            "replication_heartbeat",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+
+
+def downgrade() -> None:
+    if context.is_offline_mode() or _table_exists():
+        op.drop_table("replication_heartbeat")
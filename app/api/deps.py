@@ -1,23 +1,71 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
-from sqlmodel import Session, select
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
 from app.core.security import ALGORITHM
+from app.db.async_session import get_async_session
+from app.db.replicas import get_read_session, replica_router
 from app.db.session import get_session
 from app.models.user import User, UserRole
 from app.schemas.token import TokenPayload
+from app.services.permission_service import PermissionResolver
+from app.services.principal_service import get_principal
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/v1/auth/login")
 
 
-def get_db() -> Generator:
+# 不修改数据的请求方法，配置了只读副本时可以使用副本
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def _token_user_id(request: Request) -> Optional[int]:
+    """
+    从请求的令牌中读取用户ID，用于选择主库或副本；令牌无效时返回 None，由 get_current_user 报错
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        subject = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM]).get("sub")
+        return int(subject) if subject is not None else None
+    except (jwt.JWTError, ValueError):
+        return None
+
+
+def get_db(request: Request) -> Generator:
+    if not replica_router.enabled:
+        with get_session() as session:
+            yield session
+        return
+
+    user_id = _token_user_id(request)
+    if request.method in READ_ONLY_METHODS:
+        with get_read_session(user_id) as session:
+            yield session
+        return
+
+    # 请求开始和结束时都记录写入：响应发出后清理依赖之前，同一用户的下一个请求可能已经到达
+    replica_router.record_write(user_id)
     with get_session() as session:
         yield session
+    replica_router.record_write(user_id)
+
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    异步数据库会话，供 async def 接口使用，数据库操作不阻塞事件循环
+    """
+    user_id = _token_user_id(request) if replica_router.enabled and request.method not in READ_ONLY_METHODS else None
+    replica_router.record_write(user_id)
+    async with get_async_session() as session:
+        yield session
+    replica_router.record_write(user_id)
 
 
 def get_current_user(
@@ -37,10 +85,8 @@ def get_current_user(
     if not user_id:
         raise HTTPException(status_code=404, detail="用户不存在")
     
-    user = db.exec(select(User).where(User.id == int(user_id))).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="用户不存在")
-    return user
+    # 用户信息优先从缓存读取，修改、删除用户后失效
+    return get_principal(db, int(user_id))
 
 
 def get_current_active_user(
@@ -68,4 +114,14 @@ def get_current_teacher_user(
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="权限不足"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+
+def get_permissions(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> PermissionResolver:
+    """
+    当前用户的权限判断，班级成员身份和所教课程在一个请求中只读取一次，使用请求的数据库会话
+    """
+    return PermissionResolver(current_user, db)
@@ -5,10 +5,12 @@ from app.api.v1.endpoints import (
     auth,
     classes,
     courses,
+    exports,
     gradings,
     notifications,
     statistics,
     submissions,
+    system,
     users,
 )
 
@@ -21,4 +23,6 @@ api_router.include_router(assignments.router, prefix="/assignments", tags=["作
 api_router.include_router(submissions.router, prefix="/submissions", tags=["提交"])
 api_router.include_router(gradings.router, prefix="/gradings", tags=["批改"])
 api_router.include_router(notifications.router, prefix="/notifications", tags=["通知"])
-api_router.include_router(statistics.router, prefix="/statistics", tags=["统计"]) 
\ No newline at end of file
+api_router.include_router(statistics.router, prefix="/statistics", tags=["统计"])
+api_router.include_router(exports.router, prefix="/exports", tags=["导出"])
+api_router.include_router(system.router, prefix="/system", tags=["系统"])
\ No newline at end of file
@@ -3,14 +3,21 @@ from datetime import datetime
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_current_active_user, get_current_teacher_user, get_db
+from app.api.deps import get_async_db, get_current_active_user, get_current_teacher_user, get_db, get_permissions
 from app.models.assignment import Assignment, AssignmentCreate, AssignmentRead, AssignmentUpdate
-from app.models.class_model import ClassMember
 from app.models.course import Course
 from app.models.user import User
 from app.utils import storage
 from app.services.notification_service import notify_assignment_created
+from app.services.permission_service import PermissionResolver
+from app.services.statistics_service import (
+    delete_assignment_and_statistics,
+    invalidate_assignment_statistics,
+    recompute_assignment_statistics,
+)
 
 router = APIRouter()
 
@@ -18,14 +25,15 @@ router = APIRouter()
 @router.post("/", response_model=AssignmentRead)
 async def create_assignment(
     assignment_in: AssignmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     创建作业(仅教师)
     """
     # 检查课程是否存在
-    course = db.get(Course, assignment_in.course_id)
+    course = await db.get(Course, assignment_in.course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,7 +41,7 @@ async def create_assignment(
         )
     
     # 权限检查：只有课程教师和管理员可以创建作业
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    if not permissions.can_teach(course):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权在此课程创建作业",
@@ -42,12 +50,15 @@ async def create_assignment(
     # 创建作业
     assignment = Assignment(**assignment_in.dict())
     db.add(assignment)
-    db.commit()
-    db.refresh(assignment)
+    await db.commit()
+    await db.refresh(assignment)
+    
+    # 使相关统计缓存失效
+    await db.run_sync(invalidate_assignment_statistics, assignment_id=assignment.id, course_id=course.id)
     
     # 发送通知给班级学生
-    notify_assignment_created(
-        db=db,
+    await db.run_sync(
+        notify_assignment_created,
         course_id=course.id,
         assignment_id=assignment.id,
         assignment_title=assignment.title,
@@ -64,14 +75,15 @@ async def create_assignment_with_attachment(
     due_date: datetime = Form(...),
     total_points: int = Form(100),
     attachment: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     创建带附件的作业(仅教师)
     """
     # 检查课程是否存在
-    course = db.get(Course, course_id)
+    course = await db.get(Course, course_id)
     if not course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,14 +91,16 @@ async def create_assignment_with_attachment(
         )
     
     # 权限检查：只有课程教师和管理员可以创建作业
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    if not permissions.can_teach(course):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权在此课程创建作业",
         )
     
-    # 保存附件
-    file_path = storage.save_upload_file(attachment, folder=f"courses/{course_id}/assignments")
+    # 保存附件(在线程池中写入磁盘，不阻塞事件循环)
+    file_path = await run_in_threadpool(
+        storage.save_upload_file, attachment, folder=f"courses/{course_id}/assignments"
+    )
     attachment_url = storage.get_file_url(file_path)
     
     # 创建作业
@@ -99,12 +113,15 @@ async def create_assignment_with_attachment(
         attachment_url=attachment_url,
     )
     db.add(assignment)
-    db.commit()
-    db.refresh(assignment)
+    await db.commit()
+    await db.refresh(assignment)
+    
+    # 使相关统计缓存失效
+    await db.run_sync(invalidate_assignment_statistics, assignment_id=assignment.id, course_id=course.id)
     
     # 发送通知给班级学生
-    notify_assignment_created(
-        db=db,
+    await db.run_sync(
+        notify_assignment_created,
         course_id=course.id,
         assignment_id=assignment.id,
         assignment_title=assignment.title,
@@ -120,6 +137,7 @@ def read_assignments(
     course_id: int = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取作业列表
@@ -131,30 +149,24 @@ def read_assignments(
         query = query.where(Assignment.course_id == course_id)
     
     # 如果不是管理员，只能查看自己所在班级的课程的作业
-    if current_user.role != "admin":
-        # 获取用户所在的班级
-        class_members = db.exec(
-            select(ClassMember).where(ClassMember.user_id == current_user.id)
-        ).all()
-        class_ids = [cm.class_id for cm in class_members]
-        
-        # 获取用户所在班级的课程
-        courses = db.exec(
-            select(Course).where(Course.class_id.in_(class_ids))
-        ).all()
-        course_ids = [c.id for c in courses]
-        
+    if not permissions.is_admin:
         # 如果没有指定课程ID，则查询所有所在班级的课程的作业
         if not course_id:
+            # 获取用户所在班级的课程
+            course_ids = db.exec(
+                select(Course.id).where(Course.class_id.in_(permissions.class_ids()))
+            ).all()
             if not course_ids:  # 如果用户不在任何班级的课程中
                 return []
             query = query.where(Assignment.course_id.in_(course_ids))
         # 如果指定了课程ID，则检查用户是否有权限查看
-        elif course_id not in course_ids:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此课程的作业",
-            )
+        else:
+            course = db.get(Course, course_id)
+            if not course or not permissions.can_view(course):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="无权查看此课程的作业",
+                )
     
     # 执行查询
     assignments = db.exec(query.offset(skip).limit(limit)).all()
@@ -166,6 +178,7 @@ def read_assignment(
     assignment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取作业详情
@@ -182,18 +195,11 @@ def read_assignment(
     course = db.get(Course, assignment.course_id)
     
     # 权限检查：管理员可以查看所有作业，其他人只能查看自己所在班级的课程的作业
-    if current_user.role != "admin":
-        is_member = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == course.class_id,
-                ClassMember.user_id == current_user.id,
-            )
-        ).first()
-        if not is_member:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此作业",
-            )
+    if not permissions.can_view(course):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此作业",
+        )
     
     return assignment
 
@@ -204,6 +210,7 @@ def update_assignment(
     assignment_in: AssignmentUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     更新作业信息(仅教师)
@@ -216,11 +223,9 @@ def update_assignment(
             detail="作业不存在",
         )
     
-    # 获取课程信息
-    course = db.get(Course, assignment.course_id)
-    
     # 权限检查：只有课程教师和管理员可以更新作业
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    course_id = assignment.course_id
+    if not permissions.can_teach(course_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权更新此作业",
@@ -228,13 +233,23 @@ def update_assignment(
     
     # 更新作业信息
     assignment_data = assignment_in.dict(exclude_unset=True)
+    total_points_changed = (
+        "total_points" in assignment_data
+        and assignment_data["total_points"] != assignment.total_points
+    )
     for key, value in assignment_data.items():
         setattr(assignment, key, value)
     
     db.add(assignment)
+    # 分数分布按占总分的比例统计，总分变化后需要重新计算
+    if total_points_changed:
+        recompute_assignment_statistics(db, assignment_id=assignment.id)
     db.commit()
     db.refresh(assignment)
     
+    # 使相关统计缓存失效
+    invalidate_assignment_statistics(db, assignment_id=assignment.id, course_id=course_id)
+    
     return assignment
 
 
@@ -243,6 +258,7 @@ def delete_assignment(
     assignment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     删除作业(仅教师)
@@ -255,11 +271,9 @@ def delete_assignment(
             detail="作业不存在",
         )
     
-    # 获取课程信息
-    course = db.get(Course, assignment.course_id)
-    
     # 权限检查：只有课程教师和管理员可以删除作业
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    course_id = assignment.course_id
+    if not permissions.can_teach(course_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权删除此作业",
@@ -270,10 +284,13 @@ def delete_assignment(
         file_path = assignment.attachment_url.replace("/uploads/", "")
         storage.delete_file(file_path)
     
-    # 删除作业
-    db.delete(assignment)
+    # 删除作业，同时移除其汇总数据并更新课程草图
+    delete_assignment_and_statistics(db, assignment)
     db.commit()
     
+    # 使相关统计缓存失效
+    invalidate_assignment_statistics(db, assignment_id=assignment_id, course_id=course_id)
+    
     return {"message": "作业已删除"}
 
 
@@ -284,6 +301,7 @@ def read_course_assignments(
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取课程的作业列表
@@ -297,18 +315,11 @@ def read_course_assignments(
         )
     
     # 权限检查：管理员可以查看所有作业，其他人只能查看自己所在班级的课程的作业
-    if current_user.role != "admin":
-        is_member = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == course.class_id,
-                ClassMember.user_id == current_user.id,
-            )
-        ).first()
-        if not is_member:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此课程的作业",
-            )
+    if not permissions.can_view(course):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此课程的作业",
+        )
     
     # 获取课程作业列表
     assignments = db.exec(
@@ -1,17 +1,51 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Callable, TypeVar
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.security import (
+    PasswordHashPoolFull,
+    create_access_token,
+    get_password_hash,
+    password_hash_pool,
+    verify_password,
+)
+from app.db.replicas import replica_router
 from app.models.user import User, UserCreate, UserRead
-from app.services.auth_service import authenticate_user, register_user
+from app.services.auth_service import get_user_by_username, register_user, user_exists
 from app.schemas.token import Token
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+
+async def run_password_task(func: Callable[..., T], **kwargs: Any) -> T:
+    """
+    在密码哈希线程池中执行密码哈希或验证，bcrypt 计算不阻塞事件循环
+
+    线程池只执行 bcrypt 计算，数据库查询在 run_in_threadpool 中执行，不占用线程池的名额。
+
+    Args:
+        func: 密码哈希或验证函数
+        **kwargs: 函数的参数
+
+    Returns:
+        函数的返回值
+    """
+    try:
+        return await password_hash_pool.run(func, **kwargs)
+    except PasswordHashPoolFull:
+        # 排队已满时立即拒绝，客户端按 Retry-After 稍后重试
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="登录请求过多，请稍后重试",
+            headers={"Retry-After": "1"},
+        )
+
 
 @router.post("/login", response_model=Token)
 async def login_access_token(
@@ -20,7 +54,11 @@ async def login_access_token(
     """
     用户登录获取访问令牌
     """
-    user = authenticate_user(username=form_data.username, password=form_data.password)
+    user = await run_in_threadpool(get_user_by_username, form_data.username)
+    if user and not await run_password_task(
+        verify_password, plain_password=form_data.password, hashed_password=user.hashed_password
+    ):
+        user = None
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -47,10 +85,16 @@ async def register(user_in: UserCreate) -> Any:
     """
     用户注册
     """
-    user = register_user(user_in=user_in)
+    # 用户名或邮箱已存在时不计算密码哈希
+    user = None
+    if not await run_in_threadpool(user_exists, user_in.username, user_in.email):
+        hashed_password = await run_password_task(get_password_hash, password=user_in.password)
+        user = await run_in_threadpool(register_user, user_in, hashed_password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户名或邮箱已存在",
         )
+    # 注册后立即登录并读取自己的信息时使用主库，副本可能还没有这个用户
+    replica_router.record_write(user.id)
     return user 
\ No newline at end of file
@@ -3,11 +3,16 @@ from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
-from app.api.deps import get_current_active_user, get_current_admin_user, get_db
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db, get_permissions
 from app.models.class_model import Class, ClassCreate, ClassMember, ClassMemberCreate, ClassMemberRead, ClassRead, ClassUpdate
 from app.models.notification import Notification, NotificationType
 from app.models.user import User
 from app.services.notification_service import create_notification
+from app.services.permission_service import PermissionResolver, invalidate_permissions
+from app.services.statistics_service import (
+    invalidate_class_statistics,
+    invalidate_membership_statistics,
+)
 
 router = APIRouter()
 
@@ -39,6 +44,11 @@ def create_class(
     db.add(class_member)
     db.commit()
     
+    # 使相关统计缓存和创建者的权限范围失效
+    invalidate_class_statistics(class_.id)
+    invalidate_membership_statistics(db, class_id=class_.id, user_ids=[current_user.id])
+    invalidate_permissions([current_user.id])
+    
     return class_
 
 
@@ -48,19 +58,17 @@ def read_classes(
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取班级列表
     """
     # 如果是管理员，获取所有班级
-    if current_user.role == "admin":
+    if permissions.is_admin:
         classes = db.exec(select(Class).offset(skip).limit(limit)).all()
     else:
         # 获取用户所在的班级
-        class_members = db.exec(
-            select(ClassMember).where(ClassMember.user_id == current_user.id)
-        ).all()
-        class_ids = [cm.class_id for cm in class_members]
+        class_ids = permissions.class_ids()
         classes = db.exec(
             select(Class).where(Class.id.in_(class_ids)).offset(skip).limit(limit)
         ).all()
@@ -73,6 +81,7 @@ def read_class(
     class_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取班级详情
@@ -86,18 +95,11 @@ def read_class(
         )
     
     # 权限检查：管理员可以查看所有班级，其他人只能查看自己所在的班级
-    if current_user.role != "admin":
-        is_member = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-            )
-        ).first()
-        if not is_member:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此班级",
-            )
+    if not permissions.is_member(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此班级",
+        )
     
     return class_
 
@@ -136,6 +138,9 @@ def update_class(
     db.commit()
     db.refresh(class_)
     
+    # 使相关统计缓存失效
+    invalidate_class_statistics(class_id)
+    
     return class_
 
 
@@ -160,6 +165,7 @@ def delete_class(
     members = db.exec(
         select(ClassMember).where(ClassMember.class_id == class_id)
     ).all()
+    member_ids = [member.user_id for member in members]
     for member in members:
         db.delete(member)
     
@@ -167,6 +173,11 @@ def delete_class(
     db.delete(class_)
     db.commit()
     
+    # 使相关统计缓存和成员的权限范围失效
+    invalidate_class_statistics(class_id)
+    invalidate_membership_statistics(db, class_id=class_id, user_ids=member_ids)
+    invalidate_permissions(member_ids)
+    
     return {"message": "班级已删除"}
 
 
@@ -176,6 +187,7 @@ def add_class_member(
     member_in: ClassMemberCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     添加班级成员
@@ -189,19 +201,11 @@ def add_class_member(
         )
     
     # 权限检查：只有班级创建者、管理员和班级教师可以添加成员
-    if current_user.role != "admin" and class_.created_by != current_user.id:
-        is_teacher = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-                ClassMember.role == "teacher",
-            )
-        ).first()
-        if not is_teacher:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权添加班级成员",
-            )
+    if class_.created_by != current_user.id and not permissions.is_class_teacher(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权添加班级成员",
+        )
     
     # 检查用户是否存在
     user = db.get(User, member_in.user_id)
@@ -230,6 +234,10 @@ def add_class_member(
     db.commit()
     db.refresh(class_member)
     
+    # 使相关统计缓存和新成员的权限范围失效
+    invalidate_membership_statistics(db, class_id=class_id, user_ids=[member_in.user_id])
+    invalidate_permissions([member_in.user_id])
+    
     # 发送通知给用户
     create_notification(
         db=db,
@@ -249,6 +257,7 @@ def read_class_members(
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取班级成员列表
@@ -262,18 +271,11 @@ def read_class_members(
         )
     
     # 权限检查：只有班级成员可以查看班级成员列表
-    if current_user.role != "admin":
-        is_member = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-            )
-        ).first()
-        if not is_member:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此班级成员列表",
-            )
+    if not permissions.is_member(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此班级成员列表",
+        )
     
     # 获取班级成员列表
     members = db.exec(
@@ -292,6 +294,7 @@ def remove_class_member(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     移除班级成员
@@ -305,19 +308,11 @@ def remove_class_member(
         )
     
     # 权限检查：只有班级创建者、管理员和班级教师可以移除成员
-    if current_user.role != "admin" and class_.created_by != current_user.id:
-        is_teacher = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-                ClassMember.role == "teacher",
-            )
-        ).first()
-        if not is_teacher:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权移除班级成员",
-            )
+    if class_.created_by != current_user.id and not permissions.is_class_teacher(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权移除班级成员",
+        )
     
     # 查询班级成员
     member = db.exec(
@@ -343,6 +338,10 @@ def remove_class_member(
     db.delete(member)
     db.commit()
     
+    # 使相关统计缓存和被移除成员的权限范围失效
+    invalidate_membership_statistics(db, class_id=class_id, user_ids=[user_id])
+    invalidate_permissions([user_id])
+    
     return {"message": "班级成员已移除"}
 
 
@@ -353,6 +352,7 @@ def invite_to_class(
     role: str = "student",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     邀请用户加入班级
@@ -366,19 +366,11 @@ def invite_to_class(
         )
     
     # 权限检查：只有班级创建者、管理员和班级教师可以邀请成员
-    if current_user.role != "admin" and class_.created_by != current_user.id:
-        is_teacher = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-                ClassMember.role == "teacher",
-            )
-        ).first()
-        if not is_teacher:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权邀请用户加入班级",
-            )
+    if class_.created_by != current_user.id and not permissions.is_class_teacher(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权邀请用户加入班级",
+        )
     
     # 检查角色是否有效
     if role not in ["teacher", "student"]:
@@ -421,6 +413,10 @@ def invite_to_class(
     db.add(class_member)
     db.commit()
     
+    # 使相关统计缓存和受邀用户的权限范围失效
+    invalidate_membership_statistics(db, class_id=class_id, user_ids=[user.id])
+    invalidate_permissions([user.id])
+    
     # 发送通知给用户
     create_notification(
         db=db,
@@ -3,10 +3,12 @@ from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
 
-from app.api.deps import get_current_active_user, get_current_teacher_user, get_db
-from app.models.class_model import Class, ClassMember
+from app.api.deps import get_current_active_user, get_current_teacher_user, get_db, get_permissions
+from app.models.class_model import Class
 from app.models.course import Course, CourseCreate, CourseRead, CourseUpdate
 from app.models.user import User
+from app.services.permission_service import PermissionResolver, invalidate_permissions
+from app.services.statistics_service import delete_course_and_statistics, invalidate_course_statistics
 
 router = APIRouter()
 
@@ -16,6 +18,7 @@ def create_course(
     course_in: CourseCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     创建课程(仅教师)
@@ -29,14 +32,7 @@ def create_course(
         )
     
     # 权限检查：确保当前用户是该班级的教师
-    is_teacher = db.exec(
-        select(ClassMember).where(
-            ClassMember.class_id == course_in.class_id,
-            ClassMember.user_id == current_user.id,
-            ClassMember.role == "teacher",
-        )
-    ).first()
-    if not is_teacher and current_user.role != "admin":
+    if not permissions.is_class_teacher(course_in.class_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="必须是班级教师才能创建课程",
@@ -51,6 +47,12 @@ def create_course(
     db.commit()
     db.refresh(course)
     
+    # 使相关统计缓存和教师的权限范围失效
+    invalidate_course_statistics(
+        db, course_id=course.id, class_id=course.class_id, teacher_id=course.teacher_id
+    )
+    invalidate_permissions([course.teacher_id])
+    
     return course
 
 
@@ -61,6 +63,7 @@ def read_courses(
     class_id: int = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取课程列表
@@ -72,18 +75,12 @@ def read_courses(
         query = query.where(Course.class_id == class_id)
     
     # 如果不是管理员，只能查看自己所在班级的课程
-    if current_user.role != "admin":
-        # 获取用户所在的班级
-        class_members = db.exec(
-            select(ClassMember).where(ClassMember.user_id == current_user.id)
-        ).all()
-        class_ids = [cm.class_id for cm in class_members]
-        
+    if not permissions.is_admin:
         # 如果没有指定班级ID，则查询所有所在班级的课程
         if not class_id:
-            query = query.where(Course.class_id.in_(class_ids))
+            query = query.where(Course.class_id.in_(permissions.class_ids()))
         # 如果指定了班级ID，则检查用户是否是该班级的成员
-        elif class_id not in class_ids:
+        elif not permissions.is_member(class_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="无权查看此班级的课程",
@@ -99,6 +96,7 @@ def read_course(
     course_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取课程详情
@@ -112,18 +110,11 @@ def read_course(
         )
     
     # 权限检查：管理员可以查看所有课程，其他人只能查看自己所在班级的课程
-    if current_user.role != "admin":
-        is_member = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == course.class_id,
-                ClassMember.user_id == current_user.id,
-            )
-        ).first()
-        if not is_member:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此课程",
-            )
+    if not permissions.can_view(course):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此课程",
+        )
     
     return course
 
@@ -134,6 +125,7 @@ def update_course(
     course_in: CourseUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     更新课程信息
@@ -147,7 +139,7 @@ def update_course(
         )
     
     # 权限检查：只有课程教师和管理员可以更新课程
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    if not permissions.can_teach(course):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权更新此课程",
@@ -162,6 +154,11 @@ def update_course(
     db.commit()
     db.refresh(course)
     
+    # 使相关统计缓存失效
+    invalidate_course_statistics(
+        db, course_id=course.id, class_id=course.class_id, teacher_id=course.teacher_id
+    )
+    
     return course
 
 
@@ -170,6 +167,7 @@ def delete_course(
     course_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     删除课程
@@ -183,16 +181,24 @@ def delete_course(
         )
     
     # 权限检查：只有课程教师和管理员可以删除课程
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    if not permissions.can_teach(course):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权删除此课程",
         )
     
     # 删除课程
-    db.delete(course)
+    class_id = course.class_id
+    teacher_id = course.teacher_id
+    delete_course_and_statistics(db, course)
     db.commit()
     
+    # 使相关统计缓存和教师的权限范围失效
+    invalidate_course_statistics(
+        db, course_id=course_id, class_id=class_id, teacher_id=teacher_id
+    )
+    invalidate_permissions([teacher_id])
+    
     return {"message": "课程已删除"}
 
 
@@ -203,6 +209,7 @@ def read_class_courses(
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取班级的课程列表
@@ -216,18 +223,11 @@ def read_class_courses(
         )
     
     # 权限检查：只有班级成员可以查看班级课程
-    if current_user.role != "admin":
-        is_member = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-            )
-        ).first()
-        if not is_member:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此班级课程",
-            )
+    if not permissions.is_member(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此班级课程",
+        )
     
     # 获取班级课程列表
     courses = db.exec(
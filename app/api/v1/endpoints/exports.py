@@ -0,0 +1,119 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+
+from app.api.deps import get_current_teacher_user, get_db
+from app.models.class_model import Class, ClassMember
+from app.models.course import Course
+from app.models.user import User
+from app.services.export_service import (
+    MEDIA_TYPES,
+    ExportFormat,
+    parquet_available,
+    stream_gradebook_csv,
+    stream_gradebook_parquet,
+)
+
+router = APIRouter()
+
+
+def _gradebook_response(
+    db: Session, export_format: ExportFormat, filename: str, user_id: int, **scope: int
+) -> StreamingResponse:
+    """
+    构建成绩导出的流式响应
+
+    导出在响应发送期间使用自己的会话(可能在副本上)读取，先关闭请求的会话归还连接。
+
+    Args:
+        db: 请求的数据库会话
+        export_format: 导出格式
+        filename: 不含扩展名的下载文件名
+        user_id: 导出用户的ID，用于选择副本
+        scope: course_id 或 class_id
+
+    Returns:
+        流式响应
+    """
+    if export_format == ExportFormat.PARQUET:
+        if not parquet_available():
+            raise HTTPException(
+                status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                detail="服务器未安装pyarrow，无法导出Parquet",
+            )
+        content = stream_gradebook_parquet(user_id=user_id, **scope)
+    else:
+        content = stream_gradebook_csv(user_id=user_id, **scope)
+    db.close()
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
+
+
+@router.get("/courses/{course_id}/gradebook")
+def export_course_gradebook(
+    course_id: int,
+    format: ExportFormat = ExportFormat.CSV,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+) -> Any:
+    """
+    导出课程成绩(仅教师)
+    """
+    # 查询课程
+    course = db.get(Course, course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="课程不存在",
+        )
+    
+    # 权限检查：只有课程教师和管理员可以导出课程成绩
+    if current_user.role != "admin" and course.teacher_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权导出此课程成绩",
+        )
+    
+    return _gradebook_response(db, format, f"course_{course_id}_gradebook", current_user.id, course_id=course_id)
+
+
+@router.get("/classes/{class_id}/gradebook")
+def export_class_gradebook(
+    class_id: int,
+    format: ExportFormat = ExportFormat.CSV,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+) -> Any:
+    """
+    导出班级全部课程的成绩(仅教师)
+    """
+    # 查询班级
+    class_ = db.get(Class, class_id)
+    if not class_:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="班级不存在",
+        )
+    
+    # 权限检查：只有班级教师和管理员可以导出班级成绩
+    if current_user.role != "admin":
+        is_teacher = db.exec(
+            select(ClassMember).where(
+                ClassMember.class_id == class_id,
+                ClassMember.user_id == current_user.id,
+                ClassMember.role == "teacher",
+            )
+        ).first()
+        if not is_teacher:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="无权导出此班级成绩",
+            )
+    
+    return _gradebook_response(db, format, f"class_{class_id}_gradebook", current_user.id, class_id=class_id)
@@ -8,6 +8,7 @@ from app.models.grading import Grading, GradingCreate, GradingRead, GradingUpdat
 from app.models.submission import Submission, SubmissionStatus
 from app.models.user import User
 from app.services.notification_service import notify_grading_completed
+from app.services.statistics_service import invalidate_submission_statistics, record_grading_changed
 
 router = APIRouter()
 
@@ -57,9 +58,23 @@ def create_grading(
     # 更新提交记录状态
     submission.status = SubmissionStatus.GRADED
     
+    # 在同一事务中更新统计汇总
+    record_grading_changed(
+        db,
+        assignment_id=submission.assignment_id,
+        student_id=submission.student_id,
+        old_score=None,
+        new_score=grading.score,
+    )
+    
     db.commit()
     db.refresh(grading)
     
+    # 使相关统计缓存失效
+    invalidate_submission_statistics(
+        db, assignment_id=submission.assignment_id, student_id=submission.student_id
+    )
+    
     # 发送通知给学生
     notify_grading_completed(
         db=db,
@@ -123,14 +138,33 @@ def update_grading(
         )
     
     # 更新批改记录
+    old_score = grading.score
     grading_data = grading_in.dict(exclude_unset=True)
     for key, value in grading_data.items():
         setattr(grading, key, value)
     
     db.add(grading)
+    
+    # 在同一事务中更新统计汇总
+    submission = db.get(Submission, grading.submission_id)
+    if submission:
+        record_grading_changed(
+            db,
+            assignment_id=submission.assignment_id,
+            student_id=submission.student_id,
+            old_score=old_score,
+            new_score=grading.score,
+        )
+    
     db.commit()
     db.refresh(grading)
     
+    # 使相关统计缓存失效
+    if submission:
+        invalidate_submission_statistics(
+            db, assignment_id=submission.assignment_id, student_id=submission.student_id
+        )
+    
     return grading
 
 
@@ -1,24 +1,119 @@
-from typing import Any, Dict, List
+from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select, func
+from sqlmodel import Session
 
-from app.api.deps import get_current_active_user, get_current_teacher_user, get_db
+from app.api.deps import get_current_active_user, get_current_teacher_user, get_db, get_permissions
+from app.db.session import get_session
 from app.models.assignment import Assignment
-from app.models.class_model import Class, ClassMember
+from app.models.class_model import Class
 from app.models.course import Course
-from app.models.grading import Grading
-from app.models.submission import Submission
 from app.models.user import User
+from app.services.analytics_service import get_class_score_report
+from app.services.permission_service import PermissionResolver
+from app.services.statistics_service import (
+    TimelineGranularity,
+    get_assignment_dashboard,
+    get_class_dashboard,
+    get_course_assignment_late_rates,
+    get_course_dashboard,
+    get_course_gradebook,
+    get_leaderboard,
+    get_student_dashboard,
+    get_submission_timeline,
+    get_system_overview,
+    get_teacher_dashboard,
+    statistics_cache,
+)
+from app.utils.cache import cached
 
 router = APIRouter()
 
 
+# 以下加载函数的结果按实体缓存在 statistics_cache 中，键与写入时的失效键一致。
+# 并发的相同请求共享一次计算；缓存过期后先返回旧结果并在后台刷新，后台刷新在
+# 其他线程中执行，因此加载函数自行打开数据库会话。权限检查在接口中完成，接口在
+# 调用加载函数前关闭请求的会话归还连接，每个请求同时只占用一个连接。
+# 加载函数始终读取主库，即使配置了只读副本：结果由所有用户共享，写入后失效的键
+# 如果从有延迟的副本重新加载，旧数据会在缓存中保留整个TTL，写入者也读不到自己的写入。
+# 配置副本后这些接口只有查询实体和权限检查使用副本。
+
+@cached(statistics_cache, key=lambda assignment_id: ("assignment", assignment_id))
+def _load_assignment_statistics(assignment_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        assignment = db.get(Assignment, assignment_id)
+        course = db.get(Course, assignment.course_id)
+        return get_assignment_dashboard(db, assignment, class_id=course.class_id)
+
+
+@cached(statistics_cache, key=lambda course_id: ("course", course_id))
+def _load_course_statistics(course_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        return get_course_dashboard(db, db.get(Course, course_id))
+
+
+@cached(statistics_cache, key=lambda course_id: ("gradebook", course_id))
+def _load_gradebook(course_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        course = db.get(Course, course_id)
+        return get_course_gradebook(db, course_id=course_id, class_id=course.class_id)
+
+
+@cached(statistics_cache, key=lambda course_id: ("course_leaderboard", course_id))
+def _load_course_leaderboard(course_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        course = db.get(Course, course_id)
+        return {
+            "course_id": course_id,
+            "course_name": course.name,
+            **get_leaderboard(db, class_id=course.class_id, course_id=course_id),
+        }
+
+
+@cached(statistics_cache, key=lambda user_id: ("user", user_id))
+def _load_user_statistics(user_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        user = db.get(User, user_id)
+        # 如果是学生，获取提交情况；如果是教师，获取教授课程情况
+        if user.role == "student":
+            return get_student_dashboard(db, user)
+        return get_teacher_dashboard(db, user)
+
+
+@cached(statistics_cache, key=lambda class_id: ("class", class_id))
+def _load_class_statistics(class_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        return get_class_dashboard(db, db.get(Class, class_id))
+
+
+@cached(statistics_cache, key=lambda class_id: ("class_report", class_id))
+def _load_class_score_report(class_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        class_ = db.get(Class, class_id)
+        return {
+            "class_id": class_id,
+            "class_name": class_.name,
+            **get_class_score_report(db, class_id=class_id),
+        }
+
+
+@cached(statistics_cache, key=lambda class_id: ("class_leaderboard", class_id))
+def _load_class_leaderboard(class_id: int) -> Dict[str, Any]:
+    with get_session() as db:
+        class_ = db.get(Class, class_id)
+        return {
+            "class_id": class_id,
+            "class_name": class_.name,
+            **get_leaderboard(db, class_id=class_id),
+        }
+
+
 @router.get("/assignments/{assignment_id}")
 def get_assignment_statistics(
     assignment_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取作业统计信息(仅教师)
@@ -31,79 +126,94 @@ def get_assignment_statistics(
             detail="作业不存在",
         )
     
-    # 获取课程信息
-    course = db.get(Course, assignment.course_id)
-    
     # 权限检查：只有课程教师和管理员可以查看作业统计
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    if not permissions.can_teach(assignment.course_id):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权查看此作业统计",
         )
     
-    # 获取班级成员数量(学生)
-    class_students_count = db.exec(
-        select(func.count(ClassMember.id)).where(
-            ClassMember.class_id == course.class_id,
-            ClassMember.role == "student",
-        )
-    ).one()
+    # 权限检查通过后归还请求的连接再读取缓存，加载函数使用自己的会话
+    db.close()
+    return _load_assignment_statistics(assignment_id)
+
+
+@router.get("/assignments/{assignment_id}/timeline")
+def get_assignment_timeline(
+    assignment_id: int,
+    granularity: TimelineGranularity = TimelineGranularity.HOUR,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
+) -> Any:
+    """
+    获取作业提交时间线(仅教师)
     
-    # 获取提交数量
-    total_submissions = db.exec(
-        select(func.count(Submission.id)).where(
-            Submission.assignment_id == assignment_id,
+    按相对截止时间的小时或天统计提交数量、累计提交曲线和迟交率
+    """
+    # 查询作业
+    assignment = db.get(Assignment, assignment_id)
+    if not assignment:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="作业不存在",
         )
-    ).one()
     
-    # 获取已批改数量
-    graded_submissions = db.exec(
-        select(func.count(Grading.id)).where(
-            Grading.submission.has(assignment_id=assignment_id),
+    # 权限检查：只有课程教师和管理员可以查看作业统计
+    if not permissions.can_teach(assignment.course_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此作业统计",
         )
-    ).one()
     
-    # 获取分数信息
-    gradings = db.exec(
-        select(Grading).join(Submission).where(
-            Submission.assignment_id == assignment_id,
-        )
-    ).all()
+    timeline = get_submission_timeline(db, granularity, assignment_id=assignment_id)
     
-    scores = [g.score for g in gradings] if gradings else []
+    return {
+        "assignment_id": assignment_id,
+        "assignment_title": assignment.title,
+        "due_date": assignment.due_date.isoformat(),
+        "granularity": granularity,
+        **timeline,
+    }
+
+
+@router.get("/courses/{course_id}/timeline")
+def get_course_timeline(
+    course_id: int,
+    granularity: TimelineGranularity = TimelineGranularity.HOUR,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
+) -> Any:
+    """
+    获取课程提交时间线(仅教师)
     
-    avg_score = sum(scores) / len(scores) if scores else 0
-    max_score = max(scores) if scores else 0
-    min_score = min(scores) if scores else 0
+    每次提交按所属作业的截止时间分桶后合并，另附每个作业的迟交率
+    """
+    # 查询课程
+    course = db.get(Course, course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="课程不存在",
+        )
     
-    # 分数分布
-    ranges = ["0-10", "11-20", "21-30", "31-40", "41-50", 
-              "51-60", "61-70", "71-80", "81-90", "91-100"]
+    # 权限检查：只有课程教师和管理员可以查看课程统计
+    if not permissions.can_teach(course):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此课程统计",
+        )
     
-    distribution = [0] * len(ranges)
-    for score in scores:
-        index = min(int(score / 10), 9)  # 将分数归入对应的区间
-        distribution[index] += 1
+    timeline = get_submission_timeline(db, granularity, course_id=course_id)
     
-    # 构建统计结果
-    result = {
-        "assignment_id": assignment_id,
-        "assignment_title": assignment.title,
-        "total_students": class_students_count,
-        "total_submissions": total_submissions,
-        "submission_rate": total_submissions / class_students_count if class_students_count > 0 else 0,
-        "graded_submissions": graded_submissions,
-        "grading_rate": graded_submissions / total_submissions if total_submissions > 0 else 0,
-        "average_score": avg_score,
-        "highest_score": max_score,
-        "lowest_score": min_score,
-        "score_distribution": {
-            "ranges": ranges,
-            "counts": distribution,
-        },
+    return {
+        "course_id": course_id,
+        "course_name": course.name,
+        "granularity": granularity,
+        **timeline,
+        "assignments": get_course_assignment_late_rates(db, course_id=course_id),
     }
-    
-    return result
 
 
 @router.get("/courses/{course_id}")
@@ -111,6 +221,7 @@ def get_course_statistics(
     course_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取课程统计信息(仅教师)
@@ -124,83 +235,119 @@ def get_course_statistics(
         )
     
     # 权限检查：只有课程教师和管理员可以查看课程统计
-    if current_user.role != "admin" and course.teacher_id != current_user.id:
+    if not permissions.can_teach(course):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="无权查看此课程统计",
         )
     
-    # 获取学生数量
-    total_students = db.exec(
-        select(func.count(ClassMember.id)).where(
-            ClassMember.class_id == course.class_id,
-            ClassMember.role == "student",
-        )
-    ).one()
+    # 权限检查通过后归还请求的连接再读取缓存，加载函数使用自己的会话
+    db.close()
+    return _load_course_statistics(course_id)
+
+
+# 紧凑编码中作业列和学生行的字段顺序
+GRADEBOOK_ASSIGNMENT_FIELDS = [
+    "assignment_id", "title", "total_points", "submission_count",
+    "graded_count", "average_score", "highest_score", "lowest_score",
+]
+GRADEBOOK_STUDENT_FIELDS = [
+    "student_id", "username", "submitted_count", "graded_count",
+    "total_score", "average_score",
+]
+
+
+@router.get("/courses/{course_id}/gradebook")
+def get_course_gradebook_statistics(
+    course_id: int,
+    compact: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
+) -> Any:
+    """
+    获取课程成绩册(仅教师)
     
-    # 获取作业数量
-    total_assignments = db.exec(
-        select(func.count(Assignment.id)).where(
-            Assignment.course_id == course_id,
+    返回学生 × 作业的成绩矩阵以及每个学生和每个作业的汇总。compact=true 时
+    以字段名列表加数组的形式返回，减小大矩阵的响应体积。
+    """
+    # 查询课程
+    course = db.get(Course, course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="课程不存在",
         )
-    ).one()
-    
-    # 获取每个作业的提交情况
-    assignments = db.exec(
-        select(Assignment).where(Assignment.course_id == course_id)
-    ).all()
     
-    assignment_stats = []
-    total_submission_rate = 0
-    total_avg_score = 0
+    # 权限检查：只有课程教师和管理员可以查看成绩册
+    if not permissions.can_teach(course):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此课程统计",
+        )
     
-    for assignment in assignments:
-        # 获取提交数量
-        submissions_count = db.exec(
-            select(func.count(Submission.id)).where(
-                Submission.assignment_id == assignment.id,
-            )
-        ).one()
-        
-        submission_rate = submissions_count / total_students if total_students > 0 else 0
-        
-        # 获取分数信息
-        gradings = db.exec(
-            select(Grading).join(Submission).where(
-                Submission.assignment_id == assignment.id,
-            )
-        ).all()
-        
-        scores = [g.score for g in gradings] if gradings else []
-        avg_score = sum(scores) / len(scores) if scores else 0
-        
-        assignment_stats.append({
-            "assignment_id": assignment.id,
-            "title": assignment.title,
-            "submissions_count": submissions_count,
-            "submission_rate": submission_rate,
-            "average_score": avg_score,
-        })
-        
-        total_submission_rate += submission_rate
-        total_avg_score += avg_score
+    # 权限检查通过后归还请求的连接再读取缓存，缓存的是与编码无关的成绩册
+    db.close()
+    gradebook = _load_gradebook(course_id)
     
-    # 计算平均值
-    avg_submission_rate = total_submission_rate / total_assignments if total_assignments > 0 else 0
-    avg_course_score = total_avg_score / total_assignments if total_assignments > 0 else 0
+    if compact:
+        return {
+            "course_id": course_id,
+            "course_name": course.name,
+            "assignment_fields": GRADEBOOK_ASSIGNMENT_FIELDS,
+            "assignments": [
+                [assignment[field] for field in GRADEBOOK_ASSIGNMENT_FIELDS]
+                for assignment in gradebook["assignments"]
+            ],
+            "student_fields": GRADEBOOK_STUDENT_FIELDS,
+            "students": [
+                [student[field] for field in GRADEBOOK_STUDENT_FIELDS]
+                for student in gradebook["students"]
+            ],
+            "scores": gradebook["scores"],
+        }
     
-    # 构建统计结果
-    result = {
+    return {
         "course_id": course_id,
         "course_name": course.name,
-        "total_students": total_students,
-        "total_assignments": total_assignments,
-        "average_submission_rate": avg_submission_rate,
-        "average_course_score": avg_course_score,
-        "assignments": assignment_stats,
+        "assignments": gradebook["assignments"],
+        "students": [
+            {**student, "scores": row_scores}
+            for student, row_scores in zip(gradebook["students"], gradebook["scores"])
+        ],
     }
+
+
+@router.get("/courses/{course_id}/leaderboard")
+def get_course_leaderboard(
+    course_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
+) -> Any:
+    """
+    获取课程排行榜(仅教师)
+    
+    返回每个学生的名次、百分位以及与不含最近一次作业时相比的名次变化
+    """
+    # 查询课程
+    course = db.get(Course, course_id)
+    if not course:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="课程不存在",
+        )
+    
+    # 权限检查：只有课程教师和管理员可以查看课程排行榜
+    if not permissions.can_teach(course):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此课程统计",
+        )
     
-    return result
+    # 权限检查通过后归还请求的连接再读取缓存，加载函数使用自己的会话
+    db.close()
+    return _load_course_leaderboard(course_id)
 
 
 @router.get("/users/{user_id}")
@@ -227,162 +374,19 @@ def get_user_statistics(
             detail="用户不存在",
         )
     
-    # 如果是学生，获取提交情况
-    if user.role == "student":
-        # 获取用户所在的班级
-        class_members = db.exec(
-            select(ClassMember).where(ClassMember.user_id == user_id)
-        ).all()
-        class_ids = [cm.class_id for cm in class_members]
-        
-        # 获取用户所在班级的课程
-        courses = db.exec(
-            select(Course).where(Course.class_id.in_(class_ids))
-        ).all()
-        
-        course_stats = []
-        
-        for course in courses:
-            # 获取课程的作业
-            assignments = db.exec(
-                select(Assignment).where(Assignment.course_id == course.id)
-            ).all()
-            
-            assignment_stats = []
-            total_score = 0
-            total_graded = 0
-            
-            for assignment in assignments:
-                # 查询提交记录
-                submission = db.exec(
-                    select(Submission).where(
-                        Submission.assignment_id == assignment.id,
-                        Submission.student_id == user_id,
-                    )
-                ).first()
-                
-                # 查询批改记录
-                grading = None
-                if submission:
-                    grading = db.exec(
-                        select(Grading).where(
-                            Grading.submission_id == submission.id,
-                        )
-                    ).first()
-                
-                # 统计信息
-                status = "not_submitted"
-                score = None
-                
-                if submission:
-                    status = "submitted"
-                    if grading:
-                        status = "graded"
-                        score = grading.score
-                        total_score += score
-                        total_graded += 1
-                
-                assignment_stats.append({
-                    "assignment_id": assignment.id,
-                    "title": assignment.title,
-                    "status": status,
-                    "score": score,
-                    "due_date": assignment.due_date.isoformat(),
-                })
-            
-            # 计算平均分
-            avg_score = total_score / total_graded if total_graded > 0 else None
-            
-            course_stats.append({
-                "course_id": course.id,
-                "course_name": course.name,
-                "total_assignments": len(assignments),
-                "completed_assignments": len([a for a in assignment_stats if a["status"] != "not_submitted"]),
-                "graded_assignments": total_graded,
-                "average_score": avg_score,
-                "assignments": assignment_stats,
-            })
-        
-        result = {
-            "user_id": user_id,
-            "username": user.username,
-            "role": user.role,
-            "courses": course_stats,
-        }
-    
-    # 如果是教师，获取教授课程情况
-    elif user.role == "teacher":
-        # 获取教师的课程
-        courses = db.exec(
-            select(Course).where(Course.teacher_id == user_id)
-        ).all()
-        
-        course_stats = []
-        
-        for course in courses:
-            # 获取课程的作业
-            assignments_count = db.exec(
-                select(func.count(Assignment.id)).where(
-                    Assignment.course_id == course.id,
-                )
-            ).one()
-            
-            # 获取学生数量
-            students_count = db.exec(
-                select(func.count(ClassMember.id)).where(
-                    ClassMember.class_id == course.class_id,
-                    ClassMember.role == "student",
-                )
-            ).one()
-            
-            course_stats.append({
-                "course_id": course.id,
-                "course_name": course.name,
-                "total_assignments": assignments_count,
-                "total_students": students_count,
-            })
-        
-        result = {
-            "user_id": user_id,
-            "username": user.username,
-            "role": user.role,
-            "total_courses": len(courses),
-            "courses": course_stats,
-        }
-    
     # 如果是管理员，获取系统概览
-    else:
-        # 获取用户数量
-        total_users = db.exec(
-            select(func.count(User.id))
-        ).one()
-        
-        # 获取班级数量
-        total_classes = db.exec(
-            select(func.count(Class.id))
-        ).one()
-        
-        # 获取课程数量
-        total_courses = db.exec(
-            select(func.count(Course.id))
-        ).one()
-        
-        # 获取作业数量
-        total_assignments = db.exec(
-            select(func.count(Assignment.id))
-        ).one()
-        
-        result = {
+    if user.role == "admin":
+        # 系统概览读取增量维护的计数表，与管理员无关，不按用户缓存
+        return {
             "user_id": user_id,
             "username": user.username,
             "role": user.role,
-            "total_users": total_users,
-            "total_classes": total_classes,
-            "total_courses": total_courses,
-            "total_assignments": total_assignments,
+            **get_system_overview(db),
         }
     
-    return result
+    # 学生和教师的统计按用户缓存，归还请求的连接后再读取
+    db.close()
+    return _load_user_statistics(user_id)
 
 
 @router.get("/classes/{class_id}")
@@ -390,6 +394,7 @@ def get_class_statistics(
     class_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
 ) -> Any:
     """
     获取班级统计信息(仅教师)
@@ -403,94 +408,76 @@ def get_class_statistics(
         )
     
     # 权限检查：只有班级教师和管理员可以查看班级统计
-    if current_user.role != "admin":
-        is_teacher = db.exec(
-            select(ClassMember).where(
-                ClassMember.class_id == class_id,
-                ClassMember.user_id == current_user.id,
-                ClassMember.role == "teacher",
-            )
-        ).first()
-        if not is_teacher:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="无权查看此班级统计",
-            )
-    
-    # 获取班级成员
-    students = db.exec(
-        select(User)
-        .join(ClassMember, User.id == ClassMember.user_id)
-        .where(
-            ClassMember.class_id == class_id,
-            ClassMember.role == "student",
+    if not permissions.is_class_teacher(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此班级统计",
         )
-    ).all()
     
-    # 获取班级课程
-    courses = db.exec(
-        select(Course).where(Course.class_id == class_id)
-    ).all()
+    # 权限检查通过后归还请求的连接再读取缓存，加载函数使用自己的会话
+    db.close()
+    return _load_class_statistics(class_id)
+
+
+@router.get("/classes/{class_id}/report")
+def get_class_score_report_statistics(
+    class_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
+) -> Any:
+    """
+    获取班级成绩分析报告(仅教师)
     
-    # 统计每个学生的情况
-    student_stats = []
+    包含按作业总分归一化的得分率分布，以及每个学生的加权平均得分率和平均标准分
+    """
+    # 查询班级
+    class_ = db.get(Class, class_id)
+    if not class_:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="班级不存在",
+        )
     
-    for student in students:
-        # 获取学生提交数
-        submissions_count = db.exec(
-            select(func.count(Submission.id)).where(
-                Submission.student_id == student.id
-            )
-        ).one()
-        
-        # 获取学生批改数
-        gradings = db.exec(
-            select(Grading)
-            .join(Submission, Grading.submission_id == Submission.id)
-            .where(
-                Submission.student_id == student.id
-            )
-        ).all()
-        
-        # 计算平均分
-        scores = [g.score for g in gradings]
-        avg_score = sum(scores) / len(scores) if scores else 0
-        
-        student_stats.append({
-            "student_id": student.id,
-            "username": student.username,
-            "email": student.email,
-            "total_submissions": submissions_count,
-            "graded_submissions": len(gradings),
-            "average_score": avg_score,
-        })
+    # 权限检查：只有班级教师和管理员可以查看班级成绩分析
+    if not permissions.is_class_teacher(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此班级统计",
+        )
     
-    # 统计每个课程的情况
-    course_stats = []
+    # 权限检查通过后归还请求的连接再读取缓存，加载函数使用自己的会话
+    db.close()
+    return _load_class_score_report(class_id)
+
+
+@router.get("/classes/{class_id}/leaderboard")
+def get_class_leaderboard(
+    class_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_teacher_user),
+    permissions: PermissionResolver = Depends(get_permissions),
+) -> Any:
+    """
+    获取班级排行榜(仅教师)
     
-    for course in courses:
-        # 获取课程作业数
-        assignments_count = db.exec(
-            select(func.count(Assignment.id)).where(
-                Assignment.course_id == course.id
-            )
-        ).one()
-        
-        course_stats.append({
-            "course_id": course.id,
-            "course_name": course.name,
-            "teacher_id": course.teacher_id,
-            "total_assignments": assignments_count,
-        })
+    按班级全部课程的总分排名，返回每个学生的名次、百分位和名次变化
+    """
+    # 查询班级
+    class_ = db.get(Class, class_id)
+    if not class_:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="班级不存在",
+        )
     
-    # 构建统计结果
-    result = {
-        "class_id": class_id,
-        "class_name": class_.name,
-        "total_students": len(students),
-        "total_courses": len(courses),
-        "students": student_stats,
-        "courses": course_stats,
-    }
+    # 权限检查：只有班级教师和管理员可以查看班级排行榜
+    if not permissions.is_class_teacher(class_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="无权查看此班级统计",
+        )
     
-    return result 
\ No newline at end of file
+    # 权限检查通过后归还请求的连接再读取缓存，加载函数使用自己的会话
+    db.close()
+    return _load_class_leaderboard(class_id)
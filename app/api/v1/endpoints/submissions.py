@@ -2,8 +2,9 @@ from typing import Any, List
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile, status
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.api.deps import get_current_active_user, get_current_teacher_user, get_db
+from app.api.deps import get_async_db, get_current_active_user, get_current_teacher_user, get_db
 from app.models.submission import Submission, SubmissionRead
 from app.models.user import User
 from app.services.file_service import save_submission_file, delete_submission_file
@@ -16,7 +17,7 @@ async def create_submission(
     assignment_id: int = Form(...),
     comments: str = Form(None),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
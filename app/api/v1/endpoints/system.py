@@ -0,0 +1,77 @@
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_current_admin_user
+from app.core.security import password_hash_pool
+from app.db import async_session, session
+from app.db.pool import get_pool_status
+from app.db.replicas import replica_router
+from app.models.user import User
+from app.services.precompute_service import get_precompute_status
+from app.services.permission_service import permission_cache
+from app.services.principal_service import principal_cache
+from app.services.statistics_service import statistics_cache
+from app.utils.sql_instrumentation import get_request_metrics
+
+router = APIRouter()
+
+
+@router.get("/cache")
+def read_cache_stats(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取缓存命中统计(仅管理员)，password_hash 为登录和注册使用的密码哈希线程池的排队统计
+    """
+    return {
+        "statistics": statistics_cache.stats(),
+        "principal": principal_cache.stats(),
+        "permission": permission_cache.stats(),
+        "password_hash": password_hash_pool.stats(),
+    }
+
+
+@router.get("/precompute")
+def read_precompute_status(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取统计面板预计算的运行状态和各任务耗时(仅管理员)
+    """
+    return get_precompute_status()
+
+
+@router.get("/pool")
+def read_pool_status(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取数据库连接池的状态和统计(仅管理员)，SQLite 生产模式下 writer 为写连接的状态，
+    其中 waiting 为排队等待写入的请求数；async 为异步接口使用的连接池状态
+    """
+    pool_status = get_pool_status(session.engine)
+    if session.writer_engine is not None:
+        pool_status["writer"] = get_pool_status(session.writer_engine)
+    pool_status["async"] = get_pool_status(async_session.async_engine.sync_engine)
+    return pool_status
+
+
+@router.get("/requests")
+def read_request_metrics(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取按路由汇总的请求耗时、SQL语句数、N+1 和慢请求次数(仅管理员)
+    """
+    return get_request_metrics()
+
+
+@router.get("/replicas")
+def read_replica_status(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    获取只读副本的复制延迟、连接池状态和读取分配统计(仅管理员)
+    """
+    return replica_router.status()
@@ -6,6 +6,7 @@ from sqlmodel import Session, select
 from app.api.deps import get_current_active_user, get_current_admin_user, get_db
 from app.core.security import get_password_hash
 from app.models.user import User, UserCreate, UserRead, UserUpdate
+from app.services.principal_service import invalidate_principal
 
 router = APIRouter()
 
@@ -73,6 +74,7 @@ def update_current_user(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    invalidate_principal(current_user.id)
     
     return current_user
 
@@ -154,6 +156,8 @@ def update_user(
     db.add(user)
     db.commit()
     db.refresh(user)
+    # 停用或修改的用户下一个请求重新读取
+    invalidate_principal(user.id)
     
     return user
 
@@ -183,5 +187,6 @@ def delete_user(
     
     db.delete(user)
     db.commit()
+    invalidate_principal(user_id)
     
     return {"message": "用户已删除"} 
\ No newline at end of file
@@ -10,6 +10,11 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 分钟 * 24 小时 * 8 天 = 8 天
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # 密码哈希线程池：登录、注册时的 bcrypt 计算(每次 100ms 以上)在独立线程池中执行，不阻塞事件循环；
+    # bcrypt 计算时释放 GIL，线程数一般设为CPU核数。执行中和排队的请求数超过
+    # PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE 时直接返回 503，不再继续排队
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 1
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
     # BACKEND_CORS_ORIGINS用于设置允许跨域请求的源
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
@@ -30,6 +35,42 @@ class Settings(BaseSettings):
     MYSQL_PASSWORD: str = "yulin123"
     MYSQL_DB: str = "llm0321_work"
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # 打印全部SQL语句，仅用于本地调试，会显著降低吞吐量
+    SQLALCHEMY_ECHO: bool = False
+    # 连接池配置：每个进程(gunicorn worker)各有一个连接池，数据库的最大连接数需不少于
+    # worker 数 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)；超过 DB_POOL_TIMEOUT 秒仍获取不到连接时报错；
+    # 连接使用超过 DB_POOL_RECYCLE 秒后重建(需小于 MySQL 的 wait_timeout)；
+    # DB_POOL_PRE_PING 在取出连接时先检测连接是否已断开
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # SQLite 生产模式：连接时启用 WAL 日志、synchronous=NORMAL、busy_timeout(毫秒)、
+    # 内存映射(字节)和页缓存(KB)；写入通过唯一的写连接排队执行(等待超过 SQLITE_WRITER_TIMEOUT 秒报错)，
+    # 读取使用独立的连接池。WAL 模式会写入数据库文件，关闭生产模式后仍然保留
+    SQLITE_PRODUCTION_MODE: bool = False
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    SQLITE_WRITER_TIMEOUT: float = 30
+    # 只读副本：GET 请求优先使用复制延迟不超过 REPLICA_MAX_LAG_SECONDS 的副本，都不满足时使用主库；
+    # 主库每 REPLICA_HEARTBEAT_SECONDS 秒写入心跳，各副本的延迟最多每 REPLICA_LAG_CHECK_SECONDS 秒检测一次；
+    # 用户写入后 READ_YOUR_WRITES_SECONDS 秒内的读取仍使用主库。
+    # REPLICA_STANDIN_SYNC_SECONDS 大于 0 时按该间隔把 SQLite 主库复制到副本文件，用于本地模拟主从复制
+    SQLALCHEMY_REPLICA_URIS: List[str] = []
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    REPLICA_HEARTBEAT_SECONDS: float = 1
+    REPLICA_LAG_CHECK_SECONDS: float = 1
+    READ_YOUR_WRITES_SECONDS: float = 10
+    REPLICA_STANDIN_SYNC_SECONDS: float = 0
+
+    @validator("SQLALCHEMY_REPLICA_URIS", pre=True)
+    def assemble_replica_uris(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
 
     @validator("SQLALCHEMY_DATABASE_URI", pre=True)
     def assemble_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
@@ -45,6 +86,20 @@ class Settings(BaseSettings):
             # 使用MySQL数据库
             return f"mysql+pymysql://{values.get('MYSQL_USER')}:{values.get('MYSQL_PASSWORD')}@{values.get('MYSQL_SERVER')}/{values.get('MYSQL_DB')}"
 
+    # 异步接口使用的连接字符串，默认把 SQLALCHEMY_DATABASE_URI 的驱动换为 aiosqlite / asyncmy；
+    # 异步引擎有自己的连接池(同样按 DB_POOL_* 配置)
+    ASYNC_SQLALCHEMY_DATABASE_URI: Optional[str] = None
+
+    @validator("ASYNC_SQLALCHEMY_DATABASE_URI", pre=True)
+    def assemble_async_db_connection(cls, v: Optional[str], values: Dict[str, Any]) -> Any:
+        if isinstance(v, str):
+            return v
+        uri = values.get("SQLALCHEMY_DATABASE_URI") or ""
+        scheme, separator, rest = uri.partition("://")
+        if scheme.startswith("sqlite"):
+            return f"sqlite+aiosqlite{separator}{rest}"
+        return f"mysql+asyncmy{separator}{rest}"
+
     # 文件存储配置
     STORAGE_TYPE: str = "local"  # 'local', 's3', 'aliyun'
     LOCAL_STORAGE_PATH: str = "uploads"
@@ -53,6 +108,47 @@ class Settings(BaseSettings):
     S3_BUCKET_NAME: Optional[str] = None
     S3_REGION: Optional[str] = None
     
+    # 统计缓存配置
+    STATISTICS_CACHE_TTL_SECONDS: int = 60
+    STATISTICS_CACHE_MAX_SIZE: int = 1024
+    # 缓存过期后仍返回旧结果并在后台刷新的时间(秒)，0 表示过期后同步重新计算
+    STATISTICS_CACHE_STALE_SECONDS: int = 300
+    # 统计缓存保存在各进程内，写入数据时的失效默认只在本进程生效，多个 worker 时其他进程最多
+    # TTL + STALE 秒(预计算的面板最多两个预计算周期)后才读到新数据。配置 Redis 后失效通过
+    # Redis 中的版本号通知所有进程，每次读取缓存多一次 Redis 查询
+    STATISTICS_CACHE_REDIS_URL: Optional[str] = None
+    
+    # 当前用户缓存：令牌验证通过后按用户ID缓存用户信息(不含密码哈希)，请求不再查询 users 表；
+    # 修改、删除用户后失效，TTL 为 0 时不缓存。进程内缓存只在本进程失效，多个 worker 时其他进程
+    # 最多 TTL 秒后才读到修改；配置 PRINCIPAL_CACHE_REDIS_URL 后各进程共用 Redis 中的缓存
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_REDIS_URL: Optional[str] = None
+    # 权限范围缓存：按用户ID缓存所在班级的角色和所教课程，权限判断不再逐个查询班级成员表；
+    # 班级成员、课程变化后失效(只在本进程内失效，其他 worker 最多 TTL 秒后生效)
+    PERMISSION_CACHE_TTL_SECONDS: int = 60
+    PERMISSION_CACHE_MAX_SIZE: int = 10000
+    
+    # 统计面板预计算配置：运行间隔(秒，0 表示不启用)；低峰时段(小时，0-23)内
+    # 每天全量刷新一次，忽略"无写入则跳过"的规则并重新校准实体计数；
+    # 没有写入的面板最多 STATISTICS_PRECOMPUTE_MAX_AGE_SECONDS 秒重新计算一次。
+    # 多个 worker 中只有一个运行预计算：配置 STATISTICS_CACHE_REDIS_URL 时通过 Redis 租约选出，
+    # 否则通过本机的文件锁选出(每台主机一个)
+    STATISTICS_PRECOMPUTE_INTERVAL_SECONDS: int = 300
+    STATISTICS_PRECOMPUTE_FULL_REFRESH_HOURS: List[int] = [3]
+    STATISTICS_PRECOMPUTE_MAX_AGE_SECONDS: int = 3600
+    
+    # 请求SQL统计：每个请求的语句数和数据库耗时通过 Server-Timing 响应头返回；
+    # 同一形态的语句在一个请求中重复执行达到阈值时视为 N+1 查询；
+    # 慢请求(毫秒)和 N+1 请求按采样率(0-1)写入日志
+    SQL_INSTRUMENTATION_ENABLED: bool = True
+    SQL_N_PLUS_ONE_THRESHOLD: int = 10
+    SLOW_REQUEST_MS: int = 500
+    SLOW_REQUEST_LOG_SAMPLE_RATE: float = 1.0
+    
+    # 成绩导出配置：每次从数据库游标读取的行数
+    EXPORT_CHUNK_SIZE: int = 1000
+    
     # Celery配置
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
@@ -1,11 +1,17 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Optional, Union
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
 
 from jose import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
 # 密码上下文，用于密码哈希
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -41,4 +47,84 @@ def get_password_hash(password: str) -> str:
     """
     获取密码哈希
     """
-    return pwd_context.hash(password) 
\ No newline at end of file
+    return pwd_context.hash(password)
+
+
+class PasswordHashPoolFull(Exception):
+    """密码哈希线程池中执行和排队的任务已满"""
+
+
+class PasswordHashPool:
+    """
+    执行密码哈希和验证的有界线程池
+
+    bcrypt 计算时释放 GIL，放到线程池中执行既不阻塞事件循环，也能同时使用多个CPU核。
+    执行中和排队的任务总数达到 workers + queue_size 时直接拒绝新任务，避免登录高峰时
+    请求无限排队，等到客户端超时才失败。
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        """
+        Args:
+            workers: 线程数
+            queue_size: 线程都在执行时最多排队的任务数
+        """
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _done(self, future: Future) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        在线程池中执行包含密码哈希或验证的函数
+
+        Args:
+            func: 要执行的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数的返回值
+
+        Raises:
+            PasswordHashPoolFull: 执行中和排队的任务已满
+        """
+        with self._lock:
+            if self.pending >= self.workers + self.queue_size:
+                self.rejected += 1
+                raise PasswordHashPoolFull()
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+        # 任务结束时才释放名额：请求被取消(客户端断开)后线程中的计算仍会继续
+        future = self._executor.submit(functools.partial(func, *args, **kwargs))
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取线程池统计
+
+        Returns:
+            线程数、排队上限、当前及最大的执行中和排队任务数、完成和拒绝次数
+        """
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self.pending,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_QUEUE_SIZE)
@@ -0,0 +1,80 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import RoutingSession, setup_sqlite_production_mode
+
+
+def create_async_engines(
+    url: str,
+    sqlite_production_mode: bool = settings.SQLITE_PRODUCTION_MODE,
+) -> Tuple[AsyncEngine, Optional[AsyncEngine]]:
+    """
+    创建异步数据库引擎，与 create_engines 对应
+
+    Args:
+        url: 使用异步驱动的数据库连接字符串
+        sqlite_production_mode: 是否启用 SQLite 生产模式，其他数据库忽略
+
+    Returns:
+        (引擎, 写引擎)：SQLite 生产模式下写引擎只有一个连接；其他情况下写引擎为 None
+    """
+    options = {
+        "echo": settings.SQLALCHEMY_ECHO,
+        # aiosqlite 对文件数据库默认不使用连接池
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    engine = create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        **options,
+    )
+    if not (url.startswith("sqlite") and sqlite_production_mode):
+        return engine, None
+
+    setup_sqlite_production_mode(engine.sync_engine)
+    writer = create_async_engine(
+        url,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITER_TIMEOUT,
+        **options,
+    )
+    setup_sqlite_production_mode(writer.sync_engine, writer=True)
+    return engine, writer
+
+
+async_engine, async_writer_engine = create_async_engines(settings.ASYNC_SQLALCHEMY_DATABASE_URI)
+
+
+class AsyncRoutingSession(AsyncSession):
+    """
+    读写分离的异步会话，读写规则与 RoutingSession 相同
+    """
+
+    def __init__(self, bind: AsyncEngine, writer: AsyncEngine, **kwargs: Any) -> None:
+        super().__init__(bind=bind, **kwargs)
+        self.sync_session = self._proxied = self._assign_proxied(
+            RoutingSession(bind.sync_engine, writer.sync_engine, future=True, **kwargs)
+        )
+
+
+@asynccontextmanager
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    # 异步会话不能在提交后延迟加载属性，提交后保留对象的属性值，响应序列化时不再查询
+    if async_writer_engine is None:
+        session = AsyncSession(async_engine, expire_on_commit=False)
+    else:
+        session = AsyncRoutingSession(async_engine, async_writer_engine, expire_on_commit=False)
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -10,4 +10,12 @@ from app.models.course import Course
 from app.models.assignment import Assignment
 from app.models.submission import Submission
 from app.models.grading import Grading
-from app.models.notification import Notification 
\ No newline at end of file
+from app.models.notification import Notification
+from app.models.replication import ReplicationHeartbeat
+from app.models.statistics import (
+    AssignmentScoreSketch,
+    AssignmentStatistics,
+    CourseScoreSketch,
+    EntityCounter,
+    StudentStatistics,
+) 
\ No newline at end of file
@@ -0,0 +1,207 @@
+import bisect
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+# 获取连接耗时直方图的分桶上限(毫秒)，最后一个桶收集超过最大上限的耗时
+CHECKOUT_LATENCY_BUCKETS_MS: List[float] = [1, 5, 10, 50, 100, 500, 1000, 5000]
+
+
+class PoolTelemetry:
+    """
+    线程安全的连接池统计：获取连接次数和耗时分布、等待中的线程数、溢出连接、超时、新建和失效的连接数
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+        # 连接失效事件的监听函数，固定为同一个对象，避免连接池重建时重复注册
+        self.on_invalidate = lambda dbapi_connection, connection_record, exception: self.record_invalidation()
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self.checkouts = 0
+            self.waiting = 0
+            self.max_waiting = 0
+            self.timeouts = 0
+            self.overflow_events = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.total_checkout_ms = 0.0
+            self.max_checkout_ms = 0.0
+            self.latency_histogram = [0] * (len(CHECKOUT_LATENCY_BUCKETS_MS) + 1)
+
+    def begin_checkout(self) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def end_checkout(self, seconds: float, timed_out: bool = False, overflowed: bool = False) -> None:
+        """
+        记录一次获取连接
+
+        Args:
+            seconds: 从请求连接到获得连接(或失败)的耗时(秒)
+            timed_out: 是否因连接池耗尽而超时
+            overflowed: 是否新建了超出 pool_size 的溢出连接
+        """
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_checkout_ms += elapsed_ms
+            self.max_checkout_ms = max(self.max_checkout_ms, elapsed_ms)
+            self.latency_histogram[bisect.bisect_left(CHECKOUT_LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+            if overflowed:
+                self.overflow_events += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计
+
+        Returns:
+            各项计数、平均和最大获取耗时，以及按分桶上限标注的耗时直方图
+        """
+        with self._lock:
+            labels = [f"<={bound:g}ms" for bound in CHECKOUT_LATENCY_BUCKETS_MS]
+            labels.append(f">{CHECKOUT_LATENCY_BUCKETS_MS[-1]:g}ms")
+            return {
+                "checkouts": self.checkouts,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "timeouts": self.timeouts,
+                "overflow_events": self.overflow_events,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "average_checkout_ms": self.total_checkout_ms / self.checkouts if self.checkouts else 0,
+                "max_checkout_ms": self.max_checkout_ms,
+                "checkout_latency_histogram": dict(zip(labels, self.latency_histogram)),
+            }
+
+
+pool_telemetry = PoolTelemetry()
+# SQLite 生产模式下单个写连接的统计，等待中的线程数即写入队列的长度
+writer_pool_telemetry = PoolTelemetry()
+# 只读副本连接池的统计(全部副本合计)
+replica_pool_telemetry = PoolTelemetry()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    记录获取连接耗时、等待线程数、溢出和超时的 QueuePool
+
+    连接池重建(engine.dispose)时会创建同一个类的新实例，统计保存在类属性 telemetry 指向的
+    模块级对象中，不会丢失。
+    """
+
+    telemetry = pool_telemetry
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # 每个连接池各自的线程状态：QueuePool 获取不到空闲连接时会递归调用 _do_get，只在最外层计时；
+        # overflowed 记录本线程这次获取是否新建了溢出连接
+        self._local = threading.local()
+        super().__init__(*args, **kwargs)
+        # 预检(pre_ping)发现断开的连接、执行时连接断开都会使连接失效
+        if not event.contains(self, "invalidate", self.telemetry.on_invalidate):
+            event.listen(self, "invalidate", self.telemetry.on_invalidate)
+
+    def _create_connection(self) -> Any:
+        self.telemetry.record_connect()
+        return super()._create_connection()
+
+    def _inc_overflow(self) -> bool:
+        # 与 QueuePool._inc_overflow 相同，另外在增加计数的同时判断新建的是否为溢出连接：
+        # 计数从 -pool_size 开始，增加后大于 0 即超出了 pool_size
+        if self._max_overflow == -1:
+            self._overflow += 1
+            self._local.overflowed = self._overflow > 0
+            return True
+        with self._overflow_lock:
+            if self._overflow < self._max_overflow:
+                self._overflow += 1
+                self._local.overflowed = self._overflow > 0
+                return True
+            return False
+
+    def _do_get(self) -> Any:
+        if getattr(self._local, "active", False):
+            return super()._do_get()
+
+        self._local.active = True
+        self._local.overflowed = False
+        self.telemetry.begin_checkout()
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.telemetry.end_checkout(time.perf_counter() - started, timed_out=True)
+            raise
+        except BaseException:
+            self.telemetry.end_checkout(time.perf_counter() - started)
+            raise
+        finally:
+            self._local.active = False
+        self.telemetry.end_checkout(time.perf_counter() - started, overflowed=self._local.overflowed)
+        return connection
+
+
+class WriterQueuePool(InstrumentedQueuePool):
+    """
+    SQLite 生产模式的写连接池，只有一个连接，等待获取连接的线程按先后顺序排队写入
+    """
+
+    telemetry = writer_pool_telemetry
+
+
+class ReplicaQueuePool(InstrumentedQueuePool):
+    """
+    只读副本的连接池，统计与主库分开
+    """
+
+    telemetry = replica_pool_telemetry
+
+
+def get_pool_status(engine: Engine) -> Dict[str, Any]:
+    """
+    获取连接池的配置、当前状态和统计
+
+    Args:
+        engine: 数据库引擎
+
+    Returns:
+        连接池类型、容量、当前签出/空闲/溢出连接数和连接池的统计
+    """
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "pool_size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout_seconds": pool.timeout(),
+            "recycle_seconds": pool._recycle,
+            "pre_ping": pool._pre_ping,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    # 异步引擎的连接池没有统计
+    telemetry = getattr(pool, "telemetry", None)
+    if telemetry is not None:
+        status.update(telemetry.stats())
+    return status
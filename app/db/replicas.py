@@ -0,0 +1,255 @@
+import itertools
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Generator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.pool import ReplicaQueuePool, get_pool_status
+from app.db.session import create_engines, get_session
+from app.models.replication import ReplicationHeartbeat
+from app.utils.cache import TTLCache
+from app.utils.scheduler import IntervalScheduler
+
+
+class Replica:
+    """
+    一个只读副本及其最近一次检测到的复制延迟
+    """
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.engine, _ = create_engines(url, poolclass=ReplicaQueuePool)
+        self.lag_seconds: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._checked_at: Optional[float] = None
+        self._checking = threading.Lock()
+
+    def refresh_lag(self, interval_seconds: float) -> None:
+        """
+        距上次检测超过间隔时读取副本上的心跳，计算复制延迟
+
+        同一时刻只有一个线程检测，其他线程直接使用上次的结果。无法连接或没有心跳时
+        延迟为 None，副本不会被使用。
+
+        Args:
+            interval_seconds: 检测间隔(秒)
+        """
+        if self._checked_at is not None and time.monotonic() - self._checked_at < interval_seconds:
+            return
+        if not self._checking.acquire(blocking=False):
+            return
+        try:
+            with self.engine.connect() as connection:
+                updated_at = connection.execute(
+                    select(ReplicationHeartbeat.updated_at).where(ReplicationHeartbeat.id == 1)
+                ).scalar()
+            if updated_at is None:
+                self.lag_seconds = None
+                self.last_error = "副本上没有心跳记录"
+            else:
+                self.lag_seconds = max((datetime.utcnow() - updated_at).total_seconds(), 0.0)
+                self.last_error = None
+        except Exception as exc:
+            self.lag_seconds = None
+            self.last_error = repr(exc)
+        finally:
+            self._checked_at = time.monotonic()
+            self._checking.release()
+
+
+class ReadOnlySession(Session):
+    """
+    只读副本的会话，写入会报错，避免写操作落到副本上
+    """
+
+
+@event.listens_for(ReadOnlySession, "before_flush")
+def _reject_flush(session: ReadOnlySession, flush_context: Any, instances: Any) -> None:
+    raise RuntimeError("只读副本的会话不能写入")
+
+
+class ReplicaRouter:
+    """
+    为只读请求选择副本
+
+    - 跳过复制延迟超过 max_lag_seconds 或无法连接的副本，其余副本轮询使用
+    - 没有可用副本时使用主库
+    - 用户写入后 read_your_writes_seconds 秒内的读取使用主库，保证读到自己的写入
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        max_lag_seconds: float,
+        lag_check_seconds: float,
+        read_your_writes_seconds: float,
+    ) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag_seconds = max_lag_seconds
+        self.lag_check_seconds = lag_check_seconds
+        # 最近写入过的用户ID，过期即恢复使用副本
+        self._recent_writers = TTLCache(max_size=100_000, ttl_seconds=read_your_writes_seconds)
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self.replica_reads = 0
+        self.sticky_reads = 0
+        self.fallback_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def record_write(self, user_id: Optional[int]) -> None:
+        """
+        记录用户的写入，之后一段时间内该用户的读取使用主库
+
+        Args:
+            user_id: 用户ID，未登录的请求为 None
+        """
+        if user_id is not None:
+            self._recent_writers.set(user_id, True)
+
+    def choose(self, user_id: Optional[int] = None) -> Optional[Replica]:
+        """
+        为只读请求选择副本
+
+        Args:
+            user_id: 发起请求的用户ID，未登录的请求为 None
+
+        Returns:
+            选中的副本，应使用主库时返回 None
+        """
+        if user_id is not None and self._recent_writers.get(user_id) is not None:
+            with self._lock:
+                self.sticky_reads += 1
+            return None
+
+        healthy = []
+        for replica in self.replicas:
+            replica.refresh_lag(self.lag_check_seconds)
+            if replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds:
+                healthy.append(replica)
+
+        with self._lock:
+            if not healthy:
+                self.fallback_reads += 1
+                return None
+            self.replica_reads += 1
+        return healthy[next(self._next) % len(healthy)]
+
+    def status(self) -> Dict[str, Any]:
+        """
+        获取副本状态和读取分配统计
+
+        Returns:
+            各副本的延迟、错误和连接池状态，以及使用副本、因写入后固定使用主库、因没有可用副本使用主库的读取次数
+        """
+        with self._lock:
+            counts = {
+                "replica_reads": self.replica_reads,
+                "sticky_reads": self.sticky_reads,
+                "fallback_reads": self.fallback_reads,
+            }
+        return {
+            "max_lag_seconds": self.max_lag_seconds,
+            "replicas": [
+                {
+                    "url": make_url(replica.url).render_as_string(hide_password=True),
+                    "lag_seconds": replica.lag_seconds,
+                    "healthy": replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds,
+                    "last_error": replica.last_error,
+                    "pool": get_pool_status(replica.engine),
+                }
+                for replica in self.replicas
+            ],
+            # 包含已过期但尚未清理的条目
+            "recent_writers": self._recent_writers.stats()["size"],
+            **counts,
+            "heartbeat_error": heartbeat_scheduler.last_error,
+            "standin_error": standin_scheduler.last_error,
+        }
+
+
+replica_router = ReplicaRouter(
+    settings.SQLALCHEMY_REPLICA_URIS,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    lag_check_seconds=settings.REPLICA_LAG_CHECK_SECONDS,
+    read_your_writes_seconds=settings.READ_YOUR_WRITES_SECONDS,
+)
+
+
+@contextmanager
+def get_replica_session(replica: Replica) -> Generator[Session, None, None]:
+    session = ReadOnlySession(replica.engine)
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def get_read_session(user_id: Optional[int] = None) -> Generator[Session, None, None]:
+    """
+    只读查询的会话，按 replica_router 的规则选择副本，没有可用副本或用户刚写入过时使用主库
+
+    Args:
+        user_id: 发起请求的用户ID，未登录的请求为 None
+    """
+    replica = replica_router.choose(user_id) if replica_router.enabled else None
+    if replica is None:
+        with get_session() as session:
+            yield session
+        return
+    with get_replica_session(replica) as session:
+        yield session
+
+
+def write_heartbeat() -> None:
+    """
+    在主库更新复制心跳
+    """
+    with get_session() as db:
+        heartbeat = db.get(ReplicationHeartbeat, 1) or ReplicationHeartbeat(id=1)
+        heartbeat.updated_at = datetime.utcnow()
+        db.add(heartbeat)
+        db.commit()
+
+
+def copy_sqlite_database(source_url: str, target_url: str) -> None:
+    """
+    用 SQLite 在线备份把主库完整复制到副本文件，本地模拟主从复制
+
+    Args:
+        source_url: 主库连接字符串
+        target_url: 副本连接字符串
+    """
+    source = sqlite3.connect(make_url(source_url).database)
+    target = sqlite3.connect(make_url(target_url).database)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def sync_standin_replicas() -> None:
+    """
+    把 SQLite 主库复制到全部副本文件
+    """
+    for replica in replica_router.replicas:
+        copy_sqlite_database(settings.SQLALCHEMY_DATABASE_URI, replica.url)
+
+
+heartbeat_scheduler = IntervalScheduler(
+    "replication-heartbeat", settings.REPLICA_HEARTBEAT_SECONDS, write_heartbeat
+)
+standin_scheduler = IntervalScheduler(
+    "replication-standin", settings.REPLICA_STANDIN_SYNC_SECONDS, sync_standin_replicas
+)
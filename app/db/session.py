@@ -1,21 +1,149 @@
 from contextlib import contextmanager
-from typing import Generator
+from typing import Any, Generator, Optional, Tuple, Type
 
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, SQLModel, create_engine
 
 from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, WriterQueuePool
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, echo=True)
+
+def apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any = None) -> None:
+    """
+    为新建的 SQLite 连接设置生产模式的 pragma
+
+    WAL 模式下读取不会阻塞写入，写入也不会阻塞读取；synchronous=NORMAL 在 WAL 模式下
+    只在检查点时同步磁盘，断电可能丢失最近提交的事务，但不会损坏数据库
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+        # cache_size 为负数时单位是 KB
+        cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}")
+    finally:
+        cursor.close()
+
+
+def _disable_driver_transactions(dbapi_connection: Any, connection_record: Any) -> None:
+    # 由引擎的 begin 事件开启事务，sqlite3 驱动不再自动执行 BEGIN
+    dbapi_connection.isolation_level = None
+
+
+def _begin_immediate(connection: Any) -> None:
+    # 事务开始时就获取写锁，避免先读后写的事务在升级写锁时失败("database is locked")
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def setup_sqlite_production_mode(engine: Engine, writer: bool = False) -> None:
+    """
+    为引擎注册 SQLite 生产模式的连接设置
+
+    Args:
+        engine: 同步引擎(异步引擎传入其 sync_engine)
+        writer: 是否为写引擎，写引擎的事务开始时即获取写锁
+    """
+    event.listen(engine, "connect", apply_sqlite_pragmas)
+    if writer:
+        event.listen(engine, "connect", _disable_driver_transactions)
+        event.listen(engine, "begin", _begin_immediate)
+
+
+def create_engines(
+    url: str,
+    sqlite_production_mode: bool = settings.SQLITE_PRODUCTION_MODE,
+    poolclass: Type[InstrumentedQueuePool] = InstrumentedQueuePool,
+) -> Tuple[Engine, Optional[Engine]]:
+    """
+    创建数据库引擎
+
+    Args:
+        url: 数据库连接字符串
+        sqlite_production_mode: 是否启用 SQLite 生产模式，其他数据库忽略
+        poolclass: 引擎(不含写引擎)的连接池类型
+
+    Returns:
+        (引擎, 写引擎)：SQLite 生产模式下写引擎只有一个连接，写入按先后顺序排队执行；
+        其他情况下写引擎为 None，读写都使用同一个引擎
+    """
+    is_sqlite = url.startswith("sqlite")
+    # SQLite 连接默认只能在创建它的线程中使用，而 FastAPI 会在线程池中执行同步接口和
+    # 流式响应的迭代，同一会话可能跨线程使用
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    options = {
+        "echo": settings.SQLALCHEMY_ECHO,
+        "connect_args": connect_args,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    engine = create_engine(
+        url,
+        poolclass=poolclass,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        **options,
+    )
+    if not (is_sqlite and sqlite_production_mode):
+        return engine, None
+
+    setup_sqlite_production_mode(engine)
+    writer = create_engine(
+        url,
+        poolclass=WriterQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.SQLITE_WRITER_TIMEOUT,
+        **options,
+    )
+    setup_sqlite_production_mode(writer, writer=True)
+    return engine, writer
+
+
+engine, writer_engine = create_engines(settings.SQLALCHEMY_DATABASE_URI)
+
+
+class RoutingSession(Session):
+    """
+    读写分离的会话：事务中第一次写入之前的查询使用读连接池，写入以及同一事务中之后的
+    全部语句使用写引擎，保证事务能读到自己的写入
+    """
+
+    def __init__(self, bind: Engine, writer: Engine, **kwargs: Any) -> None:
+        super().__init__(bind=bind, **kwargs)
+        self.writer = writer
+        self.writing = False
+
+    def get_bind(self, mapper: Any = None, clause: Any = None, **kwargs: Any) -> Any:
+        if self.writing or self._flushing or getattr(clause, "is_dml", False):
+            self.writing = True
+            return self.writer
+        return super().get_bind(mapper, clause, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_writer(session: RoutingSession, transaction: Any) -> None:
+    # 最外层事务提交或回滚后归还写连接，下一个事务重新从读连接池开始
+    if transaction.parent is None:
+        session.writing = False
 
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    # create_all 只为新建的表创建索引，已有的表需要补建后来新增的索引
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
 
 
 @contextmanager
 def get_session() -> Generator[Session, None, None]:
-    session = Session(engine)
+    session = Session(engine) if writer_engine is None else RoutingSession(engine, writer_engine)
     try:
         yield session
     finally:
-        session.close() 
\ No newline at end of file
+        session.close()
@@ -4,7 +4,11 @@ import uvicorn
 
 from app.api.api import api_router
 from app.core.config import settings
-from app.db.session import create_db_and_tables
+from app.db.replicas import heartbeat_scheduler, replica_router, standin_scheduler
+from app.db.session import create_db_and_tables, get_session
+from app.services.precompute_service import precompute_scheduler
+from app.services.statistics_service import ensure_statistics_built
+from app.utils.sql_instrumentation import SQLInstrumentationMiddleware
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -23,6 +27,10 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_headers=["*"],
     )
 
+# 统计每个请求的SQL语句数和数据库耗时
+if settings.SQL_INSTRUMENTATION_ENABLED:
+    app.add_middleware(SQLInstrumentationMiddleware)
+
 # 包含API路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -42,6 +50,26 @@ def on_startup():
     # 创建数据库表
     create_db_and_tables()
     print("数据库表已创建")
+    # 升级后首次启动时根据已有数据生成统计汇总
+    with get_session() as db:
+        if ensure_statistics_built(db):
+            print("统计汇总表已重建")
+    # 后台定时预计算统计面板
+    if settings.STATISTICS_PRECOMPUTE_INTERVAL_SECONDS > 0:
+        precompute_scheduler.start()
+    # 主库写入复制心跳，用于检测副本延迟；本地模拟时定时把主库复制到副本文件
+    if replica_router.enabled:
+        heartbeat_scheduler.start()
+        if settings.REPLICA_STANDIN_SYNC_SECONDS > 0:
+            standin_scheduler.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    """应用关闭时执行的函数"""
+    precompute_scheduler.stop(timeout=5)
+    heartbeat_scheduler.stop(timeout=5)
+    standin_scheduler.stop(timeout=5)
 
 
 if __name__ == "__main__":
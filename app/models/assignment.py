@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.course import Course
@@ -23,6 +24,10 @@ class Assignment(AssignmentBase, table=True):
     作业数据库模型
     """
     __tablename__ = "assignments"
+    __table_args__ = (
+        # 课程的作业列表，按截止时间查找最近的作业
+        Index("ix_assignments_course_id_due_date", "course_id", "due_date"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
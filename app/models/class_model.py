@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.user import User
@@ -68,6 +69,12 @@ class ClassMember(ClassMemberBase, table=True):
     班级成员数据库模型
     """
     __tablename__ = "class_members"
+    __table_args__ = (
+        # 按班级列出成员、按角色统计班级学生数
+        Index("ix_class_members_class_id_role_user_id", "class_id", "role", "user_id"),
+        # 用户所在班级和权限检查(用户是否为班级成员)
+        Index("ix_class_members_user_id_class_id", "user_id", "class_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     joined_at: datetime = Field(default_factory=datetime.utcnow)
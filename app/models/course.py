@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.class_model import Class
@@ -28,6 +29,12 @@ class Course(CourseBase, table=True):
     课程数据库模型
     """
     __tablename__ = "courses"
+    __table_args__ = (
+        # 班级的课程列表
+        Index("ix_courses_class_id", "class_id"),
+        # 教师所教的课程
+        Index("ix_courses_teacher_id", "teacher_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     teacher_id: int = Field(foreign_key="users.id")
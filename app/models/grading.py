@@ -1,6 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.submission import Submission
@@ -21,6 +22,10 @@ class Grading(GradingBase, table=True):
     作业批改数据库模型
     """
     __tablename__ = "gradings"
+    __table_args__ = (
+        # 按提交查找批改，统计查询中提交与批改的连接
+        Index("ix_gradings_submission_id", "submission_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     teacher_id: int = Field(foreign_key="users.id")
@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.user import User
@@ -29,6 +30,12 @@ class Notification(NotificationBase, table=True):
     通知数据库模型
     """
     __tablename__ = "notifications"
+    __table_args__ = (
+        # 通知列表按创建时间倒序分页
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),
+        # 按已读状态筛选通知、批量标记已读
+        Index("ix_notifications_user_id_is_read_created_at", "user_id", "is_read", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlmodel import Field, SQLModel
+
+
+class ReplicationHeartbeat(SQLModel, table=True):
+    """
+    复制心跳数据库模型
+
+    主库定时更新唯一一行的 updated_at，只读副本上这一行的时间与当前时间之差即为复制延迟。
+    """
+    __tablename__ = "replication_heartbeat"
+
+    id: int = Field(default=1, primary_key=True)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
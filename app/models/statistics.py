@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class ScoreStatisticsBase(SQLModel):
+    """
+    分数汇总基础模型
+
+    在提交和批改写入的同一事务中增量维护，统计接口直接读取，无需重新扫描
+    提交和批改记录。bucket_0 ~ bucket_9 与分数分布区间一一对应。
+    """
+    submission_count: int = Field(default=0)
+    graded_count: int = Field(default=0)
+    score_sum: float = Field(default=0)
+    score_sum_squares: float = Field(default=0)
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    bucket_0: int = Field(default=0)
+    bucket_1: int = Field(default=0)
+    bucket_2: int = Field(default=0)
+    bucket_3: int = Field(default=0)
+    bucket_4: int = Field(default=0)
+    bucket_5: int = Field(default=0)
+    bucket_6: int = Field(default=0)
+    bucket_7: int = Field(default=0)
+    bucket_8: int = Field(default=0)
+    bucket_9: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AssignmentStatistics(ScoreStatisticsBase, table=True):
+    """
+    作业统计汇总数据库模型
+    """
+    __tablename__ = "assignment_statistics"
+
+    assignment_id: int = Field(foreign_key="assignments.id", primary_key=True)
+
+
+class StudentStatistics(ScoreStatisticsBase, table=True):
+    """
+    学生统计汇总数据库模型
+    """
+    __tablename__ = "student_statistics"
+
+    student_id: int = Field(foreign_key="users.id", primary_key=True)
+
+
+class AssignmentScoreSketch(SQLModel, table=True):
+    """
+    作业分数草图数据库模型
+
+    每行是一个分箱的计数，分箱按占总分的比例划分(见 app.utils.score_sketch)。
+    只保存计数不为零的分箱，分位数由分箱累计计数插值得到。
+    """
+    __tablename__ = "assignment_score_sketches"
+
+    assignment_id: int = Field(foreign_key="assignments.id", primary_key=True)
+    bin_index: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+class CourseScoreSketch(SQLModel, table=True):
+    """
+    课程分数草图数据库模型
+
+    由课程内各作业的草图按分箱相加合并而来，随批改增量维护。
+    """
+    __tablename__ = "course_score_sketches"
+
+    course_id: int = Field(foreign_key="courses.id", primary_key=True)
+    bin_index: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+class EntityCounter(SQLModel, table=True):
+    """
+    实体计数数据库模型
+
+    系统概览使用的行数，在用户、班级、课程和作业插入或删除的同一事务中增量维护，
+    避免每次 COUNT(*) 全表扫描。updated_at 为最近一次增量更新时间，verified_at
+    为最近一次按原始记录重新计数的时间。
+    """
+    __tablename__ = "entity_counters"
+
+    name: str = Field(primary_key=True, max_length=50)
+    count: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    verified_at: datetime = Field(default_factory=datetime.utcnow)
@@ -2,6 +2,7 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.assignment import Assignment
@@ -27,6 +28,12 @@ class Submission(SubmissionBase, table=True):
     作业提交数据库模型
     """
     __tablename__ = "submissions"
+    __table_args__ = (
+        # 按作业统计提交时间分布(截止时间前后的提交曲线)
+        Index("ix_submissions_assignment_id_submission_time", "assignment_id", "submission_time"),
+        # 学生的提交列表、学生统计和某个学生在某个作业上的提交
+        Index("ix_submissions_student_id_assignment_id", "student_id", "assignment_id"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     student_id: int = Field(foreign_key="users.id")
@@ -0,0 +1,202 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+from sqlmodel import Session, select
+
+from app.models.assignment import Assignment
+from app.models.class_model import ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.submission import Submission
+from app.models.user import User
+from app.services.statistics_service import SCORE_RANGES
+
+
+class ScoreColumns(NamedTuple):
+    """
+    按列存放的批改分数，每个数组的第 i 个元素对应同一条批改记录
+    """
+    assignment_ids: np.ndarray
+    student_ids: np.ndarray
+    total_points: np.ndarray
+    scores: np.ndarray
+
+
+def load_class_scores(db: Session, class_id: int) -> ScoreColumns:
+    """
+    一次查询读取班级全部课程的批改分数，并转换为 NumPy 列
+
+    Args:
+        db: 数据库会话
+        class_id: 班级ID
+
+    Returns:
+        按列存放的批改分数
+    """
+    statement = (
+        select(
+            Submission.assignment_id,
+            Submission.student_id,
+            Assignment.total_points,
+            Grading.score,
+        )
+        .select_from(Grading)
+        .join(Submission, Submission.id == Grading.submission_id)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .join(Course, Course.id == Assignment.course_id)
+        .where(Course.class_id == class_id)
+    )
+    # 只需要原始值，直接走 Core 连接执行，省去 ORM 结果处理的开销
+    rows = db.connection().execute(statement).fetchall()
+    if not rows:
+        empty = np.empty(0)
+        return ScoreColumns(empty.astype(np.int64), empty.astype(np.int64), empty, empty)
+
+    assignment_ids, student_ids, total_points, scores = zip(*rows)
+    return ScoreColumns(
+        assignment_ids=np.asarray(assignment_ids, dtype=np.int64),
+        student_ids=np.asarray(student_ids, dtype=np.int64),
+        total_points=np.asarray(total_points, dtype=np.float64),
+        scores=np.asarray(scores, dtype=np.float64),
+    )
+
+
+def normalized_scores(columns: ScoreColumns) -> np.ndarray:
+    """
+    计算得分率(分数 / 作业总分)
+
+    Args:
+        columns: 批改分数列
+
+    Returns:
+        得分率数组，总分不大于0的作业得分率记为1
+    """
+    valid = columns.total_points > 0
+    safe_points = np.where(valid, columns.total_points, 1)
+    return np.where(valid, columns.scores / safe_points, 1.0)
+
+
+def z_scores(columns: ScoreColumns) -> np.ndarray:
+    """
+    计算每条批改在所属作业内的标准分
+
+    Args:
+        columns: 批改分数列
+
+    Returns:
+        标准分数组，作业内分数全部相同时记为0
+    """
+    if not len(columns.scores):
+        return np.empty(0)
+    _, groups = np.unique(columns.assignment_ids, return_inverse=True)
+    counts = np.bincount(groups)
+    means = np.bincount(groups, weights=columns.scores) / counts
+    deviations = columns.scores - means[groups]
+    stds = np.sqrt(np.bincount(groups, weights=deviations * deviations) / counts)
+    group_stds = stds[groups]
+    return np.divide(deviations, group_stds, out=np.zeros_like(deviations), where=group_stds > 0)
+
+
+def normalized_histogram(columns: ScoreColumns) -> np.ndarray:
+    """
+    按得分率统计分数分布，区间与 SCORE_RANGES 一一对应
+
+    分桶规则与统计汇总表一致：score * 10 与 total_points 的整数倍比较，
+    90% 及以上归入最后一个区间。
+
+    Args:
+        columns: 批改分数列
+
+    Returns:
+        每个区间的批改数量
+    """
+    count = len(SCORE_RANGES)
+    valid = columns.total_points > 0
+    safe_points = np.where(valid, columns.total_points, 1)
+    buckets = np.floor_divide(columns.scores * count, safe_points).astype(np.int64)
+    buckets = np.where(valid, np.clip(buckets, 0, count - 1), count - 1)
+    return np.bincount(buckets, minlength=count)
+
+
+def weighted_averages(
+    columns: ScoreColumns, weights: Optional[np.ndarray] = None
+) -> Dict[int, Dict[str, float]]:
+    """
+    计算每个学生的加权平均得分率和平均标准分
+
+    Args:
+        columns: 批改分数列
+        weights: 每条批改的权重，默认按作业总分加权(即总得分 / 总分)
+
+    Returns:
+        以学生ID为键的字典，包含批改数、加权平均得分率(百分比)和平均标准分
+    """
+    if not len(columns.scores):
+        return {}
+    if weights is None:
+        weights = columns.total_points
+    students, groups = np.unique(columns.student_ids, return_inverse=True)
+    counts = np.bincount(groups)
+    weight_sums = np.bincount(groups, weights=weights)
+    weighted_sums = np.bincount(groups, weights=normalized_scores(columns) * weights)
+    averages = np.divide(
+        weighted_sums, weight_sums, out=np.zeros_like(weighted_sums), where=weight_sums > 0
+    ) * 100
+    average_z_scores = np.bincount(groups, weights=z_scores(columns)) / counts
+
+    return {
+        int(student_id): {
+            "graded_assignments": int(count),
+            "weighted_average": float(average),
+            "average_z_score": float(z_score),
+        }
+        for student_id, count, average, z_score in zip(students, counts, averages, average_z_scores)
+    }
+
+
+def get_class_score_report(db: Session, class_id: int) -> Dict[str, Any]:
+    """
+    生成班级成绩分析报告
+
+    批改分数一次读取为 NumPy 列后做向量化计算，替代逐条遍历批改记录。
+
+    Args:
+        db: 数据库会话
+        class_id: 班级ID
+
+    Returns:
+        包含批改总数、得分率分布和每个学生加权平均得分率、平均标准分的字典
+    """
+    columns = load_class_scores(db, class_id)
+    student_averages = weighted_averages(columns)
+
+    roster = db.exec(
+        select(User.id, User.username)
+        .select_from(ClassMember)
+        .join(User, User.id == ClassMember.user_id)
+        .where(
+            ClassMember.class_id == class_id,
+            ClassMember.role == "student",
+        )
+        .order_by(ClassMember.id)
+    ).all()
+
+    students: List[Dict[str, Any]] = []
+    for row in roster:
+        averages = student_averages.get(row.id)
+        students.append({
+            "student_id": row.id,
+            "username": row.username,
+            "graded_assignments": averages["graded_assignments"] if averages else 0,
+            "weighted_average": averages["weighted_average"] if averages else None,
+            "average_z_score": averages["average_z_score"] if averages else None,
+        })
+
+    return {
+        "total_gradings": len(columns.scores),
+        "score_distribution": {
+            "ranges": [f"{label}%" for label in SCORE_RANGES],
+            "counts": normalized_histogram(columns).tolist(),
+        },
+        "students": students,
+    }
@@ -1,44 +1,55 @@
-from sqlmodel import Session, select
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import verify_password
 from app.db.session import get_session
 from app.models.user import User, UserCreate
 
 
+def get_user_by_username(username: str) -> User | None:
+    """
+    按用户名查询用户，登录时先查询用户，再在密码哈希线程池中验证密码
+    """
+    with get_session() as db:
+        return db.exec(select(User).where(User.username == username)).first()
+
+
 def authenticate_user(username: str, password: str) -> User | None:
     """
     验证用户凭据并返回用户对象
     """
-    with get_session() as db:
-        user = db.exec(select(User).where(User.username == username)).first()
-        if not user:
-            return None
-        if not verify_password(password, user.hashed_password):
-            return None
-        return user
+    user = get_user_by_username(username)
+    if not user:
+        return None
+    if not verify_password(password, user.hashed_password):
+        return None
+    return user
 
 
-def register_user(user_in: UserCreate) -> User | None:
+def user_exists(username: str, email: str) -> bool:
     """
-    注册新用户
+    检查用户名或邮箱是否已被注册，注册时在计算密码哈希之前调用
     """
     with get_session() as db:
-        # 检查用户名是否已存在
-        existing_user = db.exec(
-            select(User).where(User.username == user_in.username)
-        ).first()
-        if existing_user:
-            return None
+        return db.exec(
+            select(User.id).where(or_(User.username == username, User.email == email))
+        ).first() is not None
 
-        # 检查邮箱是否已存在
-        existing_email = db.exec(
-            select(User).where(User.email == user_in.email)
-        ).first()
-        if existing_email:
-            return None
 
-        # 创建新用户
-        hashed_password = get_password_hash(user_in.password)
+def register_user(user_in: UserCreate, hashed_password: str) -> User | None:
+    """
+    注册新用户
+
+    Args:
+        user_in: 注册信息
+        hashed_password: 在密码哈希线程池中计算好的密码哈希
+
+    Returns:
+        新用户，用户名或邮箱已存在时返回 None
+    """
+    with get_session() as db:
+        # 用户名和邮箱已由 user_exists 检查过，检查之后并发注册的相同用户名或邮箱由唯一约束拒绝
         user = User(
             username=user_in.username,
             email=user_in.email,
@@ -46,6 +57,10 @@ def register_user(user_in: UserCreate) -> User | None:
             role=user_in.role,
         )
         db.add(user)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            return None
         db.refresh(user)
         return user 
\ No newline at end of file
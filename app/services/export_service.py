@@ -0,0 +1,243 @@
+import csv
+import io
+from enum import Enum
+from typing import Any, Iterator, List, Optional
+
+from sqlmodel import select
+
+from app.core.config import settings
+from app.db.replicas import get_read_session
+from app.models.assignment import Assignment
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.submission import Submission
+from app.models.user import User
+
+# Parquet 导出依赖可选的 pyarrow
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+# 导出文件的列，与 _gradebook_export_statement 的查询列一一对应
+GRADEBOOK_EXPORT_COLUMNS = [
+    "course_id",
+    "course_name",
+    "assignment_id",
+    "assignment_title",
+    "total_points",
+    "due_date",
+    "student_id",
+    "username",
+    "submission_id",
+    "submission_time",
+    "status",
+    "score",
+    "graded_at",
+]
+
+MEDIA_TYPES = {
+    ExportFormat.CSV: "text/csv",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+}
+
+
+def parquet_available() -> bool:
+    """
+    是否可以导出 Parquet(已安装 pyarrow)
+
+    Returns:
+        已安装 pyarrow 时返回 True
+    """
+    return pq is not None
+
+
+def _gradebook_export_statement(course_id: Optional[int] = None, class_id: Optional[int] = None) -> Any:
+    """
+    构建成绩导出查询，每次提交一行，未批改的提交分数为空
+
+    Args:
+        course_id: 导出指定课程时传入
+        class_id: 导出指定班级的全部课程时传入
+
+    Returns:
+        按课程、作业、学生、提交排序的查询语句
+    """
+    statement = (
+        select(
+            Course.id,
+            Course.name,
+            Assignment.id,
+            Assignment.title,
+            Assignment.total_points,
+            Assignment.due_date,
+            User.id,
+            User.username,
+            Submission.id,
+            Submission.submission_time,
+            Submission.status,
+            Grading.score,
+            Grading.graded_at,
+        )
+        .select_from(Submission)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .join(Course, Course.id == Assignment.course_id)
+        .join(User, User.id == Submission.student_id)
+        .outerjoin(Grading, Grading.submission_id == Submission.id)
+        .order_by(Course.id, Assignment.id, User.id, Submission.id)
+    )
+    if course_id is not None:
+        statement = statement.where(Course.id == course_id)
+    if class_id is not None:
+        statement = statement.where(Course.class_id == class_id)
+    return statement
+
+
+def iter_gradebook_chunks(
+    course_id: Optional[int] = None,
+    class_id: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Iterator[List[Any]]:
+    """
+    分块读取成绩导出数据
+
+    使用独立的数据库会话和流式游标(stream_results)，每次只取 chunk_size 行，
+    内存占用与班级规模无关。配置了只读副本时按导出用户选择副本，用户刚写入过时使用主库。
+
+    Args:
+        course_id: 导出指定课程时传入
+        class_id: 导出指定班级的全部课程时传入
+        chunk_size: 每块行数，默认使用 EXPORT_CHUNK_SIZE 配置
+        user_id: 导出用户的ID，用于选择副本
+
+    Yields:
+        每块的结果行列表
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    statement = _gradebook_export_statement(course_id=course_id, class_id=class_id)
+    with get_read_session(user_id) as db:
+        connection = db.connection(execution_options={"stream_results": True})
+        result = connection.execute(statement)
+        for partition in result.partitions(chunk_size):
+            yield partition
+
+
+def stream_gradebook_csv(
+    course_id: Optional[int] = None,
+    class_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Iterator[str]:
+    """
+    以 CSV 格式流式导出成绩
+
+    Args:
+        course_id: 导出指定课程时传入
+        class_id: 导出指定班级的全部课程时传入
+        user_id: 导出用户的ID，用于选择副本
+
+    Yields:
+        CSV 文本块，第一块包含 BOM 和表头，便于 Excel 正确识别 UTF-8
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(GRADEBOOK_EXPORT_COLUMNS)
+    yield buffer.getvalue()
+
+    for chunk in iter_gradebook_chunks(course_id=course_id, class_id=class_id, user_id=user_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """
+    收集 ParquetWriter 输出的可写文件对象，每写完一个行组取出已写入的字节
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema() -> Any:
+    """
+    成绩导出的 Parquet 表结构
+
+    Returns:
+        与 GRADEBOOK_EXPORT_COLUMNS 一一对应的 pyarrow.Schema
+    """
+    return pa.schema([
+        ("course_id", pa.int64()),
+        ("course_name", pa.string()),
+        ("assignment_id", pa.int64()),
+        ("assignment_title", pa.string()),
+        ("total_points", pa.int64()),
+        ("due_date", pa.timestamp("us")),
+        ("student_id", pa.int64()),
+        ("username", pa.string()),
+        ("submission_id", pa.int64()),
+        ("submission_time", pa.timestamp("us")),
+        ("status", pa.string()),
+        ("score", pa.float64()),
+        ("graded_at", pa.timestamp("us")),
+    ])
+
+
+def stream_gradebook_parquet(
+    course_id: Optional[int] = None,
+    class_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> Iterator[bytes]:
+    """
+    以 Parquet 格式流式导出成绩，每块数据写成一个行组
+
+    Args:
+        course_id: 导出指定课程时传入
+        class_id: 导出指定班级的全部课程时传入
+        user_id: 导出用户的ID，用于选择副本
+
+    Yields:
+        Parquet 文件的字节块
+    """
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for chunk in iter_gradebook_chunks(course_id=course_id, class_id=class_id, user_id=user_id):
+            columns = [list(values) for values in zip(*chunk)]
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
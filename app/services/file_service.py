@@ -1,29 +1,29 @@
 from fastapi import UploadFile, HTTPException
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
+from app.models.assignment import Assignment
+from app.models.grading import Grading
 from app.models.submission import Submission
+from app.services.statistics_service import (
+    invalidate_submission_statistics,
+    record_submission_created,
+    record_submission_deleted,
+)
 from app.utils import storage
 
 
-async def save_submission_file(
-    db: Session, 
-    upload_file: UploadFile,
-    assignment_id: int,
-    student_id: int,
-    comments: str = None
-) -> Submission:
+def store_submission_file(upload_file: UploadFile, assignment_id: int) -> str:
     """
-    保存提交的作业文件
+    检查文件类型并保存提交的作业文件
     
     Args:
-        db: 数据库会话
         upload_file: 上传的文件
         assignment_id: 作业ID
-        student_id: 学生ID
-        comments: 提交备注
         
     Returns:
-        创建的提交记录
+        文件的访问URL
     """
     # 检查文件类型
     allowed_content_types = [
@@ -46,9 +46,29 @@ async def save_submission_file(
     
     # 保存文件
     file_path = storage.save_upload_file(upload_file, folder=f"assignments/{assignment_id}")
-    file_url = storage.get_file_url(file_path)
+    return storage.get_file_url(file_path)
+
+
+def create_submission_record(
+    db: Session,
+    assignment_id: int,
+    student_id: int,
+    file_url: str,
+    comments: str = None
+) -> Submission:
+    """
+    创建提交记录并更新统计汇总
     
-    # 创建提交记录
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        student_id: 学生ID
+        file_url: 文件的访问URL
+        comments: 提交备注
+        
+    Returns:
+        创建的提交记录
+    """
     submission = Submission(
         assignment_id=assignment_id,
         student_id=student_id,
@@ -57,12 +77,60 @@ async def save_submission_file(
     )
     
     db.add(submission)
+    
+    # 在同一事务中更新统计汇总
+    record_submission_created(db, assignment_id=assignment_id, student_id=student_id)
+    
     db.commit()
     db.refresh(submission)
     
+    # 使相关统计缓存失效
+    invalidate_submission_statistics(db, assignment_id=assignment_id, student_id=student_id)
+    
     return submission
 
 
+async def save_submission_file(
+    db: AsyncSession, 
+    upload_file: UploadFile,
+    assignment_id: int,
+    student_id: int,
+    comments: str = None
+) -> Submission:
+    """
+    保存提交的作业文件并创建提交记录
+    
+    文件在线程池中写入磁盘，数据库操作通过异步会话执行，都不阻塞事件循环
+    
+    Args:
+        db: 异步数据库会话
+        upload_file: 上传的文件
+        assignment_id: 作业ID
+        student_id: 学生ID
+        comments: 提交备注
+        
+    Returns:
+        创建的提交记录
+    """
+    # 作业不存在时在写入文件前返回，避免留下孤立文件
+    if await db.get(Assignment, assignment_id) is None:
+        raise HTTPException(status_code=404, detail="作业不存在")
+
+    file_url = await run_in_threadpool(store_submission_file, upload_file, assignment_id)
+    try:
+        return await db.run_sync(
+            create_submission_record,
+            assignment_id=assignment_id,
+            student_id=student_id,
+            file_url=file_url,
+            comments=comments,
+        )
+    except Exception:
+        # 提交记录没有写入时删除已保存的文件
+        await run_in_threadpool(storage.delete_file, file_url.replace("/uploads/", ""))
+        raise
+
+
 def delete_submission_file(db: Session, submission_id: int, user_id: int) -> bool:
     """
     删除提交的作业文件
@@ -89,7 +157,24 @@ def delete_submission_file(db: Session, submission_id: int, user_id: int) -> boo
     deleted = storage.delete_file(file_path)
     
     # 从数据库中删除记录
+    assignment_id = submission.assignment_id
+    student_id = submission.student_id
+    score = db.exec(
+        select(Grading.score).where(Grading.submission_id == submission_id)
+    ).first()
     db.delete(submission)
+    
+    # 在同一事务中更新统计汇总
+    record_submission_deleted(
+        db,
+        assignment_id=assignment_id,
+        student_id=student_id,
+        score=score,
+    )
+    
     db.commit()
     
+    # 使相关统计缓存失效
+    invalidate_submission_statistics(db, assignment_id=assignment_id, student_id=student_id)
+    
     return deleted 
\ No newline at end of file
@@ -0,0 +1,147 @@
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Set, Union
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.db.replicas import ReadOnlySession
+from app.models.class_model import ClassMember
+from app.models.course import Course
+from app.models.user import User, UserRole
+from app.utils.cache import TTLCache
+
+# 用户的权限范围缓存：("class_roles", 用户ID) 为 {班级ID: 班级中的角色}，
+# ("course_ids", 用户ID) 为所教课程ID的集合，按需分别读取
+permission_cache = TTLCache(
+    max_size=settings.PERMISSION_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PERMISSION_CACHE_TTL_SECONDS,
+)
+
+
+def _load_class_roles(db: Session, user_id: int) -> Dict[int, str]:
+    """
+    读取用户所在班级的角色
+
+    Args:
+        db: 请求的数据库会话
+        user_id: 用户ID
+
+    Returns:
+        {班级ID: 班级中的角色}
+    """
+    memberships = db.exec(
+        select(ClassMember.class_id, ClassMember.role).where(ClassMember.user_id == user_id)
+    ).all()
+    return {class_id: role for class_id, role in memberships}
+
+
+def _load_course_ids(db: Session, user_id: int) -> FrozenSet[int]:
+    """
+    读取用户所教课程的ID
+
+    Args:
+        db: 请求的数据库会话
+        user_id: 用户ID
+
+    Returns:
+        课程ID的集合
+    """
+    return frozenset(db.exec(select(Course.id).where(Course.teacher_id == user_id)).all())
+
+
+PERMISSION_LOADERS: Dict[str, Callable[[Session, int], Any]] = {
+    "class_roles": _load_class_roles,
+    "course_ids": _load_course_ids,
+}
+
+
+class PermissionResolver:
+    """
+    当前用户的权限判断
+
+    所在班级的角色和所教课程在第一次用到时各读取一次(优先使用缓存)，之后的判断都在内存中完成；
+    管理员拥有全部权限，不需要读取。缓存只在修改成员关系的进程内失效，其他进程的缓存可能还没有
+    刚加入的班级或刚创建的课程，因此判断为无权限时重新读取一次后再确认，拒绝总是以数据库为准。
+
+    读取使用请求的数据库会话，不另外占用连接。会话是只读副本时读到的结果只用于本次请求，
+    不写入缓存：副本有延迟时旧的成员关系会在缓存中保留整个TTL。
+    """
+
+    def __init__(self, user: User, db: Session) -> None:
+        self.user = user
+        self.db = db
+        self.is_admin = user.role == UserRole.ADMIN
+        self._scope: Dict[str, Any] = {}
+        self._reloaded: Set[str] = set()
+
+    def _get(self, kind: str, reload: bool = False) -> Any:
+        """
+        读取权限范围的一部分，reload 为 True 时跳过缓存重新读取
+        """
+        key = (kind, self.user.id)
+        if reload:
+            permission_cache.invalidate([key])
+            self._scope.pop(kind, None)
+        if kind not in self._scope:
+            db, user_id = self.db, self.user.id
+            if isinstance(db, ReadOnlySession):
+                cached = permission_cache.get(key)
+                self._scope[kind] = cached if cached is not None else PERMISSION_LOADERS[kind](db, user_id)
+            else:
+                self._scope[kind] = permission_cache.get_or_load(key, lambda: PERMISSION_LOADERS[kind](db, user_id))
+        return self._scope[kind]
+
+    def _check(self, kind: str, allowed: Callable[[Any], bool]) -> bool:
+        """
+        用权限范围判断，无权限时重新读取一次(每个请求最多一次)后再判断
+        """
+        if self.is_admin or allowed(self._get(kind)):
+            return True
+        if kind in self._reloaded:
+            return False
+        self._reloaded.add(kind)
+        return allowed(self._get(kind, reload=True))
+
+    def class_ids(self) -> List[int]:
+        """
+        获取用户所在班级的ID列表
+        """
+        return list(self._get("class_roles"))
+
+    def is_member(self, class_id: int) -> bool:
+        """
+        是否为班级成员(管理员视为所有班级的成员)
+        """
+        return self._check("class_roles", lambda class_roles: class_id in class_roles)
+
+    def is_class_teacher(self, class_id: int) -> bool:
+        """
+        是否为班级教师(管理员视为所有班级的教师)
+        """
+        return self._check("class_roles", lambda class_roles: class_roles.get(class_id) == "teacher")
+
+    def can_view(self, course: Course) -> bool:
+        """
+        是否可以查看课程及其作业：管理员或课程所在班级的成员
+        """
+        return self.is_member(course.class_id)
+
+    def can_teach(self, course: Union[Course, int]) -> bool:
+        """
+        是否可以管理课程及其作业、查看课程统计：管理员或课程教师
+
+        Args:
+            course: 课程，已查询出课程时直接比较教师ID；只有课程ID时使用缓存的所教课程
+        """
+        if isinstance(course, Course):
+            return self.is_admin or course.teacher_id == self.user.id
+        return self._check("course_ids", lambda course_ids: course in course_ids)
+
+
+def invalidate_permissions(user_ids: Iterable[int]) -> None:
+    """
+    班级成员或课程教师变化后使用户的权限范围缓存失效，需在提交之后调用
+
+    Args:
+        user_ids: 用户ID列表
+    """
+    permission_cache.invalidate([(kind, user_id) for user_id in user_ids for kind in PERMISSION_LOADERS])
@@ -0,0 +1,295 @@
+import hashlib
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import or_
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.models.assignment import Assignment
+from app.models.class_model import Class
+from app.models.course import Course, CourseStatus
+from app.models.statistics import AssignmentStatistics
+from app.models.user import User, UserRole
+from app.services.statistics_service import (
+    COUNTED_MODELS,
+    get_class_dashboard,
+    get_course_dashboard,
+    get_teacher_dashboard,
+    refresh_entity_counters,
+    statistics_cache,
+)
+from app.utils.scheduler import FileLock, IntervalScheduler, JobMetrics, RedisLock
+
+# 预计算任务的耗时统计
+precompute_metrics = JobMetrics()
+
+# 最近一次全量刷新所在的 (日期, 小时)，同一个低峰时段只全量刷新一次
+_last_full_refresh: Optional[Tuple[date, int]] = None
+
+# 各快照最近一次开始计算的时间(UTC)，与相关数据的最近写入时间比较
+_built_at: Dict[Hashable, datetime] = {}
+
+# 汇总行的 updated_at 在执行语句时生成，事务稍后才提交，比较时留出余量，
+# 避免漏掉计算开始前生成、计算开始后才提交的写入
+_WRITE_MARGIN = timedelta(seconds=5)
+
+
+def _snapshot_ttl() -> float:
+    """
+    预计算快照的存活时间，覆盖到下一次运行之后
+
+    Returns:
+        存活时间(秒)
+    """
+    return settings.STATISTICS_PRECOMPUTE_INTERVAL_SECONDS * 2
+
+
+def _last_writes(db: Session, class_ids: Set[int], teacher_ids: Set[int]) -> Dict[Hashable, datetime]:
+    """
+    查询课程、班级和教师统计面板相关数据的最近写入时间
+
+    取作业创建时间和作业汇总行更新时间(创建、删除提交，批改，修改总分时更新)中最晚的一个，
+    写入由哪个进程执行都能查到；班级和教师取其全部课程中最晚的一个。
+
+    Args:
+        db: 数据库会话
+        class_ids: 需要预热的班级ID
+        teacher_ids: 需要预热的教师ID
+
+    Returns:
+        以统计缓存键为键的最近写入时间，没有作业的课程不在其中
+    """
+    rows = db.exec(
+        select(
+            Course.id,
+            Course.class_id,
+            Course.teacher_id,
+            func.max(Assignment.created_at),
+            func.max(AssignmentStatistics.updated_at),
+        )
+        .join(Assignment, Assignment.course_id == Course.id)
+        .outerjoin(AssignmentStatistics, AssignmentStatistics.assignment_id == Assignment.id)
+        .where(or_(Course.class_id.in_(class_ids), Course.teacher_id.in_(teacher_ids)))
+        .group_by(Course.id, Course.class_id, Course.teacher_id)
+    ).all()
+
+    last_writes: Dict[Hashable, datetime] = {}
+    for course_id, class_id, teacher_id, created_at, updated_at in rows:
+        written = max(value for value in (created_at, updated_at) if value is not None)
+        for key in (("course", course_id), ("class", class_id), ("user", teacher_id)):
+            if key not in last_writes or written > last_writes[key]:
+                last_writes[key] = written
+    return last_writes
+
+
+def _warm_snapshot(
+    key: Hashable, build: Callable[[], Dict[str, Any]], full: bool, last_write: Optional[datetime]
+) -> bool:
+    """
+    预热一个统计面板快照
+
+    上次计算后相关数据没有写入、快照仍在缓存中(没有被失效)且计算时间不超过
+    STATISTICS_PRECOMPUTE_MAX_AGE_SECONDS 时不重新计算，只为快照续期到下一次运行之后。
+    计算通过 refresh 写入，计算期间相关数据被写入(缓存失效)时结果不写入缓存，下一次运行重新计算。
+
+    Args:
+        key: 统计缓存键，与统计接口使用的键一致
+        build: 生成统计面板的函数
+        full: 是否全量刷新，为 True 时总是重新计算
+        last_write: 相关数据的最近写入时间(UTC)
+
+    Returns:
+        是否重新计算了快照
+    """
+    ttl = _snapshot_ttl()
+    now = datetime.utcnow()
+    built_at = _built_at.get(key)
+    if (
+        not full
+        and built_at is not None
+        and now - built_at < timedelta(seconds=settings.STATISTICS_PRECOMPUTE_MAX_AGE_SECONDS)
+        and (last_write is None or last_write < built_at - _WRITE_MARGIN)
+        and statistics_cache.touch(key, ttl_seconds=ttl)
+    ):
+        return False
+    statistics_cache.refresh(key, build, ttl_seconds=ttl)
+    _built_at[key] = now
+    return True
+
+
+def _warm_snapshots(
+    items: List[Any],
+    key: Callable[[Any], Hashable],
+    build: Callable[[Any], Dict[str, Any]],
+    full: bool,
+    last_writes: Dict[Hashable, datetime],
+) -> Dict[str, int]:
+    """
+    预热一组统计面板快照
+
+    Args:
+        items: 需要预热的实体列表
+        key: 根据实体生成缓存键的函数
+        build: 根据实体生成统计面板的函数
+        full: 是否全量刷新
+        last_writes: 以缓存键为键的相关数据最近写入时间
+
+    Returns:
+        重新计算和跳过的数量
+    """
+    computed = 0
+    for item in items:
+        item_key = key(item)
+        if _warm_snapshot(item_key, lambda: build(item), full, last_writes.get(item_key)):
+            computed += 1
+    return {"computed": computed, "skipped": len(items) - computed}
+
+
+def _full_refresh_due(now: datetime) -> bool:
+    """
+    判断本次运行是否需要全量刷新：处于配置的低峰时段且该时段内还没有全量刷新过
+
+    Args:
+        now: 当前本地时间
+
+    Returns:
+        需要全量刷新时返回 True
+    """
+    global _last_full_refresh
+    window = (now.date(), now.hour)
+    if now.hour not in settings.STATISTICS_PRECOMPUTE_FULL_REFRESH_HOURS or _last_full_refresh == window:
+        return False
+    _last_full_refresh = window
+    return True
+
+
+def _refresh_counters(db: Session) -> Dict[str, int]:
+    """
+    按原始记录重新校准系统概览的实体计数
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        校准的计数数量
+    """
+    refresh_entity_counters(db)
+    db.commit()
+    return {"computed": len(COUNTED_MODELS)}
+
+
+def run_precompute(full: Optional[bool] = None) -> None:
+    """
+    预计算进行中课程(CourseStatus.ACTIVE)的课程、班级和教师统计面板并写入统计缓存
+
+    每类面板作为一个任务分别计时，单个任务失败不影响其他任务。
+
+    Args:
+        full: 是否全量刷新，默认仅在低峰时段每天全量刷新一次
+    """
+    if full is None:
+        full = _full_refresh_due(datetime.now())
+
+    with get_session() as db:
+        courses = db.exec(
+            select(Course).where(Course.status == CourseStatus.ACTIVE).order_by(Course.id)
+        ).all()
+        class_ids = {course.class_id for course in courses}
+        teacher_ids = {course.teacher_id for course in courses}
+        last_writes = {} if full else _last_writes(db, class_ids, teacher_ids)
+
+        jobs: List[Tuple[str, Callable[[], Dict[str, int]]]] = [
+            ("course_dashboards", lambda: _warm_snapshots(
+                courses,
+                key=lambda course: ("course", course.id),
+                build=lambda course: get_course_dashboard(db, course),
+                full=full,
+                last_writes=last_writes,
+            )),
+            ("class_dashboards", lambda: _warm_snapshots(
+                db.exec(select(Class).where(Class.id.in_(class_ids)).order_by(Class.id)).all(),
+                key=lambda class_: ("class", class_.id),
+                build=lambda class_: get_class_dashboard(db, class_),
+                full=full,
+                last_writes=last_writes,
+            )),
+            ("teacher_dashboards", lambda: _warm_snapshots(
+                db.exec(
+                    select(User)
+                    .where(User.id.in_(teacher_ids), User.role == UserRole.TEACHER)
+                    .order_by(User.id)
+                ).all(),
+                key=lambda user: ("user", user.id),
+                build=lambda user: get_teacher_dashboard(db, user),
+                full=full,
+                last_writes=last_writes,
+            )),
+        ]
+        if full:
+            jobs.append(("entity_counters", lambda: _refresh_counters(db)))
+
+        for name, job in jobs:
+            started = time.perf_counter()
+            counts: Dict[str, int] = {}
+            error = None
+            try:
+                counts = job()
+            except Exception as exc:
+                db.rollback()
+                error = repr(exc)
+            precompute_metrics.record(name, time.perf_counter() - started, counts, error)
+
+
+def _create_precompute_lock() -> Union[FileLock, RedisLock]:
+    """
+    创建选出预计算进程的锁：配置了 Redis 时使用 Redis 租约(可跨主机)，否则使用本机的文件锁
+
+    Returns:
+        锁
+    """
+    if settings.STATISTICS_CACHE_REDIS_URL:
+        return RedisLock(
+            settings.STATISTICS_CACHE_REDIS_URL,
+            name="statistics_precompute:lock",
+            ttl_seconds=settings.STATISTICS_PRECOMPUTE_INTERVAL_SECONDS * 3,
+        )
+    # 同一台主机上连接同一个数据库的进程共用一个锁文件
+    digest = hashlib.sha1(settings.SQLALCHEMY_DATABASE_URI.encode()).hexdigest()[:12]
+    return FileLock(os.path.join(tempfile.gettempdir(), f"homework_precompute_{digest}.lock"))
+
+
+# 统计面板预计算调度器，应用启动时启动，多个进程中只有持有锁的进程运行
+precompute_scheduler = IntervalScheduler(
+    name="statistics-precompute",
+    interval_seconds=settings.STATISTICS_PRECOMPUTE_INTERVAL_SECONDS,
+    task=run_precompute,
+    lock=_create_precompute_lock(),
+)
+
+
+def get_precompute_status() -> Dict[str, Any]:
+    """
+    获取预计算调度器的状态和各任务的耗时统计
+
+    Returns:
+        包含调度配置、运行状态和任务统计的字典
+    """
+    return {
+        "enabled": settings.STATISTICS_PRECOMPUTE_INTERVAL_SECONDS > 0,
+        "running": precompute_scheduler.running,
+        "holds_lock": precompute_scheduler.holds_lock,
+        "interval_seconds": settings.STATISTICS_PRECOMPUTE_INTERVAL_SECONDS,
+        "full_refresh_hours": settings.STATISTICS_PRECOMPUTE_FULL_REFRESH_HOURS,
+        "max_age_seconds": settings.STATISTICS_PRECOMPUTE_MAX_AGE_SECONDS,
+        "last_full_refresh": (
+            f"{_last_full_refresh[0].isoformat()} {_last_full_refresh[1]:02d}:00"
+            if _last_full_refresh else None
+        ),
+        "last_error": precompute_scheduler.last_error,
+        "jobs": precompute_metrics.stats(),
+    }
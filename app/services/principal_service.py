@@ -0,0 +1,181 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+
+class RedisPrincipalCache:
+    """
+    多个进程共用的用户快照缓存，保存在 Redis 中，接口与 TTLCache 的 get_or_load、invalidate、stats 相同
+
+    Redis 不可用时直接调用加载函数，请求退化为查询数据库而不是报错。
+    """
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "principal:") -> None:
+        """
+        Args:
+            url: Redis 连接字符串
+            ttl_seconds: 条目存活时间(秒)
+            prefix: 缓存键前缀
+        """
+        # 只有配置了共享缓存时才需要 redis
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._errors_type = redis.RedisError
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        读取缓存，未命中时加载并写入
+
+        Args:
+            key: 缓存键
+            loader: 加载函数，返回值需能序列化为JSON(日期时间序列化为字符串)
+
+        Returns:
+            缓存值或加载结果
+        """
+        name = f"{self.prefix}{key}"
+        try:
+            raw = self._client.get(name)
+        except self._errors_type:
+            self._count("errors")
+            return loader()
+        if raw is not None:
+            self._count("hits")
+            return json.loads(raw)
+
+        self._count("misses")
+        value = loader()
+        try:
+            self._client.set(name, json.dumps(value, default=str), px=int(self.ttl_seconds * 1000))
+        except self._errors_type:
+            self._count("errors")
+        return value
+
+    def invalidate(self, keys: Iterable[Hashable]) -> int:
+        """
+        使指定的缓存键失效
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            实际删除的条目数
+        """
+        names = [f"{self.prefix}{key}" for key in keys]
+        if not names:
+            return 0
+        try:
+            removed = self._client.delete(*names)
+        except self._errors_type:
+            self._count("errors")
+            return 0
+        self._count("invalidations", removed)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            命中、未命中、Redis 错误和失效次数
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "redis",
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0,
+                "errors": self.errors,
+                "invalidations": self.invalidations,
+            }
+
+
+def _create_principal_cache() -> Union[TTLCache, RedisPrincipalCache]:
+    if settings.PRINCIPAL_CACHE_REDIS_URL:
+        return RedisPrincipalCache(settings.PRINCIPAL_CACHE_REDIS_URL, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+    return TTLCache(
+        max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+        ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    )
+
+
+# 当前用户缓存，键为用户ID，值为不含密码哈希的用户字段
+principal_cache = _create_principal_cache()
+
+
+def _load_user_snapshot(user_id: int) -> Dict[str, Any]:
+    """
+    读取用户快照
+
+    始终使用主库：副本有延迟时读到的旧数据会在缓存中保留整个TTL。
+
+    Args:
+        user_id: 用户ID
+
+    Returns:
+        不含密码哈希的用户字段
+    """
+    with get_session() as db:
+        user = db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在")
+        return user.dict(exclude={"hashed_password"})
+
+
+def get_principal(db: Session, user_id: int) -> User:
+    """
+    获取令牌对应的用户，优先使用缓存的快照
+
+    由快照重建的用户对象合并到请求的会话中，修改、提交和延迟加载关系与查询得到的对象相同；
+    访问 hashed_password 时才查询数据库。
+
+    Args:
+        db: 请求的数据库会话
+        user_id: 令牌中的用户ID
+
+    Returns:
+        用户对象
+    """
+    if settings.PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+        user = db.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="用户不存在")
+        return user
+
+    snapshot = principal_cache.get_or_load(user_id, lambda: _load_user_snapshot(user_id))
+    user = User.parse_obj(snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    用户信息修改或删除后使缓存的快照失效，需在提交之后调用
+
+    Args:
+        user_id: 用户ID
+    """
+    principal_cache.invalidate([user_id])
@@ -0,0 +1,1930 @@
+import math
+from bisect import bisect_right
+from collections import Counter
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Type
+
+from sqlalchemy import Float, Integer, and_, case, cast, delete, event, insert, literal_column, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, func, select
+
+from app.core.config import settings
+from app.models.assignment import Assignment
+from app.models.class_model import Class, ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.statistics import (
+    AssignmentScoreSketch,
+    AssignmentStatistics,
+    CourseScoreSketch,
+    EntityCounter,
+    ScoreStatisticsBase,
+    StudentStatistics,
+)
+from app.models.submission import Submission
+from app.models.user import User
+from app.utils.cache import RedisCacheVersions, TTLCache
+from app.utils.score_sketch import sketch_bin, sketch_quantiles
+
+# 分数分布区间(总分为100时的标签)，区间按占总分的比例划分
+SCORE_RANGES = ["0-10", "11-20", "21-30", "31-40", "41-50",
+                "51-60", "61-70", "71-80", "81-90", "91-100"]
+
+
+def score_ranges(total_points: int) -> List[str]:
+    """
+    生成指定总分下的分数分布区间标签
+
+    Args:
+        total_points: 作业总分
+
+    Returns:
+        与 SCORE_RANGES 一一对应的区间标签，总分为100时与 SCORE_RANGES 相同
+    """
+    count = len(SCORE_RANGES)
+    bounds = [total_points * index / count for index in range(count + 1)]
+    # 区间端点都是整数时沿用 "11-20" 的写法，否则直接写出区间端点
+    integral = total_points % count == 0
+    labels = []
+    for index in range(count):
+        lower, upper = bounds[index], bounds[index + 1]
+        if integral and index > 0:
+            lower += 1
+        labels.append(f"{lower:g}-{upper:g}")
+    return labels
+
+
+def _score_bucket_columns(score_column: Any, total_points_column: Any) -> List[Any]:
+    """
+    构建分数分布的分桶统计列
+
+    每个区间对应一个 SUM(CASE ...) 表达式。区间按分数占总分的比例划分，
+    比较时写成 score * 10 >= index * total_points，避免除法带来的误差；
+    最后一个区间包含 90% 及以上的全部分数。
+
+    Args:
+        score_column: 分数列表达式
+        total_points_column: 作业总分列表达式
+
+    Returns:
+        与 SCORE_RANGES 一一对应的聚合列列表
+    """
+    columns = []
+    count = len(SCORE_RANGES)
+    scaled_score = score_column * count
+    for index in range(count):
+        condition = scaled_score >= total_points_column * index
+        if index < count - 1:
+            condition = and_(condition, scaled_score < total_points_column * (index + 1))
+        columns.append(
+            func.coalesce(func.sum(case((condition, 1), else_=0)), 0).label(f"bucket_{index}")
+        )
+    return columns
+
+
+def score_bucket_index(score: float, total_points: int) -> Optional[int]:
+    """
+    计算分数所属的分布区间下标，规则与 _score_bucket_columns 一致
+
+    Args:
+        score: 分数
+        total_points: 作业总分
+
+    Returns:
+        区间下标，负分不属于任何区间时返回 None
+    """
+    if score < 0:
+        return None
+    last_index = len(SCORE_RANGES) - 1
+    if total_points <= 0:
+        return last_index
+    return min(int(score * len(SCORE_RANGES) // total_points), last_index)
+
+
+def _statistics_scope(model: Type[ScoreStatisticsBase]) -> Any:
+    """
+    获取汇总表对应的提交分组列
+
+    Args:
+        model: 汇总表模型
+
+    Returns:
+        作业汇总返回 Submission.assignment_id，学生汇总返回 Submission.student_id
+    """
+    if model is AssignmentStatistics:
+        return Submission.assignment_id
+    return Submission.student_id
+
+
+def _statistics_key(model: Type[ScoreStatisticsBase]) -> Any:
+    """
+    获取汇总表的主键列
+
+    Args:
+        model: 汇总表模型
+
+    Returns:
+        汇总表主键列
+    """
+    if model is AssignmentStatistics:
+        return AssignmentStatistics.assignment_id
+    return StudentStatistics.student_id
+
+
+def _compute_statistics_rows(
+    db: Session, model: Type[ScoreStatisticsBase], keys: Optional[List[int]] = None
+) -> List[ScoreStatisticsBase]:
+    """
+    从提交和批改原始记录计算汇总行
+
+    Args:
+        db: 数据库会话
+        model: 汇总表模型
+        keys: 只计算指定作业/学生时传入其ID列表，为None时计算全部
+
+    Returns:
+        未加入会话的汇总表对象列表
+    """
+    scope = _statistics_scope(model)
+    statement = (
+        select(
+            scope.label("key"),
+            func.count(func.distinct(Submission.id)).label("submission_count"),
+            func.count(Grading.id).label("graded_count"),
+            func.coalesce(func.sum(Grading.score), 0).label("score_sum"),
+            func.coalesce(func.sum(Grading.score * Grading.score), 0).label("score_sum_squares"),
+            func.min(Grading.score).label("min_score"),
+            func.max(Grading.score).label("max_score"),
+            *_score_bucket_columns(Grading.score, Assignment.total_points),
+        )
+        .select_from(Submission)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .outerjoin(Grading, Grading.submission_id == Submission.id)
+        .group_by(scope)
+    )
+    if keys is not None:
+        statement = statement.where(scope.in_(keys))
+
+    key_name = _statistics_key(model).key
+    rows = []
+    for row in db.exec(statement):
+        values = dict(row._mapping)
+        values[key_name] = values.pop("key")
+        rows.append(model(**values))
+    return rows
+
+
+def _insert_missing_rows(db: Session, rows: List[SQLModel]) -> bool:
+    """
+    在保存点中插入汇总行或草图分箱，并发的事务已插入同一行(主键冲突)时放弃插入
+
+    Args:
+        db: 数据库会话
+        rows: 待插入的行
+
+    Returns:
+        插入成功时返回 True，主键冲突时返回 False，调用方应重新执行增量更新
+    """
+    try:
+        with db.begin_nested():
+            db.add_all(rows)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _update_statistics(
+    db: Session,
+    model: Type[ScoreStatisticsBase],
+    key: int,
+    total_points: int,
+    submission_delta: int = 0,
+    added_score: Optional[float] = None,
+    removed_score: Optional[float] = None,
+) -> None:
+    """
+    在当前事务中增量更新一行汇总数据
+
+    计数、分数和、平方和与分桶使用原子的 UPDATE ... SET x = x + delta；
+    移除分数时最值无法增量维护，改由同一条 UPDATE 中的子查询重新计算。
+    汇总行不存在时从原始记录计算后插入；并发的首次写入先插入了该行时改为再执行一次增量更新。
+
+    Args:
+        db: 数据库会话
+        model: 汇总表模型
+        key: 作业ID或学生ID
+        total_points: 分数所属作业的总分，用于确定分布区间
+        submission_delta: 提交数变化量
+        added_score: 新增的分数
+        removed_score: 移除的分数
+    """
+    # 确保原始记录的变更已写入当前事务，子查询和补建汇总行才能看到它们
+    db.flush()
+
+    values: Dict[str, Any] = {"updated_at": datetime.utcnow()}
+    if submission_delta:
+        values["submission_count"] = model.submission_count + submission_delta
+
+    graded_delta = (added_score is not None) - (removed_score is not None)
+    if graded_delta:
+        values["graded_count"] = model.graded_count + graded_delta
+
+    bucket_deltas: Dict[int, int] = {}
+    if added_score is not None or removed_score is not None:
+        added = added_score or 0
+        removed = removed_score or 0
+        values["score_sum"] = model.score_sum + (added - removed)
+        values["score_sum_squares"] = model.score_sum_squares + (added * added - removed * removed)
+        for score, delta in ((added_score, 1), (removed_score, -1)):
+            index = score_bucket_index(score, total_points) if score is not None else None
+            if index is not None:
+                bucket_deltas[index] = bucket_deltas.get(index, 0) + delta
+    for index, delta in bucket_deltas.items():
+        if delta:
+            column = getattr(model, f"bucket_{index}")
+            values[column.key] = column + delta
+
+    if removed_score is not None:
+        scope = _statistics_scope(model)
+        values["min_score"] = (
+            select(func.min(Grading.score))
+            .join(Submission, Grading.submission_id == Submission.id)
+            .where(scope == key)
+            .scalar_subquery()
+        )
+        values["max_score"] = (
+            select(func.max(Grading.score))
+            .join(Submission, Grading.submission_id == Submission.id)
+            .where(scope == key)
+            .scalar_subquery()
+        )
+    elif added_score is not None:
+        values["min_score"] = case(
+            (or_(model.min_score.is_(None), model.min_score > added_score), added_score),
+            else_=model.min_score,
+        )
+        values["max_score"] = case(
+            (or_(model.max_score.is_(None), model.max_score < added_score), added_score),
+            else_=model.max_score,
+        )
+
+    statement = (
+        update(model)
+        .where(_statistics_key(model) == key)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(statement).rowcount == 0:
+        if not _insert_missing_rows(db, _compute_statistics_rows(db, model, [key])):
+            db.execute(statement)
+
+
+def _sketch_owner(model: Type[SQLModel]) -> Any:
+    """
+    获取草图表的所属实体列
+
+    Args:
+        model: 草图表模型
+
+    Returns:
+        作业草图返回 assignment_id 列，课程草图返回 course_id 列
+    """
+    if model is AssignmentScoreSketch:
+        return AssignmentScoreSketch.assignment_id
+    return CourseScoreSketch.course_id
+
+
+def _compute_sketch_rows(
+    db: Session, assignment_ids: Optional[List[int]] = None
+) -> List[AssignmentScoreSketch]:
+    """
+    从批改原始记录计算作业草图
+
+    按 (作业, 分数) 分组后在内存中映射到分箱，不依赖数据库的取整函数。
+
+    Args:
+        db: 数据库会话
+        assignment_ids: 只计算指定作业时传入其ID列表，为None时计算全部
+
+    Returns:
+        未加入会话的作业草图对象列表
+    """
+    statement = (
+        select(
+            Submission.assignment_id,
+            Assignment.total_points,
+            Grading.score,
+            func.count(Grading.id).label("count"),
+        )
+        .select_from(Grading)
+        .join(Submission, Submission.id == Grading.submission_id)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .group_by(Submission.assignment_id, Assignment.total_points, Grading.score)
+    )
+    if assignment_ids is not None:
+        statement = statement.where(Submission.assignment_id.in_(assignment_ids))
+
+    counts: Counter = Counter()
+    for row in db.exec(statement):
+        counts[(row.assignment_id, sketch_bin(row.score, row.total_points))] += row.count
+    return [
+        AssignmentScoreSketch(assignment_id=assignment_id, bin_index=bin_index, count=count)
+        for (assignment_id, bin_index), count in counts.items()
+    ]
+
+
+def _merge_course_sketches(db: Session, course_ids: Optional[List[int]] = None) -> None:
+    """
+    把作业草图按分箱相加，重新生成课程草图
+
+    Args:
+        db: 数据库会话
+        course_ids: 只合并指定课程时传入其ID列表，为None时合并全部
+    """
+    db.flush()
+    merged = (
+        select(
+            Assignment.course_id,
+            AssignmentScoreSketch.bin_index,
+            func.sum(AssignmentScoreSketch.count),
+        )
+        .join(Assignment, Assignment.id == AssignmentScoreSketch.assignment_id)
+        .group_by(Assignment.course_id, AssignmentScoreSketch.bin_index)
+        .having(func.sum(AssignmentScoreSketch.count) > 0)
+    )
+    clear = delete(CourseScoreSketch)
+    if course_ids is not None:
+        merged = merged.where(Assignment.course_id.in_(course_ids))
+        clear = clear.where(CourseScoreSketch.course_id.in_(course_ids))
+    db.execute(clear)
+    db.execute(
+        insert(CourseScoreSketch).from_select(
+            ["course_id", "bin_index", "count"], merged
+        )
+    )
+
+
+def _update_sketch_bin(db: Session, model: Type[SQLModel], owner_id: int, bin_index: int, delta: int) -> None:
+    """
+    在当前事务中原子地调整一个草图分箱的计数，分箱不存在时插入，计数归零时删除
+
+    Args:
+        db: 数据库会话
+        model: 草图表模型
+        owner_id: 作业ID或课程ID
+        bin_index: 分箱下标
+        delta: 计数变化量
+    """
+    db.flush()
+    owner = _sketch_owner(model)
+    statement = (
+        update(model)
+        .where(owner == owner_id, model.bin_index == bin_index)
+        .values(count=model.count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    if db.execute(statement).rowcount == 0 and delta > 0:
+        row = model(**{owner.key: owner_id, "bin_index": bin_index, "count": delta})
+        if not _insert_missing_rows(db, [row]):
+            db.execute(statement)
+    elif delta < 0:
+        # 只保存计数不为零的分箱
+        db.execute(
+            delete(model).where(owner == owner_id, model.bin_index == bin_index, model.count <= 0)
+        )
+
+
+def _record_score_change(
+    db: Session,
+    assignment: Assignment,
+    student_id: int,
+    submission_delta: int = 0,
+    added_score: Optional[float] = None,
+    removed_score: Optional[float] = None,
+) -> None:
+    """
+    把一次提交或分数变化同步到汇总表和草图
+
+    Args:
+        db: 数据库会话
+        assignment: 提交所属作业
+        student_id: 学生ID
+        submission_delta: 提交数变化量
+        added_score: 新增的分数
+        removed_score: 移除的分数
+    """
+    for model, key in ((AssignmentStatistics, assignment.id), (StudentStatistics, student_id)):
+        _update_statistics(
+            db,
+            model,
+            key,
+            total_points=assignment.total_points,
+            submission_delta=submission_delta,
+            added_score=added_score,
+            removed_score=removed_score,
+        )
+
+    bin_deltas: Counter = Counter()
+    if added_score is not None:
+        bin_deltas[sketch_bin(added_score, assignment.total_points)] += 1
+    if removed_score is not None:
+        bin_deltas[sketch_bin(removed_score, assignment.total_points)] -= 1
+    for bin_index, delta in bin_deltas.items():
+        if delta:
+            _update_sketch_bin(db, AssignmentScoreSketch, assignment.id, bin_index, delta)
+            _update_sketch_bin(db, CourseScoreSketch, assignment.course_id, bin_index, delta)
+
+
+def _get_recorded_assignment(db: Session, assignment_id: int) -> Assignment:
+    """
+    获取要记录统计变化的作业，作业不存在时报错而不是静默跳过
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+
+    Returns:
+        作业
+    """
+    assignment = db.get(Assignment, assignment_id)
+    if assignment is None:
+        raise ValueError(f"作业不存在，无法更新统计汇总: assignment_id={assignment_id}")
+    return assignment
+
+
+def record_submission_created(db: Session, assignment_id: int, student_id: int) -> None:
+    """
+    记录新增提交，需在创建提交的事务提交前调用
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        student_id: 学生ID
+    """
+    assignment = _get_recorded_assignment(db, assignment_id)
+    _record_score_change(db, assignment, student_id, submission_delta=1)
+
+
+def record_submission_deleted(
+    db: Session, assignment_id: int, student_id: int, score: Optional[float] = None
+) -> None:
+    """
+    记录删除提交，需在删除提交的事务提交前调用
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        student_id: 学生ID
+        score: 该提交已批改时的分数
+    """
+    assignment = _get_recorded_assignment(db, assignment_id)
+    _record_score_change(db, assignment, student_id, submission_delta=-1, removed_score=score)
+
+
+def record_grading_changed(
+    db: Session,
+    assignment_id: int,
+    student_id: int,
+    old_score: Optional[float],
+    new_score: Optional[float],
+) -> None:
+    """
+    记录批改分数变化，需在写入批改的事务提交前调用
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        student_id: 学生ID
+        old_score: 原分数，新建批改时为None
+        new_score: 新分数
+    """
+    if old_score == new_score:
+        return
+    assignment = _get_recorded_assignment(db, assignment_id)
+    _record_score_change(db, assignment, student_id, added_score=new_score, removed_score=old_score)
+
+
+def recompute_assignment_statistics(db: Session, assignment_id: int) -> None:
+    """
+    作业总分变化后重新计算该作业相关的汇总和草图，需在事务提交前调用
+
+    分布区间和草图分箱都按占总分的比例划分，总分变化后该作业、提交过该作业
+    的学生以及所属课程的数据都要重新计算。
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+    """
+    db.flush()
+    assignment = db.get(Assignment, assignment_id)
+    student_ids = db.exec(
+        select(Submission.student_id).where(Submission.assignment_id == assignment_id).distinct()
+    ).all()
+
+    db.execute(delete(AssignmentStatistics).where(AssignmentStatistics.assignment_id == assignment_id))
+    db.add_all(_compute_statistics_rows(db, AssignmentStatistics, [assignment_id]))
+    _recompute_student_statistics(db, list(student_ids))
+
+    db.execute(delete(AssignmentScoreSketch).where(AssignmentScoreSketch.assignment_id == assignment_id))
+    db.add_all(_compute_sketch_rows(db, [assignment_id]))
+    _merge_course_sketches(db, [assignment.course_id])
+
+
+def _recompute_student_statistics(db: Session, student_ids: List[int]) -> None:
+    """
+    从原始记录重新计算指定学生的汇总行
+
+    Args:
+        db: 数据库会话
+        student_ids: 学生ID列表
+    """
+    if not student_ids:
+        return
+    db.flush()
+    db.execute(delete(StudentStatistics).where(StudentStatistics.student_id.in_(student_ids)))
+    db.add_all(_compute_statistics_rows(db, StudentStatistics, student_ids))
+
+
+def delete_assignment_and_statistics(db: Session, assignment: Assignment) -> None:
+    """
+    删除作业，并在同一事务中移除该作业的汇总行和草图、重新计算所属课程的草图
+    以及提交过该作业的学生的汇总，需调用方提交事务
+
+    汇总行和草图引用作业，先于作业删除。
+
+    Args:
+        db: 数据库会话
+        assignment: 要删除的作业
+    """
+    assignment_id, course_id = assignment.id, assignment.course_id
+    student_ids = db.exec(
+        select(Submission.student_id).where(Submission.assignment_id == assignment_id).distinct()
+    ).all()
+    db.execute(delete(AssignmentStatistics).where(AssignmentStatistics.assignment_id == assignment_id))
+    db.execute(delete(AssignmentScoreSketch).where(AssignmentScoreSketch.assignment_id == assignment_id))
+    db.delete(assignment)
+    db.flush()
+    _recompute_student_statistics(db, list(student_ids))
+    _merge_course_sketches(db, [course_id])
+
+
+def delete_course_and_statistics(db: Session, course: Course) -> None:
+    """
+    删除课程，并在同一事务中移除课程及其作业的汇总行和草图、重新计算相关学生的汇总，需调用方提交事务
+
+    Args:
+        db: 数据库会话
+        course: 要删除的课程
+    """
+    assignment_ids = list(db.exec(select(Assignment.id).where(Assignment.course_id == course.id)).all())
+    student_ids: List[int] = []
+    if assignment_ids:
+        student_ids = list(db.exec(
+            select(Submission.student_id).where(Submission.assignment_id.in_(assignment_ids)).distinct()
+        ).all())
+        db.execute(delete(AssignmentStatistics).where(AssignmentStatistics.assignment_id.in_(assignment_ids)))
+        db.execute(delete(AssignmentScoreSketch).where(AssignmentScoreSketch.assignment_id.in_(assignment_ids)))
+    db.execute(delete(CourseScoreSketch).where(CourseScoreSketch.course_id == course.id))
+    db.delete(course)
+    db.flush()
+    _recompute_student_statistics(db, student_ids)
+
+
+# 系统概览计数的实体，键为计数名称
+COUNTED_MODELS: Dict[str, Type[SQLModel]] = {
+    "users": User,
+    "classes": Class,
+    "courses": Course,
+    "assignments": Assignment,
+}
+
+
+def _adjust_counter(connection: Any, name: str, delta: int) -> None:
+    """
+    在写入实体的同一事务中增减计数
+
+    计数行不存在时(尚未初始化)不做处理，下次读取或重建时按原始记录重新计数。
+
+    Args:
+        connection: 当前事务的数据库连接
+        name: 计数名称
+        delta: 增减数量
+    """
+    connection.execute(
+        update(EntityCounter)
+        .where(EntityCounter.name == name)
+        .values(count=EntityCounter.count + delta, updated_at=datetime.utcnow())
+    )
+
+
+def _register_counter_events() -> None:
+    """
+    注册计数实体的插入和删除事件，通过 ORM 写入的记录都会同步更新计数
+    """
+    for name, model in COUNTED_MODELS.items():
+        def on_insert(mapper: Any, connection: Any, target: Any, name: str = name) -> None:
+            _adjust_counter(connection, name, 1)
+
+        def on_delete(mapper: Any, connection: Any, target: Any, name: str = name) -> None:
+            _adjust_counter(connection, name, -1)
+
+        event.listen(model, "after_insert", on_insert)
+        event.listen(model, "after_delete", on_delete)
+
+
+_register_counter_events()
+
+
+def refresh_entity_counters(db: Session) -> None:
+    """
+    按原始记录重新计数，修正绕过 ORM 的批量写入造成的偏差，需调用方提交事务
+
+    Args:
+        db: 数据库会话
+    """
+    now = datetime.utcnow()
+    db.execute(delete(EntityCounter))
+    db.add_all([
+        EntityCounter(
+            name=name,
+            count=db.exec(select(func.count()).select_from(model)).one(),
+            updated_at=now,
+            verified_at=now,
+        )
+        for name, model in COUNTED_MODELS.items()
+    ])
+
+
+def get_system_overview(db: Session) -> Dict[str, Any]:
+    """
+    从计数表读取系统概览，耗时与数据量无关
+
+    计数表由应用启动时的 ensure_statistics_built 初始化。缺少的计数直接按原始记录计数，
+    不在读取请求中写入计数表，避免并发请求同时初始化。
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        包含各实体总数(total_users 等)和每个计数更新、校准时间的字典
+    """
+    counters_by_name = {counter.name: counter for counter in db.exec(select(EntityCounter)).all()}
+    now = datetime.utcnow()
+    for name, model in COUNTED_MODELS.items():
+        if name not in counters_by_name:
+            counters_by_name[name] = EntityCounter(
+                name=name,
+                count=db.exec(select(func.count()).select_from(model)).one(),
+                updated_at=now,
+                verified_at=now,
+            )
+
+    return {
+        **{f"total_{name}": counters_by_name[name].count for name in COUNTED_MODELS},
+        "count_freshness": {
+            name: {
+                "updated_at": counters_by_name[name].updated_at.isoformat(),
+                "verified_at": counters_by_name[name].verified_at.isoformat(),
+            }
+            for name in COUNTED_MODELS
+        },
+    }
+
+
+def rebuild_statistics(db: Session) -> int:
+    """
+    从原始记录重新计算全部汇总数据、草图和实体计数，用于修复或首次部署
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        重建的汇总行数量
+    """
+    rebuilt = 0
+    for model in (AssignmentStatistics, StudentStatistics):
+        db.execute(delete(model))
+        rows = _compute_statistics_rows(db, model)
+        db.add_all(rows)
+        rebuilt += len(rows)
+
+    db.execute(delete(AssignmentScoreSketch))
+    db.add_all(_compute_sketch_rows(db))
+    _merge_course_sketches(db)
+    refresh_entity_counters(db)
+    db.commit()
+    return rebuilt
+
+
+def ensure_statistics_built(db: Session) -> bool:
+    """
+    汇总表或草图为空但已有原始记录，或实体计数未初始化时自动重建(例如升级后首次启动)
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        是否执行了重建
+    """
+    has_statistics = db.exec(select(AssignmentStatistics.assignment_id).limit(1)).first()
+    has_submissions = db.exec(select(Submission.id).limit(1)).first()
+    has_sketches = db.exec(select(AssignmentScoreSketch.assignment_id).limit(1)).first()
+    has_gradings = db.exec(select(Grading.id).limit(1)).first()
+    missing_statistics = has_statistics is None and has_submissions is not None
+    missing_sketches = has_sketches is None and has_gradings is not None
+    missing_counters = len(db.exec(select(EntityCounter.name)).all()) < len(COUNTED_MODELS)
+    if not (missing_statistics or missing_sketches or missing_counters):
+        return False
+    rebuild_statistics(db)
+    return True
+
+
+def _average(score_sum: Optional[float], graded_count: Optional[int]) -> float:
+    """
+    根据分数和与批改数计算平均分
+
+    Args:
+        score_sum: 分数和
+        graded_count: 批改数
+
+    Returns:
+        平均分，没有批改时为0
+    """
+    return score_sum / graded_count if graded_count else 0
+
+
+def _std_dev(score_sum: Optional[float], score_sum_squares: Optional[float], graded_count: Optional[int]) -> float:
+    """
+    根据分数和与平方和计算总体标准差
+
+    Args:
+        score_sum: 分数和
+        score_sum_squares: 分数平方和
+        graded_count: 批改数
+
+    Returns:
+        标准差，没有批改时为0
+    """
+    if not graded_count:
+        return 0
+    mean = score_sum / graded_count
+    # 浮点误差可能使方差略小于0
+    return math.sqrt(max(score_sum_squares / graded_count - mean * mean, 0))
+
+
+def _sketch_bins(db: Session, model: Type[SQLModel], owner_id: int) -> List[Any]:
+    """
+    读取一个作业或课程的草图分箱
+
+    Args:
+        db: 数据库会话
+        model: 草图表模型
+        owner_id: 作业ID或课程ID
+
+    Returns:
+        (分箱下标, 计数) 列表
+    """
+    return db.exec(
+        select(model.bin_index, model.count).where(_sketch_owner(model) == owner_id)
+    ).all()
+
+
+def get_assignment_aggregates(
+    db: Session, assignment_id: int, class_id: int, total_points: int
+) -> Dict[str, Any]:
+    """
+    读取作业的全部统计数据
+
+    提交数、批改数、分数聚合和分布直接来自 assignment_statistics 汇总行，
+    学生数作为标量子查询在同一条 SELECT 中返回；分位数由作业草图估算。
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        class_id: 作业所属课程的班级ID
+        total_points: 作业总分
+
+    Returns:
+        包含计数、分数聚合、标准差、分位数和分布的字典
+    """
+    students_count = (
+        select(func.count(ClassMember.id))
+        .where(
+            ClassMember.class_id == class_id,
+            ClassMember.role == "student",
+        )
+        .scalar_subquery()
+    )
+    row = db.exec(
+        select(students_count.label("total_students"), AssignmentStatistics)
+        .where(AssignmentStatistics.assignment_id == assignment_id)
+    ).first()
+
+    # 没有汇总行说明该作业还没有任何提交
+    if row is None:
+        total_students = db.exec(select(students_count)).one()
+        statistics = AssignmentStatistics(assignment_id=assignment_id)
+    else:
+        total_students, statistics = row
+
+    return {
+        "total_students": total_students,
+        "total_submissions": statistics.submission_count,
+        "graded_submissions": statistics.graded_count,
+        "average_score": _average(statistics.score_sum, statistics.graded_count),
+        "highest_score": statistics.max_score or 0,
+        "lowest_score": statistics.min_score or 0,
+        "std_dev": _std_dev(statistics.score_sum, statistics.score_sum_squares, statistics.graded_count),
+        "percentiles": sketch_quantiles(
+            _sketch_bins(db, AssignmentScoreSketch, assignment_id),
+            scale=total_points,
+            lower=statistics.min_score,
+            upper=statistics.max_score,
+        ),
+        "distribution": [getattr(statistics, f"bucket_{index}") for index in range(len(SCORE_RANGES))],
+    }
+
+
+def get_course_assignment_aggregates(db: Session, course_id: int) -> List[Dict[str, Any]]:
+    """
+    读取课程内每个作业的提交数和平均分
+
+    Assignment LEFT JOIN assignment_statistics，无论课程有多少作业，
+    都只需一次查询。
+
+    Args:
+        db: 数据库会话
+        course_id: 课程ID
+
+    Returns:
+        每个作业一条记录的列表，按作业ID排序
+    """
+    statement = (
+        select(
+            Assignment.id,
+            Assignment.title,
+            AssignmentStatistics.submission_count,
+            AssignmentStatistics.graded_count,
+            AssignmentStatistics.score_sum,
+        )
+        .select_from(Assignment)
+        .outerjoin(AssignmentStatistics, AssignmentStatistics.assignment_id == Assignment.id)
+        .where(Assignment.course_id == course_id)
+        .order_by(Assignment.id)
+    )
+
+    return [
+        {
+            "assignment_id": row.id,
+            "title": row.title,
+            "submissions_count": row.submission_count or 0,
+            "average_score": _average(row.score_sum, row.graded_count),
+        }
+        for row in db.exec(statement)
+    ]
+
+
+def get_course_score_summary(db: Session, course_id: int) -> Dict[str, Any]:
+    """
+    读取课程全部作业的得分率汇总
+
+    课程内各作业总分可能不同，结果以占总分的百分比表示。均值和标准差由各作业
+    汇总行换算后相加得到，分位数来自由作业草图合并而成的课程草图。
+
+    Args:
+        db: 数据库会话
+        course_id: 课程ID
+
+    Returns:
+        包含批改数、平均得分率、标准差和分位数的字典
+    """
+    scale = 100.0 / Assignment.total_points
+    row = db.exec(
+        select(
+            func.sum(AssignmentStatistics.graded_count).label("graded_count"),
+            func.sum(AssignmentStatistics.score_sum * scale).label("score_sum"),
+            func.sum(AssignmentStatistics.score_sum_squares * scale * scale).label("score_sum_squares"),
+        )
+        .join(Assignment, Assignment.id == AssignmentStatistics.assignment_id)
+        .where(
+            Assignment.course_id == course_id,
+            Assignment.total_points > 0,
+        )
+    ).one()
+
+    return {
+        "graded_submissions": row.graded_count or 0,
+        "average_score_rate": _average(row.score_sum, row.graded_count),
+        "std_dev": _std_dev(row.score_sum, row.score_sum_squares, row.graded_count),
+        "percentiles": sketch_quantiles(
+            _sketch_bins(db, CourseScoreSketch, course_id), scale=100, lower=0, upper=100
+        ),
+    }
+
+
+def _first_submissions_subquery(assignment_filter: Any) -> Any:
+    """
+    构建每个学生在每个作业上最早一次提交的子查询
+
+    同一作业多次提交时取最早的一次，与学生统计的规则一致。
+
+    Args:
+        assignment_filter: 作业过滤条件
+
+    Returns:
+        包含 assignment_id、student_id、submission_id 列的子查询
+    """
+    return (
+        select(
+            Submission.assignment_id,
+            Submission.student_id,
+            func.min(Submission.id).label("submission_id"),
+        )
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .where(assignment_filter)
+        .group_by(Submission.assignment_id, Submission.student_id)
+        .subquery()
+    )
+
+
+def _gradebook_column(assignment_id: int, title: str, total_points: int) -> Dict[str, Any]:
+    """
+    创建成绩册中一个作业列的初始汇总
+
+    Args:
+        assignment_id: 作业ID
+        title: 作业标题
+        total_points: 作业总分
+
+    Returns:
+        计数为零的作业列汇总
+    """
+    return {
+        "assignment_id": assignment_id,
+        "title": title,
+        "total_points": total_points,
+        "submission_count": 0,
+        "graded_count": 0,
+        "score_sum": 0,
+        "highest_score": None,
+        "lowest_score": None,
+    }
+
+
+def get_course_gradebook(db: Session, course_id: int, class_id: int) -> Dict[str, Any]:
+    """
+    一次联表查询生成课程成绩册(学生 × 作业的成绩矩阵)及行列汇总
+
+    班级学生与课程作业做笛卡尔积，再左连接每个学生在每个作业上最早的一次
+    提交及其批改，取提交的规则与学生统计一致。未提交或未批改的单元格为None。
+
+    Args:
+        db: 数据库会话
+        course_id: 课程ID
+        class_id: 课程所属班级ID
+
+    Returns:
+        包含 assignments(列汇总)、students(行汇总)和 scores(成绩矩阵)的字典，
+        scores[i][j] 为第 i 个学生在第 j 个作业上的分数
+    """
+    first_submissions = _first_submissions_subquery(Assignment.course_id == course_id)
+    statement = (
+        select(
+            User.id.label("student_id"),
+            User.username,
+            Assignment.id.label("assignment_id"),
+            Assignment.title,
+            Assignment.total_points,
+            first_submissions.c.submission_id,
+            Grading.score,
+        )
+        .select_from(ClassMember)
+        .join(User, User.id == ClassMember.user_id)
+        .outerjoin(Assignment, Assignment.course_id == course_id)
+        .outerjoin(
+            first_submissions,
+            and_(
+                first_submissions.c.student_id == ClassMember.user_id,
+                first_submissions.c.assignment_id == Assignment.id,
+            ),
+        )
+        .outerjoin(Grading, Grading.submission_id == first_submissions.c.submission_id)
+        .where(
+            ClassMember.class_id == class_id,
+            ClassMember.role == "student",
+        )
+        .order_by(ClassMember.id, Assignment.id)
+    )
+    # 结果行数为学生数 × 作业数，只需要原始值，直接走 Core 连接执行
+    rows = db.connection().execute(statement).fetchall()
+
+    assignments: List[Dict[str, Any]] = []
+    assignment_index: Dict[int, int] = {}
+    students: List[Dict[str, Any]] = []
+    scores: List[List[Optional[float]]] = []
+    # 逐行解包元组，避免结果行按属性取值的开销
+    student: Dict[str, Any] = {}
+    row_scores: List[Optional[float]] = []
+    for student_id, username, assignment_id, title, total_points, submission_id, score in rows:
+        if student.get("student_id") != student_id:
+            student = {
+                "student_id": student_id,
+                "username": username,
+                "submitted_count": 0,
+                "graded_count": 0,
+                "total_score": 0,
+            }
+            row_scores = []
+            students.append(student)
+            scores.append(row_scores)
+        if assignment_id is None:
+            continue
+        index = assignment_index.get(assignment_id)
+        if index is None:
+            index = assignment_index[assignment_id] = len(assignments)
+            assignments.append(_gradebook_column(assignment_id, title, total_points))
+
+        column = assignments[index]
+        row_scores.append(score)
+        if submission_id is not None:
+            student["submitted_count"] += 1
+            column["submission_count"] += 1
+        if score is not None:
+            student["graded_count"] += 1
+            student["total_score"] += score
+            column["graded_count"] += 1
+            column["score_sum"] += score
+            if column["highest_score"] is None or score > column["highest_score"]:
+                column["highest_score"] = score
+            if column["lowest_score"] is None or score < column["lowest_score"]:
+                column["lowest_score"] = score
+
+    # 班级没有学生时矩阵为空，作业列表单独查询
+    if not students:
+        for assignment in db.exec(
+            select(Assignment).where(Assignment.course_id == course_id).order_by(Assignment.id)
+        ):
+            assignments.append(
+                _gradebook_column(assignment.id, assignment.title, assignment.total_points)
+            )
+
+    for student in students:
+        student["average_score"] = (
+            student["total_score"] / student["graded_count"] if student["graded_count"] else None
+        )
+    for column in assignments:
+        score_sum = column.pop("score_sum")
+        column["average_score"] = (
+            score_sum / column["graded_count"] if column["graded_count"] else None
+        )
+
+    return {"assignments": assignments, "students": students, "scores": scores}
+
+
+class TimelineGranularity(str, Enum):
+    """提交时间线的分桶粒度"""
+    HOUR = "hour"
+    DAY = "day"
+
+
+# 提交时间线各分桶粒度的秒数
+TIMELINE_GRANULARITIES: Dict[TimelineGranularity, int] = {
+    TimelineGranularity.HOUR: 3600,
+    TimelineGranularity.DAY: 86400,
+}
+
+
+def _due_offset_bucket(dialect_name: str, bucket_seconds: int) -> Any:
+    """
+    构建提交时间相对截止时间的分桶表达式
+
+    第 k 个桶覆盖 [截止时间 + k * 粒度, 截止时间 + (k + 1) * 粒度)，截止前最后
+    一小时为 -1。各数据库计算时间差和向下取整的函数不同，按方言分别生成。
+
+    Args:
+        dialect_name: 数据库方言名称
+        bucket_seconds: 分桶粒度(秒)
+
+    Returns:
+        分桶下标表达式
+    """
+    if dialect_name == "sqlite":
+        seconds = (
+            cast(func.strftime("%s", Submission.submission_time), Integer)
+            - cast(func.strftime("%s", Assignment.due_date), Integer)
+        )
+        # SQLite 的整数除法向零取整，负数需要换算成向下取整
+        return case(
+            (seconds >= 0, seconds / bucket_seconds),
+            else_=-((bucket_seconds - 1 - seconds) / bucket_seconds),
+        )
+    if dialect_name == "mysql":
+        seconds = func.timestampdiff(
+            literal_column("SECOND"), Assignment.due_date, Submission.submission_time
+        )
+        return func.floor(seconds / bucket_seconds)
+    seconds = func.extract("epoch", Submission.submission_time - Assignment.due_date)
+    return func.floor(seconds / bucket_seconds)
+
+
+def _late_count() -> Any:
+    """
+    构建迟交数量的聚合列
+
+    Returns:
+        晚于截止时间的提交数量
+    """
+    return func.coalesce(
+        func.sum(case((Submission.submission_time > Assignment.due_date, 1), else_=0)), 0
+    )
+
+
+def get_submission_timeline(
+    db: Session,
+    granularity: TimelineGranularity,
+    assignment_id: Optional[int] = None,
+    course_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    按相对截止时间的小时或天分组统计提交数量和累计提交曲线
+
+    分组在数据库中完成，依赖 submissions(assignment_id, submission_time) 索引，
+    Python 中只处理分组后的桶。课程统计时每次提交按各自作业的截止时间分桶。
+
+    Args:
+        db: 数据库会话
+        granularity: 分桶粒度
+        assignment_id: 统计单个作业时传入
+        course_id: 统计整个课程时传入
+
+    Returns:
+        包含提交总数、迟交数、迟交率和按偏移排序的桶列表的字典
+    """
+    bucket = _due_offset_bucket(
+        db.get_bind().dialect.name, TIMELINE_GRANULARITIES[granularity]
+    ).label("bucket")
+    statement = (
+        select(
+            bucket,
+            func.count(Submission.id).label("submissions"),
+            _late_count().label("late"),
+        )
+        .select_from(Submission)
+        .join(Assignment, Assignment.id == Submission.assignment_id)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+    if assignment_id is not None:
+        statement = statement.where(Submission.assignment_id == assignment_id)
+    if course_id is not None:
+        statement = statement.where(Assignment.course_id == course_id)
+    rows = db.exec(statement).all()
+
+    total = sum(row.submissions for row in rows)
+    late = sum(row.late for row in rows)
+    buckets = []
+    cumulative = 0
+    for row in rows:
+        cumulative += row.submissions
+        buckets.append({
+            "offset": int(row.bucket),
+            "submissions": row.submissions,
+            "cumulative": cumulative,
+            "cumulative_rate": cumulative / total,
+        })
+
+    return {
+        "total_submissions": total,
+        "late_submissions": late,
+        "late_rate": late / total if total else 0,
+        "buckets": buckets,
+    }
+
+
+def get_course_assignment_late_rates(db: Session, course_id: int) -> List[Dict[str, Any]]:
+    """
+    按作业分组统计课程内每个作业的提交数和迟交率
+
+    Args:
+        db: 数据库会话
+        course_id: 课程ID
+
+    Returns:
+        每个作业一条记录的列表，按作业ID排序
+    """
+    statement = (
+        select(
+            Assignment.id,
+            Assignment.title,
+            Assignment.due_date,
+            func.count(Submission.id).label("submissions"),
+            _late_count().label("late"),
+        )
+        .select_from(Assignment)
+        .outerjoin(Submission, Submission.assignment_id == Assignment.id)
+        .where(Assignment.course_id == course_id)
+        .group_by(Assignment.id, Assignment.title, Assignment.due_date)
+        .order_by(Assignment.id)
+    )
+
+    return [
+        {
+            "assignment_id": row.id,
+            "title": row.title,
+            "due_date": row.due_date.isoformat(),
+            "total_submissions": row.submissions,
+            "late_submissions": row.late,
+            "late_rate": row.late / row.submissions if row.submissions else 0,
+        }
+        for row in db.exec(statement)
+    ]
+
+
+def supports_window_functions(db: Session) -> bool:
+    """
+    判断当前数据库是否支持窗口函数
+
+    SQLite 3.25、MySQL 8.0、MariaDB 10.2 起支持窗口函数。
+
+    Args:
+        db: 数据库会话
+
+    Returns:
+        支持时返回 True
+    """
+    dialect = db.connection().dialect
+    if dialect.name == "sqlite":
+        return dialect.dbapi.sqlite_version_info >= (3, 25, 0)
+    if dialect.name == "mysql":
+        version = dialect.server_version_info or (0,)
+        return version >= ((10, 2) if getattr(dialect, "is_mariadb", False) else (8, 0))
+    return True
+
+
+def _leaderboard_totals_subquery(class_id: int, assignment_filter: Any) -> Any:
+    """
+    构建排行榜的学生总分子查询
+
+    每个学生在每个作业上取最早一次提交的分数，total_score 为全部作业的总分，
+    previous_total 为不含最近一次作业(有批改的作业中截止时间最晚者)的总分，
+    用于计算名次变化。班级内没有批改的学生总分为0。
+
+    Args:
+        class_id: 学生所在班级ID
+        assignment_filter: 参与排名的作业过滤条件
+
+    Returns:
+        包含 student_id、username、total_score、previous_total、graded_assignments 列的子查询
+    """
+    first_submissions = _first_submissions_subquery(assignment_filter)
+    latest_assignment_id = (
+        select(Assignment.id)
+        .join(Submission, Submission.assignment_id == Assignment.id)
+        .join(Grading, Grading.submission_id == Submission.id)
+        .where(assignment_filter)
+        .order_by(Assignment.due_date.desc(), Assignment.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    # 从批改表出发按主键关联提交，只保留每个作业最早一次提交的批改
+    scores = (
+        select(
+            Submission.student_id,
+            Submission.assignment_id,
+            Grading.score,
+        )
+        .select_from(Grading)
+        .join(Submission, Submission.id == Grading.submission_id)
+        .where(Submission.id.in_(select(first_submissions.c.submission_id)))
+        .subquery()
+    )
+    return (
+        select(
+            User.id.label("student_id"),
+            User.username,
+            func.coalesce(func.sum(scores.c.score), 0).label("total_score"),
+            func.coalesce(
+                func.sum(
+                    case((scores.c.assignment_id == latest_assignment_id, 0), else_=scores.c.score)
+                ),
+                0,
+            ).label("previous_total"),
+            func.count(scores.c.score).label("graded_assignments"),
+            latest_assignment_id.label("latest_assignment_id"),
+        )
+        .select_from(ClassMember)
+        .join(User, User.id == ClassMember.user_id)
+        .outerjoin(scores, scores.c.student_id == ClassMember.user_id)
+        .where(
+            ClassMember.class_id == class_id,
+            ClassMember.role == "student",
+        )
+        .group_by(User.id, User.username)
+        .subquery()
+    )
+
+
+def _rank_in_python(rows: List[Any]) -> List[Dict[str, Any]]:
+    """
+    在不支持窗口函数的数据库上根据学生总分计算名次，规则与 RANK() 和 CUME_DIST() 一致
+
+    Args:
+        rows: 学生总分子查询的结果行
+
+    Returns:
+        与窗口函数查询结构相同的记录列表
+    """
+    totals = sorted(row.total_score for row in rows)
+    previous_totals = sorted(row.previous_total for row in rows)
+    count = len(rows)
+    ranked = []
+    for row in rows:
+        # 名次为总分严格更高的人数加一，百分位为总分不高于自己的人数占比
+        not_higher = bisect_right(totals, row.total_score)
+        ranked.append({
+            **row._mapping,
+            "rank": count - not_higher + 1,
+            "previous_rank": count - bisect_right(previous_totals, row.previous_total) + 1,
+            "cume_dist": not_higher / count,
+        })
+    return ranked
+
+
+def get_leaderboard(db: Session, class_id: int, course_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    计算课程或班级的学生排行榜
+
+    先按学生聚合总分，再用窗口函数 RANK() 计算名次(同分同名次)和不含最近一次
+    作业时的名次，用 CUME_DIST() 计算百分位。数据库不支持窗口函数时取回
+    按学生聚合后的总分在 Python 中排名。
+
+    Args:
+        db: 数据库会话
+        class_id: 班级ID，课程排行榜时为课程所属班级
+        course_id: 课程ID，为None时统计班级全部课程
+
+    Returns:
+        包含最近一次作业ID和按名次排序的学生列表的字典
+    """
+    if course_id is not None:
+        assignment_filter = Assignment.course_id == course_id
+    else:
+        assignment_filter = Assignment.course_id.in_(
+            select(Course.id).where(Course.class_id == class_id)
+        )
+    totals = _leaderboard_totals_subquery(class_id, assignment_filter)
+
+    if supports_window_functions(db):
+        statement = (
+            select(
+                totals,
+                func.rank().over(order_by=totals.c.total_score.desc()).label("rank"),
+                func.rank().over(order_by=totals.c.previous_total.desc()).label("previous_rank"),
+                func.cume_dist(type_=Float).over(order_by=totals.c.total_score).label("cume_dist"),
+            )
+        )
+        rows = [dict(row._mapping) for row in db.exec(statement)]
+    else:
+        rows = _rank_in_python(db.exec(select(*totals.c)).all())
+
+    rows.sort(key=lambda row: (row["rank"], row["student_id"]))
+    latest_assignment_id = rows[0]["latest_assignment_id"] if rows else None
+    return {
+        "latest_assignment_id": latest_assignment_id,
+        "students": [
+            {
+                "rank": row["rank"],
+                "student_id": row["student_id"],
+                "username": row["username"],
+                "total_score": row["total_score"],
+                "graded_assignments": row["graded_assignments"],
+                "percentile": round(row["cume_dist"] * 100, 2),
+                "previous_rank": row["previous_rank"],
+                # 正数表示名次上升
+                "rank_change": row["previous_rank"] - row["rank"],
+            }
+            for row in rows
+        ],
+    }
+
+
+def get_student_assignment_rows(db: Session, student_id: int) -> List[Any]:
+    """
+    一次查询获取学生所在班级全部课程的作业完成情况
+
+    每行包含课程、作业、该学生的提交ID和分数。没有作业的课程也会返回一行
+    (作业字段为空)；同一作业有多次提交时取最早的一次提交。
+
+    Args:
+        db: 数据库会话
+        student_id: 学生ID
+
+    Returns:
+        按课程ID、作业ID排序的结果行列表
+    """
+    class_ids = select(ClassMember.class_id).where(ClassMember.user_id == student_id)
+    first_submission_id = (
+        select(func.min(Submission.id))
+        .where(
+            Submission.assignment_id == Assignment.id,
+            Submission.student_id == student_id,
+        )
+        .correlate(Assignment)
+        .scalar_subquery()
+    )
+
+    statement = (
+        select(
+            Course.id.label("course_id"),
+            Course.name.label("course_name"),
+            Assignment.id.label("assignment_id"),
+            Assignment.title,
+            Assignment.due_date,
+            Submission.id.label("submission_id"),
+            Grading.score,
+        )
+        .select_from(Course)
+        .outerjoin(Assignment, Assignment.course_id == Course.id)
+        .outerjoin(Submission, Submission.id == first_submission_id)
+        .outerjoin(Grading, Grading.submission_id == Submission.id)
+        .where(Course.class_id.in_(class_ids))
+        .order_by(Course.id, Assignment.id)
+    )
+    return db.exec(statement).all()
+
+
+def get_class_student_aggregates(db: Session, class_id: int) -> List[Dict[str, Any]]:
+    """
+    读取班级花名册中每个学生的提交数、批改数和平均分
+
+    Args:
+        db: 数据库会话
+        class_id: 班级ID
+
+    Returns:
+        每个学生一条记录的列表，按加入班级的顺序排序
+    """
+    statement = (
+        select(
+            User.id,
+            User.username,
+            User.email,
+            StudentStatistics.submission_count,
+            StudentStatistics.graded_count,
+            StudentStatistics.score_sum,
+        )
+        .select_from(ClassMember)
+        .join(User, User.id == ClassMember.user_id)
+        .outerjoin(StudentStatistics, StudentStatistics.student_id == User.id)
+        .where(
+            ClassMember.class_id == class_id,
+            ClassMember.role == "student",
+        )
+        .order_by(ClassMember.id)
+    )
+
+    return [
+        {
+            "student_id": row.id,
+            "username": row.username,
+            "email": row.email,
+            "total_submissions": row.submission_count or 0,
+            "graded_submissions": row.graded_count or 0,
+            "average_score": _average(row.score_sum, row.graded_count),
+        }
+        for row in db.exec(statement)
+    ]
+
+
+def get_class_course_aggregates(db: Session, class_id: int) -> List[Dict[str, Any]]:
+    """
+    按课程分组统计班级内每门课程的作业数
+
+    Args:
+        db: 数据库会话
+        class_id: 班级ID
+
+    Returns:
+        每门课程一条记录的列表，按课程ID排序
+    """
+    statement = (
+        select(
+            Course.id,
+            Course.name,
+            Course.teacher_id,
+            func.count(Assignment.id).label("total_assignments"),
+        )
+        .select_from(Course)
+        .outerjoin(Assignment, Assignment.course_id == Course.id)
+        .where(Course.class_id == class_id)
+        .group_by(Course.id, Course.name, Course.teacher_id)
+        .order_by(Course.id)
+    )
+
+    return [
+        {
+            "course_id": row.id,
+            "course_name": row.name,
+            "teacher_id": row.teacher_id,
+            "total_assignments": row.total_assignments,
+        }
+        for row in db.exec(statement)
+    ]
+
+
+def get_assignment_dashboard(db: Session, assignment: Assignment, class_id: int) -> Dict[str, Any]:
+    """
+    生成作业统计面板(作业统计接口的响应内容)
+
+    Args:
+        db: 数据库会话
+        assignment: 作业
+        class_id: 作业所属课程的班级ID
+
+    Returns:
+        包含提交率、批改率、分数聚合、分位数与分数分布的字典
+    """
+    # 从汇总行和分数草图获取提交、批改、分数聚合、分位数与分布
+    aggregates = get_assignment_aggregates(
+        db,
+        assignment_id=assignment.id,
+        class_id=class_id,
+        total_points=assignment.total_points,
+    )
+    class_students_count = aggregates["total_students"]
+    total_submissions = aggregates["total_submissions"]
+    graded_submissions = aggregates["graded_submissions"]
+
+    return {
+        "assignment_id": assignment.id,
+        "assignment_title": assignment.title,
+        "total_students": class_students_count,
+        "total_submissions": total_submissions,
+        "submission_rate": total_submissions / class_students_count if class_students_count > 0 else 0,
+        "graded_submissions": graded_submissions,
+        "grading_rate": graded_submissions / total_submissions if total_submissions > 0 else 0,
+        "average_score": aggregates["average_score"],
+        "highest_score": aggregates["highest_score"],
+        "lowest_score": aggregates["lowest_score"],
+        "median_score": aggregates["percentiles"]["p50"],
+        "std_dev": aggregates["std_dev"],
+        "percentiles": aggregates["percentiles"],
+        "score_distribution": {
+            "ranges": score_ranges(assignment.total_points),
+            "counts": aggregates["distribution"],
+        },
+    }
+
+
+def get_course_dashboard(db: Session, course: Course) -> Dict[str, Any]:
+    """
+    生成课程统计面板(课程统计接口的响应内容)
+
+    Args:
+        db: 数据库会话
+        course: 课程
+
+    Returns:
+        包含学生数、作业数、平均提交率、平均分、得分情况和每个作业统计的字典
+    """
+    # 获取学生数量
+    total_students = db.exec(
+        select(func.count(ClassMember.id)).where(
+            ClassMember.class_id == course.class_id,
+            ClassMember.role == "student",
+        )
+    ).one()
+
+    # 一次分组查询获取每个作业的提交数和平均分
+    assignment_aggregates = get_course_assignment_aggregates(db, course_id=course.id)
+    total_assignments = len(assignment_aggregates)
+
+    assignment_stats = []
+    total_submission_rate = 0
+    total_avg_score = 0
+
+    for aggregate in assignment_aggregates:
+        submission_rate = aggregate["submissions_count"] / total_students if total_students > 0 else 0
+
+        assignment_stats.append({
+            "assignment_id": aggregate["assignment_id"],
+            "title": aggregate["title"],
+            "submissions_count": aggregate["submissions_count"],
+            "submission_rate": submission_rate,
+            "average_score": aggregate["average_score"],
+        })
+
+        total_submission_rate += submission_rate
+        total_avg_score += aggregate["average_score"]
+
+    # 计算平均值
+    avg_submission_rate = total_submission_rate / total_assignments if total_assignments > 0 else 0
+    avg_course_score = total_avg_score / total_assignments if total_assignments > 0 else 0
+
+    return {
+        "course_id": course.id,
+        "course_name": course.name,
+        "total_students": total_students,
+        "total_assignments": total_assignments,
+        "average_submission_rate": avg_submission_rate,
+        "average_course_score": avg_course_score,
+        # 课程整体得分情况，以占总分的百分比表示
+        "score_summary": get_course_score_summary(db, course_id=course.id),
+        "assignments": assignment_stats,
+    }
+
+
+def get_class_dashboard(db: Session, class_: Class) -> Dict[str, Any]:
+    """
+    生成班级统计面板(班级统计接口的响应内容)
+
+    Args:
+        db: 数据库会话
+        class_: 班级
+
+    Returns:
+        包含每个学生和每个课程统计的字典
+    """
+    # 一次分组查询统计每个学生的提交、批改和平均分
+    student_stats = get_class_student_aggregates(db, class_id=class_.id)
+
+    # 一次分组查询统计每个课程的作业数
+    course_stats = get_class_course_aggregates(db, class_id=class_.id)
+
+    return {
+        "class_id": class_.id,
+        "class_name": class_.name,
+        "total_students": len(student_stats),
+        "total_courses": len(course_stats),
+        "students": student_stats,
+        "courses": course_stats,
+    }
+
+
+def get_student_dashboard(db: Session, user: User) -> Dict[str, Any]:
+    """
+    生成学生统计面板(学生的用户统计接口响应内容)
+
+    Args:
+        db: 数据库会话
+        user: 学生用户
+
+    Returns:
+        包含学生每个课程作业完成情况和平均分的字典
+    """
+    # 一次联表查询获取全部课程、作业、提交和分数，再在内存中分组
+    rows = get_student_assignment_rows(db, student_id=user.id)
+
+    course_stats = []
+    current_course = None
+
+    for row in rows:
+        if current_course is None or current_course["course_id"] != row.course_id:
+            current_course = {
+                "course_id": row.course_id,
+                "course_name": row.course_name,
+                "assignments": [],
+            }
+            course_stats.append(current_course)
+
+        # 没有作业的课程只有一行空作业记录
+        if row.assignment_id is None:
+            continue
+
+        # 统计信息
+        submission_status = "not_submitted"
+        if row.submission_id is not None:
+            submission_status = "graded" if row.score is not None else "submitted"
+
+        current_course["assignments"].append({
+            "assignment_id": row.assignment_id,
+            "title": row.title,
+            "status": submission_status,
+            "score": row.score,
+            "due_date": row.due_date.isoformat(),
+        })
+
+    for index, course in enumerate(course_stats):
+        assignment_stats = course["assignments"]
+        scores = [a["score"] for a in assignment_stats if a["status"] == "graded"]
+
+        # 计算平均分
+        avg_score = sum(scores) / len(scores) if scores else None
+
+        course_stats[index] = {
+            "course_id": course["course_id"],
+            "course_name": course["course_name"],
+            "total_assignments": len(assignment_stats),
+            "completed_assignments": len([a for a in assignment_stats if a["status"] != "not_submitted"]),
+            "graded_assignments": len(scores),
+            "average_score": avg_score,
+            "assignments": assignment_stats,
+        }
+
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "courses": course_stats,
+    }
+
+
+def get_teacher_dashboard(db: Session, user: User) -> Dict[str, Any]:
+    """
+    生成教师统计面板(教师的用户统计接口响应内容)
+
+    Args:
+        db: 数据库会话
+        user: 教师用户
+
+    Returns:
+        包含教师所教每个课程的作业数和学生数的字典
+    """
+    # 获取教师的课程
+    courses = db.exec(
+        select(Course).where(Course.teacher_id == user.id)
+    ).all()
+
+    course_stats = []
+
+    for course in courses:
+        # 获取课程的作业
+        assignments_count = db.exec(
+            select(func.count(Assignment.id)).where(
+                Assignment.course_id == course.id,
+            )
+        ).one()
+
+        # 获取学生数量
+        students_count = db.exec(
+            select(func.count(ClassMember.id)).where(
+                ClassMember.class_id == course.class_id,
+                ClassMember.role == "student",
+            )
+        ).one()
+
+        course_stats.append({
+            "course_id": course.id,
+            "course_name": course.name,
+            "total_assignments": assignments_count,
+            "total_students": students_count,
+        })
+
+    return {
+        "user_id": user.id,
+        "username": user.username,
+        "role": user.role,
+        "total_courses": len(courses),
+        "courses": course_stats,
+    }
+
+
+# 统计接口响应缓存，键为 (接口, 实体ID)；配置 Redis 时失效对所有进程生效
+statistics_cache = TTLCache(
+    max_size=settings.STATISTICS_CACHE_MAX_SIZE,
+    ttl_seconds=settings.STATISTICS_CACHE_TTL_SECONDS,
+    stale_seconds=settings.STATISTICS_CACHE_STALE_SECONDS,
+    versions=(
+        RedisCacheVersions(settings.STATISTICS_CACHE_REDIS_URL, prefix="statistics_version:")
+        if settings.STATISTICS_CACHE_REDIS_URL
+        else None
+    ),
+)
+
+def class_cache_keys(class_id: int) -> List[Any]:
+    """
+    获取班级相关的全部缓存键(班级统计、班级成绩分析报告和班级排行榜)
+
+    Args:
+        class_id: 班级ID
+
+    Returns:
+        缓存键列表
+    """
+    return [("class", class_id), ("class_report", class_id), ("class_leaderboard", class_id)]
+
+
+def course_cache_keys(course_id: int) -> List[Any]:
+    """
+    获取课程相关的全部缓存键(课程统计、课程成绩册和课程排行榜)
+
+    Args:
+        course_id: 课程ID
+
+    Returns:
+        缓存键列表
+    """
+    return [("course", course_id), ("gradebook", course_id), ("course_leaderboard", course_id)]
+
+
+def invalidate_submission_statistics(db: Session, assignment_id: int, student_id: int) -> None:
+    """
+    提交或批改变化后，使受影响的统计缓存失效
+
+    影响该作业、作业所属课程、学生本人以及学生所在班级的统计。
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        student_id: 学生ID
+    """
+    keys = [("assignment", assignment_id), ("user", student_id)]
+    course_id = db.exec(
+        select(Assignment.course_id).where(Assignment.id == assignment_id)
+    ).first()
+    if course_id is not None:
+        keys.extend(course_cache_keys(course_id))
+    class_ids = db.exec(
+        select(ClassMember.class_id).where(ClassMember.user_id == student_id)
+    ).all()
+    for class_id in class_ids:
+        keys.extend(class_cache_keys(class_id))
+    statistics_cache.invalidate(keys)
+
+
+def invalidate_assignment_statistics(db: Session, assignment_id: int, course_id: int) -> None:
+    """
+    作业创建、更新或删除后，使受影响的统计缓存失效
+
+    影响该作业、所属课程、所属班级、课程教师和班级学生的统计。
+
+    Args:
+        db: 数据库会话
+        assignment_id: 作业ID
+        course_id: 课程ID
+    """
+    keys = [("assignment", assignment_id), *course_cache_keys(course_id)]
+    course = db.exec(
+        select(Course.class_id, Course.teacher_id).where(Course.id == course_id)
+    ).first()
+    if course is not None:
+        keys.extend(class_cache_keys(course.class_id))
+        keys.append(("user", course.teacher_id))
+        member_ids = db.exec(
+            select(ClassMember.user_id).where(ClassMember.class_id == course.class_id)
+        ).all()
+        keys.extend(("user", user_id) for user_id in member_ids)
+    statistics_cache.invalidate(keys)
+
+
+def invalidate_membership_statistics(db: Session, class_id: int, user_ids: List[int]) -> None:
+    """
+    班级成员变化后，使受影响的统计缓存失效
+
+    学生数影响班级、班级下全部课程和作业以及课程教师的统计，成员本人的
+    统计也随之变化。
+
+    Args:
+        db: 数据库会话
+        class_id: 班级ID
+        user_ids: 加入或移出班级的用户ID列表
+    """
+    keys = class_cache_keys(class_id)
+    keys.extend(("user", user_id) for user_id in user_ids)
+    courses = db.exec(
+        select(Course.id, Course.teacher_id).where(Course.class_id == class_id)
+    ).all()
+    for course in courses:
+        keys.extend(course_cache_keys(course.id))
+        keys.append(("user", course.teacher_id))
+    if courses:
+        assignment_ids = db.exec(
+            select(Assignment.id).where(Assignment.course_id.in_([c.id for c in courses]))
+        ).all()
+        keys.extend(("assignment", assignment_id) for assignment_id in assignment_ids)
+    statistics_cache.invalidate(keys)
+
+
+def invalidate_class_statistics(class_id: int) -> None:
+    """
+    班级信息变化或删除后，使班级统计缓存失效
+
+    Args:
+        class_id: 班级ID
+    """
+    statistics_cache.invalidate(class_cache_keys(class_id))
+
+
+def invalidate_course_statistics(db: Session, course_id: int, class_id: int, teacher_id: int) -> None:
+    """
+    课程创建、更新或删除后，使受影响的统计缓存失效
+
+    影响该课程、所属班级、课程教师和班级成员的统计。
+
+    Args:
+        db: 数据库会话
+        course_id: 课程ID
+        class_id: 班级ID
+        teacher_id: 课程教师ID
+    """
+    keys = [
+        ("user", teacher_id),
+        *course_cache_keys(course_id),
+        *class_cache_keys(class_id),
+    ]
+    member_ids = db.exec(
+        select(ClassMember.user_id).where(ClassMember.class_id == class_id)
+    ).all()
+    keys.extend(("user", user_id) for user_id in member_ids)
+    statistics_cache.invalidate(keys)
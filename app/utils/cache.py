@@ -0,0 +1,446 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# 过期条目的后台刷新线程池，所有缓存共用
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+
+
+class _Flight:
+    """
+    一次正在进行的加载，等待中的相同请求共享其结果
+    """
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        # 加载期间键被失效时置为 True，结果只返回给本次等待者，不写入缓存
+        self.invalidated = False
+
+
+class RedisCacheVersions:
+    """
+    保存在 Redis 中的缓存键版本号，多个进程的 TTLCache 通过它互相通知失效
+
+    失效时把键的版本号加一，读取条目时比较条目加载前读到的版本号和当前版本号，
+    不一致说明其他进程已使该键失效。Redis 不可用时读取的版本号为None，
+    失效只在本进程内生效，Redis 恢复后版本号不一致的条目会被丢弃。
+    """
+
+    def __init__(self, url: str, prefix: str = "cache_version:") -> None:
+        """
+        Args:
+            url: Redis 连接字符串
+            prefix: 版本号键前缀
+        """
+        # 只有配置了共享失效时才需要 redis
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._errors_type = redis.RedisError
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.errors = 0
+
+    def _name(self, key: Hashable) -> str:
+        parts = key if isinstance(key, tuple) else (key,)
+        return self.prefix + ":".join(str(part) for part in parts)
+
+    def _count_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def get(self, key: Hashable) -> Optional[int]:
+        """
+        读取键的当前版本号
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            版本号，从未失效过的键为0，Redis 不可用时为None
+        """
+        try:
+            raw = self._client.get(self._name(key))
+        except self._errors_type:
+            self._count_error()
+            return None
+        return int(raw or 0)
+
+    def bump(self, keys: Iterable[Hashable]) -> None:
+        """
+        把键的版本号加一，其他进程中这些键的条目在下次读取时被丢弃
+
+        Args:
+            keys: 缓存键列表
+        """
+        names = [self._name(key) for key in keys]
+        if not names:
+            return
+        try:
+            pipeline = self._client.pipeline(transaction=False)
+            for name in names:
+                pipeline.incr(name)
+            pipeline.execute()
+        except self._errors_type:
+            self._count_error()
+
+
+class TTLCache:
+    """
+    线程安全的进程内缓存，按TTL过期，超出容量时淘汰最久未使用的条目
+
+    过期后的 stale_seconds 秒内条目仍会保留，get_or_load 会先返回旧值并在后台刷新；
+    失效(invalidate)的条目立即删除，不会作为旧值返回。
+
+    未指定 versions 时失效只在本进程内生效，多个进程(gunicorn worker)时其他进程仍会返回
+    旧值直到条目过期。指定 versions 后失效会增加共享的版本号，每次读取条目时比较版本号，
+    其他进程失效过的条目不再返回。
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl_seconds: float = 60,
+        stale_seconds: float = 0,
+        versions: Optional[RedisCacheVersions] = None,
+    ) -> None:
+        """
+        Args:
+            max_size: 最大条目数
+            ttl_seconds: 条目存活时间(秒)
+            stale_seconds: 过期后仍可作为旧值返回的时间(秒)
+            versions: 多个进程共用的版本号，用于跨进程失效
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.versions = versions
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.remote_invalidations = 0
+
+    def _version(self, key: Hashable) -> Optional[int]:
+        """
+        读取键的共享版本号，未配置 versions 时为None，不能持有锁调用
+        """
+        if self.versions is None:
+            return None
+        return self.versions.get(key)
+
+    def _lookup(self, key: Hashable, allow_stale: bool, version: Optional[int]) -> Tuple[Optional[Any], bool]:
+        """
+        查找条目并更新命中统计，需持有锁
+
+        Args:
+            key: 缓存键
+            allow_stale: 是否返回已过期但仍在保留时间内的旧值
+            version: 键的当前共享版本号，与条目加载时的版本号不同时丢弃条目
+
+        Returns:
+            (缓存值, 是否未过期)，未命中时缓存值为None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None, False
+        value, expires_at, entry_version = entry
+        if entry_version != version:
+            # 其他进程已使该键失效
+            del self._entries[key]
+            self.remote_invalidations += 1
+            self.misses += 1
+            return None, False
+        now = time.monotonic()
+        if expires_at <= now:
+            if expires_at + self.stale_seconds <= now:
+                del self._entries[key]
+                self.expirations += 1
+            elif allow_stale:
+                self.stale_hits += 1
+                return value, False
+            self.misses += 1
+            return None, False
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value, True
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存值，未命中或已过期时返回None
+        """
+        version = self._version(key)
+        with self._lock:
+            return self._lookup(key, allow_stale=False, version=version)[0]
+
+    def _store(self, key: Hashable, value: Any, ttl_seconds: Optional[float], version: Optional[int]) -> None:
+        """
+        写入条目，超出容量时淘汰最久未使用的条目，需持有锁
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (value, time.monotonic() + ttl, version)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """
+        写入缓存，超出容量时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl_seconds: 该条目的存活时间(秒)，默认使用缓存的TTL
+        """
+        version = self._version(key)
+        with self._lock:
+            self._store(key, value, ttl_seconds, version)
+
+    def is_fresh(self, key: Hashable) -> bool:
+        """
+        判断条目是否存在且未过期，不计入命中统计，也不改变条目的存活时间
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            条目存在且未过期时返回True
+        """
+        version = self._version(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[1] > time.monotonic() and entry[2] == version
+
+    def touch(self, key: Hashable, ttl_seconds: Optional[float] = None) -> bool:
+        """
+        为未过期的条目续期，不计入命中统计
+
+        Args:
+            key: 缓存键
+            ttl_seconds: 从现在起的存活时间(秒)，默认使用缓存的TTL
+
+        Returns:
+            条目存在、未过期且未被失效时续期并返回True
+        """
+        version = self._version(key)
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is None or entry[1] <= now or entry[2] != version:
+                return False
+            self._entries[key] = (entry[0], now + ttl, version)
+            return True
+
+    def refresh(self, key: Hashable, loader: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """
+        重新加载并写入缓存，不使用未过期的条目
+
+        与 get_or_load 使用同一套单飞合并：同一个键已有加载在进行时等待其结果；
+        加载期间键被失效时结果不写入缓存。
+
+        Args:
+            key: 缓存键
+            loader: 加载函数，返回值不能为None
+            ttl_seconds: 该条目的存活时间(秒)，默认使用缓存的TTL
+
+        Returns:
+            加载结果
+        """
+        return self._load(key, loader, ttl_seconds=ttl_seconds, force=True)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        读取缓存，未命中时加载并写入
+
+        - 单飞合并：同一个键同时只有一次加载，并发的相同请求等待并共享结果
+        - 过期后重新验证期间返回旧值：条目过期但仍在 stale_seconds 内时立即返回旧值，
+          并在后台线程中刷新一次
+
+        后台刷新在其他线程中调用 loader，loader 不能依赖请求范围内的资源(例如请求的数据库会话)。
+
+        Args:
+            key: 缓存键
+            loader: 加载函数，返回值不能为None
+
+        Returns:
+            缓存值或加载结果
+        """
+        version = self._version(key)
+        with self._lock:
+            value, fresh = self._lookup(key, allow_stale=True, version=version)
+        if value is None:
+            return self._load(key, loader)
+        if not fresh:
+            self._refresh_in_background(key, loader)
+        return value
+
+    def _load(
+        self, key: Hashable, loader: Callable[[], Any], ttl_seconds: Optional[float] = None, force: bool = False
+    ) -> Any:
+        """
+        加载并写入缓存，同一个键已有加载在进行时等待其结果，force 为 True 时不使用未过期的条目
+
+        条目记录加载前读到的共享版本号，加载期间其他进程使该键失效时，下次读取会丢弃该条目。
+        """
+        version = self._version(key)
+        with self._lock:
+            # 等待锁期间其他请求可能已完成加载
+            entry = self._entries.get(key)
+            if not force and entry is not None and entry[1] > time.monotonic() and entry[2] == version:
+                return entry[0]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                # 失效后该键可能已有新的加载，只移除自己的记录
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                if flight.error is None and not flight.invalidated:
+                    self._store(key, flight.result, ttl_seconds, version)
+            flight.done.set()
+        return flight.result
+
+    def _refresh_in_background(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """
+        在后台线程中刷新过期条目，同一个键已有加载在进行时不重复提交
+        """
+        with self._lock:
+            if key in self._flights:
+                return
+            self.refreshes += 1
+        _refresh_executor.submit(self._refresh, key, loader)
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Any]) -> None:
+        """
+        后台刷新任务，刷新失败时保留旧值直到超过保留时间
+        """
+        try:
+            self._load(key, loader)
+        except Exception:
+            pass
+
+    def invalidate(self, keys: Iterable[Hashable]) -> int:
+        """
+        使指定的缓存键失效，正在进行的加载结果也不再写入缓存，之后的请求不会再合并到该次加载
+
+        配置了 versions 时同时增加这些键的共享版本号，使其他进程中的条目失效。
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            本进程实际删除的条目数
+        """
+        keys = list(keys)
+        removed = 0
+        with self._lock:
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    removed += 1
+                # 正在进行的加载可能读到失效前的数据，之后的请求不再等待它，而是重新加载
+                flight = self._flights.pop(key, None)
+                if flight is not None:
+                    flight.invalidated = True
+            self.invalidations += removed
+        if self.versions is not None:
+            self.versions.bump(keys)
+        return removed
+
+    def clear(self) -> None:
+        """清空本进程的缓存，不影响其他进程"""
+        with self._lock:
+            self._entries.clear()
+            for flight in self._flights.values():
+                flight.invalidated = True
+            self._flights.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计
+
+        Returns:
+            命中、旧值命中、未命中、合并等待、后台刷新、淘汰、过期、失效(本进程和其他进程)次数以及当前容量
+        """
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "stale_seconds": self.stale_seconds,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "in_flight": len(self._flights),
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "remote_invalidations": self.remote_invalidations,
+                "shared_invalidation": self.versions is not None,
+                "version_errors": self.versions.errors if self.versions is not None else 0,
+            }
+
+
+def cached(cache: TTLCache, key: Callable[..., Hashable]) -> Callable[[F], F]:
+    """
+    用 TTLCache.get_or_load 缓存函数结果的装饰器，带单飞合并和过期后返回旧值并后台刷新
+
+    被装饰的函数可能在后台线程中被再次调用，只能依赖自己的参数，需要数据库时自行打开会话。
+
+    Args:
+        cache: 使用的缓存
+        key: 根据函数参数生成缓存键的函数，参数与被装饰的函数相同
+
+    Returns:
+        装饰器
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return cache.get_or_load(key(*args, **kwargs), lambda: func(*args, **kwargs))
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
@@ -0,0 +1,103 @@
+import re
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.engine import Connection
+
+# 可以执行 EXPLAIN 的语句，INSERT 没有查询计划
+EXPLAINABLE_PREFIXES = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+# SQLite 执行计划中的全表扫描和临时自动索引(同样需要读取整张表)
+_SQLITE_SCAN = re.compile(r"^SCAN (\w+)")
+_SQLITE_AUTOMATIC_INDEX = re.compile(r"^SEARCH (\w+) USING AUTOMATIC")
+# SQLAlchemy 自动生成的表别名，例如 submissions_1
+_ALIAS_SUFFIX = re.compile(r"_\d+$")
+
+# MySQL EXPLAIN 的 type 列：ALL 为全表扫描，index 为全索引扫描
+_MYSQL_FULL_SCAN_TYPES = ("ALL", "index")
+
+
+def is_explainable(statement: str) -> bool:
+    """
+    判断语句是否有查询计划
+
+    Args:
+        statement: SQL语句
+
+    Returns:
+        SELECT、WITH、UPDATE、DELETE 语句返回True
+    """
+    return statement.lstrip().upper().startswith(EXPLAINABLE_PREFIXES)
+
+
+def _table_name(name: str, tables: Optional[set]) -> str:
+    """
+    把执行计划中的别名还原为表名，无法还原时原样返回
+    """
+    if tables is None or name in tables:
+        return name
+    base = _ALIAS_SUFFIX.sub("", name)
+    return base if base in tables else name
+
+
+def explain(
+    connection: Connection,
+    statement: str,
+    parameters: Any = None,
+    tables: Optional[set] = None,
+) -> List[Dict[str, Any]]:
+    """
+    获取语句的执行计划，支持 SQLite(EXPLAIN QUERY PLAN) 和 MySQL(EXPLAIN)
+
+    Args:
+        connection: 数据库连接
+        statement: 驱动层的SQL语句(已编译，带占位符)
+        parameters: 驱动层的参数，批量执行(executemany)时取第一组
+        tables: 数据表名集合，用于把执行计划中的别名还原为表名
+
+    Returns:
+        执行计划的每一步，包含 table(表名或别名，没有时为None)、full_scan(是否全表扫描)、detail(原始说明)
+    """
+    if isinstance(parameters, list):
+        parameters = parameters[0] if parameters else None
+    dialect = connection.dialect.name
+
+    if dialect == "sqlite":
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).all()
+        steps = []
+        for row in rows:
+            detail = row[-1]
+            match = _SQLITE_SCAN.match(detail) or _SQLITE_AUTOMATIC_INDEX.match(detail)
+            steps.append({
+                "table": _table_name(match.group(1), tables) if match else None,
+                "full_scan": match is not None,
+                "detail": detail,
+            })
+        return steps
+
+    if dialect == "mysql":
+        result = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+        steps = []
+        for row in result.mappings():
+            table = row.get("table")
+            steps.append({
+                "table": _table_name(table, tables) if table else None,
+                "full_scan": row.get("type") in _MYSQL_FULL_SCAN_TYPES,
+                "detail": f"{row.get('type')} {table} key={row.get('key')} rows={row.get('rows')}",
+            })
+        return steps
+
+    raise ValueError(f"不支持的数据库: {dialect}")
+
+
+def full_scans(steps: List[Dict[str, Any]], tables: set) -> List[str]:
+    """
+    找出执行计划中对指定数据表的全表扫描
+
+    Args:
+        steps: explain 返回的执行计划
+        tables: 需要检查的数据表名集合，子查询、临时表等不在其中的名称会被忽略
+
+    Returns:
+        被全表扫描的表名列表
+    """
+    return [step["table"] for step in steps if step["full_scan"] and step["table"] in tables]
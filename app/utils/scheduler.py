@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，gunicorn 也不支持 Windows，只会有一个进程
+    fcntl = None
+
+
+class JobMetrics:
+    """
+    线程安全的任务计时统计，按任务名称记录运行次数、耗时、失败次数和任务自定义计数
+    """
+
+    def __init__(self) -> None:
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        name: str,
+        seconds: float,
+        counts: Optional[Dict[str, int]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        记录一次任务运行
+
+        Args:
+            name: 任务名称
+            seconds: 运行耗时(秒)
+            counts: 本次运行的计数(例如计算和跳过的数量)，累加到任务统计中
+            error: 运行失败时的错误信息
+        """
+        with self._lock:
+            job = self._jobs.setdefault(name, {
+                "runs": 0,
+                "failures": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "last_ms": 0.0,
+                "last_run_at": None,
+                "last_error": None,
+                "last_counts": {},
+                "counts": {},
+            })
+            elapsed_ms = seconds * 1000
+            job["runs"] += 1
+            job["total_ms"] += elapsed_ms
+            job["max_ms"] = max(job["max_ms"], elapsed_ms)
+            job["last_ms"] = elapsed_ms
+            job["last_run_at"] = datetime.utcnow().isoformat()
+            job["last_counts"] = dict(counts or {})
+            for key, value in (counts or {}).items():
+                job["counts"][key] = job["counts"].get(key, 0) + value
+            if error is not None:
+                job["failures"] += 1
+                job["last_error"] = error
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取全部任务的统计
+
+        Returns:
+            以任务名称为键的统计，包含平均耗时
+        """
+        with self._lock:
+            return {
+                name: {
+                    **job,
+                    "last_counts": dict(job["last_counts"]),
+                    "counts": dict(job["counts"]),
+                    "average_ms": job["total_ms"] / job["runs"] if job["runs"] else 0,
+                }
+                for name, job in self._jobs.items()
+            }
+
+
+class FileLock:
+    """
+    基于文件锁(flock)的进程锁，同一台主机上只有一个进程能持有
+
+    锁一直持有到调用 release 或进程退出，进程异常退出时操作系统自动释放，
+    其他进程下次尝试时即可获得。
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Args:
+            path: 锁文件路径
+        """
+        self.path = path
+        self._file: Optional[Any] = None
+
+    def acquire(self) -> bool:
+        """
+        尝试获得锁，不等待
+
+        Returns:
+            本进程持有锁时返回 True
+        """
+        if self._file is not None or fcntl is None:
+            return True
+        lock_file = open(self.path, "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def release(self) -> None:
+        """释放锁"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class RedisLock:
+    """
+    基于 Redis 的租约锁，多台主机上的进程中只有一个能持有
+
+    持有者每次调用 acquire 时续期，持有者退出后租约最多 ttl_seconds 秒后过期，
+    其他进程下次尝试时即可获得。Redis 不可用时视为未获得锁。
+    """
+
+    def __init__(self, url: str, name: str, ttl_seconds: float) -> None:
+        """
+        Args:
+            url: Redis 连接字符串
+            name: 锁的键名
+            ttl_seconds: 租约时长(秒)，需大于两次 acquire 的间隔
+        """
+        # 只有配置了 Redis 时才需要 redis
+        import redis
+
+        self._client = redis.Redis.from_url(url)
+        self._errors_type = redis.RedisError
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self._token = f"{os.getpid()}:{uuid.uuid4().hex}"
+        self.errors = 0
+
+    def acquire(self) -> bool:
+        """
+        尝试获得或续期租约，不等待
+
+        Returns:
+            本进程持有租约时返回 True
+        """
+        ttl_ms = int(self.ttl_seconds * 1000)
+        try:
+            if self._client.set(self.name, self._token, nx=True, px=ttl_ms):
+                return True
+            if self._client.get(self.name) == self._token.encode():
+                self._client.pexpire(self.name, ttl_ms)
+                return True
+        except self._errors_type:
+            self.errors += 1
+        return False
+
+    def release(self) -> None:
+        """释放本进程持有的租约"""
+        try:
+            if self._client.get(self.name) == self._token.encode():
+                self._client.delete(self.name)
+        except self._errors_type:
+            self.errors += 1
+
+
+class IntervalScheduler:
+    """
+    进程内的周期调度器，在后台守护线程中按固定间隔运行任务
+
+    间隔从每次运行开始时计算，运行耗时超过间隔时结束后立即开始下一次，
+    同一时刻只有一个任务实例在运行。指定 lock 时每次运行前尝试获得锁，
+    多个进程(gunicorn worker)中只有持有锁的进程运行任务，其他进程跳过，
+    持有锁的进程退出后由其他进程接替。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval_seconds: float,
+        task: Callable[[], None],
+        lock: Optional[Union[FileLock, RedisLock]] = None,
+    ) -> None:
+        """
+        Args:
+            name: 调度器名称，用作线程名
+            interval_seconds: 运行间隔(秒)
+            task: 每次运行的任务，异常会被捕获并记录，不会终止调度
+            lock: 多个进程之间的锁，默认每个进程都运行任务
+        """
+        self.name = name
+        self.interval_seconds = interval_seconds
+        self.task = task
+        self.lock = lock
+        self.holds_lock = lock is None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """
+        启动调度线程并立即运行一次任务，已在运行时不做处理
+        """
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """
+        停止调度线程，等待正在运行的任务结束
+
+        Args:
+            timeout: 最长等待秒数，默认一直等待
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.lock is not None:
+            self.lock.release()
+            self.holds_lock = False
+
+    def _run(self) -> None:
+        while True:
+            started = time.monotonic()
+            try:
+                if self.lock is not None:
+                    self.holds_lock = self.lock.acquire()
+                if self.holds_lock:
+                    self.task()
+                self.last_error = None
+            except Exception as exc:
+                # 单次运行失败不能终止调度线程
+                self.last_error = repr(exc)
+            elapsed = time.monotonic() - started
+            if self._stop.wait(max(self.interval_seconds - elapsed, 0)):
+                return
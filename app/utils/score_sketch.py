@@ -0,0 +1,104 @@
+import math
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+# 草图分箱数：把 [0, 总分] 等分为 1000 个区间，分位数误差不超过一个分箱宽度(总分的 0.1%)
+SKETCH_BINS = 1000
+
+# 统计接口返回的分位数
+PERCENTILES: Sequence[Tuple[str, float]] = (
+    ("p10", 0.10),
+    ("p25", 0.25),
+    ("p50", 0.50),
+    ("p75", 0.75),
+    ("p90", 0.90),
+)
+
+
+def sketch_bin(score: float, total_points: float) -> int:
+    """
+    计算分数在草图中的分箱下标
+
+    分箱按占总分的比例划分，不同总分的作业可以直接合并。
+
+    Args:
+        score: 分数
+        total_points: 作业总分
+
+    Returns:
+        分箱下标，范围 0 ~ SKETCH_BINS - 1
+    """
+    if total_points <= 0:
+        return SKETCH_BINS - 1
+    index = int(score * SKETCH_BINS // total_points)
+    return min(max(index, 0), SKETCH_BINS - 1)
+
+
+def _bin_value(index: int, scale: float) -> float:
+    """
+    分箱的代表值
+
+    取分箱下界，按 0.1% 总分取整的分数可以精确还原；满分被 sketch_bin 归入最后一个分箱，
+    最后一个分箱取满刻度。
+
+    Args:
+        index: 分箱下标
+        scale: 草图满刻度对应的值
+
+    Returns:
+        分箱代表的分数
+    """
+    if index >= SKETCH_BINS - 1:
+        return scale
+    return index / SKETCH_BINS * scale
+
+
+def sketch_quantiles(
+    bins: Iterable[Tuple[int, int]],
+    scale: float,
+    lower: Optional[float] = None,
+    upper: Optional[float] = None,
+) -> Dict[str, float]:
+    """
+    根据草图估算分位数
+
+    与 numpy.percentile 的默认(linear)方法一致：把分数排序后取第 q * (n - 1) 位，
+    在相邻的两个分数之间线性插值，草图中每个分数用所在分箱的代表值近似。
+    分箱计数可以直接相加，因此课程的草图由作业草图合并而来，无需重新扫描批改记录。
+
+    Args:
+        bins: (分箱下标, 计数) 列表
+        scale: 草图满刻度对应的值，作业为总分，课程为 100(百分比)
+        lower: 已知的最小值，用于截断插值结果
+        upper: 已知的最大值，用于截断插值结果
+
+    Returns:
+        以 PERCENTILES 名称为键的分位数，草图为空时全部为0
+    """
+    bins = sorted((index, count) for index, count in bins if count > 0)
+    total = sum(count for _, count in bins)
+    if not total:
+        return {name: 0 for name, _ in PERCENTILES}
+
+    def value_at(position: int) -> float:
+        # 排序后第 position 个分数(从0开始)的近似值，截断到已知的最小值和最大值之间
+        cumulative = 0
+        for index, count in bins:
+            cumulative += count
+            if position < cumulative:
+                break
+        value = _bin_value(index, scale)
+        if lower is not None:
+            value = max(value, lower)
+        if upper is not None:
+            value = min(value, upper)
+        return value
+
+    quantiles = {}
+    for name, quantile in PERCENTILES:
+        rank = quantile * (total - 1)
+        below = math.floor(rank)
+        value = value_at(below)
+        if rank > below:
+            value += (value_at(below + 1) - value) * (rank - below)
+        quantiles[name] = value
+    return quantiles
@@ -0,0 +1,224 @@
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.utils.scheduler import JobMetrics
+
+logger = logging.getLogger(__name__)
+
+# 按路由汇总的请求统计：请求数、耗时，以及语句数、数据库耗时、N+1 和慢请求次数
+request_metrics = JobMetrics()
+
+# IN 列表的占位符个数随参数变化，归一化为一个占位符，例如 IN (?, ?, ?) -> IN (?)
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_IN_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """
+    获取语句的形态：参数不同但结构相同的语句形态相同
+
+    Args:
+        statement: 驱动层的SQL语句(参数为占位符)
+
+    Returns:
+        合并空白并归一化 IN 列表后的语句
+    """
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+class RequestQueryStats:
+    """
+    一个请求执行的SQL语句统计
+    """
+
+    def __init__(self) -> None:
+        self.statements = 0
+        self.db_seconds = 0.0
+        # 按原始语句计数，请求结束时才归一化为语句形态，减少每条语句的开销
+        self.counts: Counter = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        self.counts[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Dict[str, Any]]:
+        """
+        找出重复执行次数达到阈值的语句形态(通常是循环中逐条查询，即 N+1 查询)
+
+        Args:
+            threshold: 重复次数阈值
+
+        Returns:
+            按次数从多到少排列的语句形态和次数
+        """
+        if self.statements < threshold:
+            return []
+        shapes: Counter = Counter()
+        for statement, count in self.counts.items():
+            shapes[statement_shape(statement)] += count
+        return [
+            {"statement": shape, "count": count}
+            for shape, count in shapes.most_common()
+            if count >= threshold
+        ]
+
+
+# 当前请求的统计，请求之外(后台任务、脚本)为 None，不做任何记录
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_stats.get() is not None and context is not None:
+        context._instrumentation_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current_stats.get()
+    started = getattr(context, "_instrumentation_started", None)
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _server_timing(stats: RequestQueryStats, elapsed: float, repeated: List[Dict[str, Any]]) -> str:
+    """
+    生成 Server-Timing 响应头，浏览器开发者工具的网络面板会显示各项耗时
+    """
+    metrics = [
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.statements} queries"',
+        f"app;dur={elapsed * 1000:.2f}",
+    ]
+    if repeated:
+        metrics.append(f'nplusone;desc="{len(repeated)} repeated statements"')
+    return ", ".join(metrics)
+
+
+class SQLInstrumentationMiddleware:
+    """
+    统计每个请求执行的SQL语句数和数据库耗时
+
+    - 通过 Server-Timing 响应头返回数据库耗时、语句数和总耗时
+    - 同一形态的语句重复执行 SQL_N_PLUS_ONE_THRESHOLD 次以上时标记为 N+1 查询
+    - 慢请求和 N+1 请求按 SLOW_REQUEST_LOG_SAMPLE_RATE 采样，以JSON格式写入日志
+    - 按路由汇总到 request_metrics
+
+    流式响应在响应头发送之后执行的查询只计入日志和汇总，不计入 Server-Timing。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._route_paths: Dict[Any, str] = {}
+
+    def _route_name(self, scope: Scope) -> str:
+        """
+        获取请求匹配的路由路径，例如 /api/v1/courses/{course_id}，按路由而不是具体ID汇总
+        """
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._route_paths:
+            for route in getattr(scope.get("app"), "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._route_paths[endpoint] = route.path
+                    break
+            else:
+                self._route_paths[endpoint] = getattr(endpoint, "__name__", str(endpoint))
+        return self._route_paths[endpoint]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", _server_timing(stats, time.perf_counter() - started, repeated))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._finish(scope, status_code, stats, time.perf_counter() - started)
+
+    def _finish(self, scope: Scope, status_code: int, stats: RequestQueryStats, elapsed: float) -> None:
+        """
+        请求结束后汇总统计，并按采样率记录慢请求和 N+1 请求
+        """
+        repeated = stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD)
+        slow = elapsed * 1000 >= settings.SLOW_REQUEST_MS
+        route = self._route_name(scope)
+        request_metrics.record(
+            f"{scope['method']} {route}",
+            elapsed,
+            counts={
+                "statements": stats.statements,
+                "db_ms": round(stats.db_seconds * 1000),
+                "n_plus_one": int(bool(repeated)),
+                "slow": int(slow),
+            },
+            error=f"HTTP {status_code}" if status_code >= 500 else None,
+        )
+
+        if not (slow or repeated) or random.random() >= settings.SLOW_REQUEST_LOG_SAMPLE_RATE:
+            return
+        logger.warning(json.dumps({
+            "event": "slow_request" if slow else "n_plus_one",
+            "time": datetime.utcnow().isoformat(),
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": route,
+            "status": status_code,
+            "duration_ms": round(elapsed * 1000, 2),
+            "db_ms": round(stats.db_seconds * 1000, 2),
+            "statements": stats.statements,
+            "repeated_statements": [
+                {"statement": item["statement"][:500], "count": item["count"]}
+                for item in repeated[:5]
+            ],
+        }, ensure_ascii=False))
+
+
+def get_request_metrics() -> Dict[str, Any]:
+    """
+    获取按路由汇总的请求统计
+
+    Returns:
+        以 "方法 路由" 为键的统计，包含平均语句数和平均数据库耗时
+    """
+    routes = request_metrics.stats()
+    for job in routes.values():
+        runs = job["runs"] or 1
+        job["average_statements"] = job["counts"].get("statements", 0) / runs
+        job["average_db_ms"] = job["counts"].get("db_ms", 0) / runs
+    return {
+        "enabled": settings.SQL_INSTRUMENTATION_ENABLED,
+        "slow_request_ms": settings.SLOW_REQUEST_MS,
+        "n_plus_one_threshold": settings.SQL_N_PLUS_ONE_THRESHOLD,
+        "routes": routes,
+    }
@@ -0,0 +1,879 @@
+#!/usr/bin/env python3
+"""
+性能基准测试脚本
+在临时SQLite数据库中生成数据，测量关键接口随数据量增长的耗时
+
+用法:
+    python benchmark.py                  # 交互式选择
+    python benchmark.py assignment_stats # 直接运行指定基准
+"""
+
+import atexit
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# 使用独立的临时数据库，避免影响开发数据
+BENCHMARK_DIR = tempfile.mkdtemp(prefix="homework_benchmark_")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(BENCHMARK_DIR, 'benchmark.db')}"
+atexit.register(shutil.rmtree, BENCHMARK_DIR, True)
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from sqlmodel import Session, SQLModel
+
+import app.db.base  # noqa: F401  注册全部模型
+from app.db.session import engine
+from app.models.assignment import Assignment
+from app.models.class_model import Class, ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.submission import Submission
+from app.models.user import User, UserRole
+from app.services.statistics_service import rebuild_statistics, statistics_cache
+
+# 基准测试不需要打印SQL
+engine.echo = False
+
+
+def reset_database() -> None:
+    """清空并重建基准测试数据库"""
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+
+
+def create_course_with_students(db: Session, students_count: int) -> Dict[str, object]:
+    """
+    创建教师、班级、课程和指定数量的学生
+
+    Args:
+        db: 数据库会话
+        students_count: 学生数量
+
+    Returns:
+        包含 teacher、class_、course 和 students 的字典
+    """
+    teacher = User(
+        username="bench_teacher",
+        email="bench_teacher@example.com",
+        hashed_password="x",
+        role=UserRole.TEACHER,
+    )
+    db.add(teacher)
+    db.commit()
+    db.refresh(teacher)
+
+    class_ = Class(name="bench_class", created_by=teacher.id)
+    db.add(class_)
+    db.commit()
+    db.refresh(class_)
+
+    course = Course(name="bench_course", class_id=class_.id, teacher_id=teacher.id)
+    db.add(course)
+    db.commit()
+    db.refresh(course)
+
+    students = [
+        User(
+            username=f"bench_student_{index}",
+            email=f"bench_student_{index}@example.com",
+            hashed_password="x",
+        )
+        for index in range(students_count)
+    ]
+    db.add_all(students)
+    db.commit()
+
+    db.add(ClassMember(class_id=class_.id, user_id=teacher.id, role="teacher"))
+    db.add_all([ClassMember(class_id=class_.id, user_id=s.id) for s in students])
+    db.commit()
+
+    return {"teacher": teacher, "class_": class_, "course": course, "students": students}
+
+
+def create_graded_assignment(
+    db: Session, course: Course, teacher: User, students: List[User], total_points: int = 100
+) -> Assignment:
+    """
+    创建一个作业，并为每个学生生成提交和批改记录
+
+    Args:
+        db: 数据库会话
+        course: 所属课程
+        teacher: 批改教师
+        students: 学生列表
+        total_points: 作业总分
+
+    Returns:
+        创建的作业
+    """
+    assignment = Assignment(
+        title="bench_assignment",
+        course_id=course.id,
+        due_date=datetime.utcnow() + timedelta(days=7),
+        total_points=total_points,
+    )
+    db.add(assignment)
+    db.commit()
+    db.refresh(assignment)
+
+    submissions = [
+        Submission(assignment_id=assignment.id, student_id=s.id, file_url="/uploads/bench")
+        for s in students
+    ]
+    db.add_all(submissions)
+    db.commit()
+
+    db.add_all([
+        Grading(
+            submission_id=submission.id,
+            score=round(random.uniform(0, total_points), 1),
+            teacher_id=teacher.id,
+        )
+        for submission in submissions
+    ])
+    db.commit()
+    return assignment
+
+
+def measure(func: Callable[[], object], repeat: int = 20) -> float:
+    """
+    多次执行函数并返回单次平均耗时(毫秒)
+
+    Args:
+        func: 被测函数
+        repeat: 执行次数
+
+    Returns:
+        平均耗时(毫秒)
+    """
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def benchmark_assignment_stats() -> None:
+    """作业统计接口耗时随提交数量的变化"""
+    from app.api.v1.endpoints.statistics import get_assignment_statistics
+
+    print(f"{'提交数':>8} | {'平均耗时(ms)':>12} | {'缓存命中(ms)':>12}")
+    for submissions_count in [100, 1000, 5000, 20000]:
+        reset_database()
+        with Session(engine) as db:
+            data = create_course_with_students(db, submissions_count)
+            assignment = create_graded_assignment(
+                db, data["course"], data["teacher"], data["students"]
+            )
+            rebuild_statistics(db)
+            # 测量未命中缓存时的计算耗时
+            elapsed = measure(
+                lambda: (
+                    statistics_cache.clear(),
+                    get_assignment_statistics(
+                        assignment_id=assignment.id, db=db, current_user=data["teacher"]
+                    ),
+                )
+            )
+            cached_elapsed = measure(
+                lambda: get_assignment_statistics(
+                    assignment_id=assignment.id, db=db, current_user=data["teacher"]
+                )
+            )
+        print(f"{submissions_count:>8} | {elapsed:>12.2f} | {cached_elapsed:>12.3f}")
+
+
+def python_class_report(rows: List[tuple]) -> Dict[int, Dict[str, Any]]:
+    """
+    逐条遍历批改记录计算学生加权平均得分率和平均标准分，作为向量化实现的对照
+
+    Args:
+        rows: (作业ID, 学生ID, 作业总分, 分数) 列表
+
+    Returns:
+        与 weighted_averages 结构相同的结果
+    """
+    by_assignment: Dict[int, List[float]] = {}
+    for assignment_id, _, _, score in rows:
+        by_assignment.setdefault(assignment_id, []).append(score)
+    moments = {}
+    for assignment_id, scores in by_assignment.items():
+        mean = sum(scores) / len(scores)
+        std = math.sqrt(sum((score - mean) ** 2 for score in scores) / len(scores))
+        moments[assignment_id] = (mean, std)
+
+    students: Dict[int, Dict[str, Any]] = {}
+    for assignment_id, student_id, total_points, score in rows:
+        mean, std = moments[assignment_id]
+        entry = students.setdefault(student_id, {"count": 0, "points": 0.0, "total": 0.0, "z": 0.0})
+        entry["count"] += 1
+        entry["points"] += score
+        entry["total"] += total_points
+        entry["z"] += (score - mean) / std if std > 0 else 0.0
+
+    return {
+        student_id: {
+            "graded_assignments": entry["count"],
+            "weighted_average": entry["points"] / entry["total"] * 100 if entry["total"] else 0.0,
+            "average_z_score": entry["z"] / entry["count"],
+        }
+        for student_id, entry in students.items()
+    }
+
+
+def benchmark_class_report() -> None:
+    """班级成绩分析：NumPy 向量化与逐条遍历的耗时对比"""
+    from app.services.analytics_service import load_class_scores, weighted_averages
+
+    students_count = 500
+    print(
+        f"{'批改数':>8} | {'查询(ms)':>10} | {'逐条遍历(ms)':>12} | "
+        f"{'NumPy(ms)':>10} | {'加速比':>6}"
+    )
+    for assignments_count in [2, 20, 100]:
+        reset_database()
+        with Session(engine) as db:
+            data = create_course_with_students(db, students_count)
+            for index in range(assignments_count):
+                create_graded_assignment(
+                    db, data["course"], data["teacher"], data["students"],
+                    total_points=[100, 50, 20][index % 3],
+                )
+            class_id = data["class_"].id
+            columns = load_class_scores(db, class_id)
+            rows = list(zip(
+                columns.assignment_ids.tolist(),
+                columns.student_ids.tolist(),
+                columns.total_points.tolist(),
+                columns.scores.tolist(),
+            ))
+
+            # 两种实现的结果必须一致
+            expected = python_class_report(rows)
+            actual = weighted_averages(columns)
+            assert expected.keys() == actual.keys()
+            for student_id, values in expected.items():
+                for key, value in values.items():
+                    assert math.isclose(value, actual[student_id][key], rel_tol=1e-9, abs_tol=1e-9)
+
+            # 查询耗时两种实现相同，单独统计
+            query_elapsed = measure(lambda: load_class_scores(db, class_id), repeat=5)
+            python_elapsed = measure(lambda: python_class_report(rows), repeat=5)
+            numpy_elapsed = measure(lambda: weighted_averages(columns), repeat=5)
+        print(
+            f"{students_count * assignments_count:>8} | {query_elapsed:>10.2f} | "
+            f"{python_elapsed:>12.2f} | {numpy_elapsed:>10.2f} | "
+            f"{python_elapsed / numpy_elapsed:>6.1f}"
+        )
+
+
+def benchmark_gradebook() -> None:
+    """课程成绩册：一次查询生成矩阵与逐个学生请求用户统计的耗时和响应体积对比"""
+    from app.api.v1.endpoints.statistics import (
+        get_course_gradebook_statistics,
+        get_user_statistics,
+    )
+
+    students_count = 500
+    print(
+        f"{'作业数':>6} | {'成绩册(ms)':>10} | {'逐个学生(ms)':>12} | "
+        f"{'对象编码(KB)':>12} | {'紧凑编码(KB)':>12}"
+    )
+    for assignments_count in [10, 40, 80]:
+        reset_database()
+        with Session(engine) as db:
+            data = create_course_with_students(db, students_count)
+            for _ in range(assignments_count):
+                create_graded_assignment(db, data["course"], data["teacher"], data["students"])
+            rebuild_statistics(db)
+            course_id = data["course"].id
+
+            def gradebook(compact: bool = False) -> Any:
+                statistics_cache.clear()
+                return get_course_gradebook_statistics(
+                    course_id=course_id, compact=compact, db=db, current_user=data["teacher"]
+                )
+
+            # 逐个学生请求耗时较长，抽样50个学生后按人数折算
+            sample = data["students"][:50]
+
+            def per_student() -> None:
+                statistics_cache.clear()
+                for student in sample:
+                    get_user_statistics(user_id=student.id, db=db, current_user=data["teacher"])
+
+            gradebook_elapsed = measure(gradebook, repeat=3)
+            per_student_elapsed = measure(per_student, repeat=1) * students_count / len(sample)
+            full_size = len(json.dumps(gradebook(), ensure_ascii=False)) / 1024
+            compact_size = len(json.dumps(gradebook(compact=True), ensure_ascii=False)) / 1024
+        print(
+            f"{assignments_count:>6} | {gradebook_elapsed:>10.2f} | {per_student_elapsed:>12.2f} | "
+            f"{full_size:>12.1f} | {compact_size:>12.1f}"
+        )
+
+
+def benchmark_leaderboard() -> None:
+    """课程排行榜：窗口函数、Python 排名回退与逐个学生请求用户统计的耗时对比"""
+    import app.services.statistics_service as statistics_service
+    from app.api.v1.endpoints.statistics import get_user_statistics
+
+    students_count = 500
+    print(
+        f"{'作业数':>6} | {'窗口函数(ms)':>12} | {'Python排名(ms)':>14} | {'逐个学生(ms)':>12}"
+    )
+    for assignments_count in [10, 40]:
+        reset_database()
+        with Session(engine) as db:
+            data = create_course_with_students(db, students_count)
+            for _ in range(assignments_count):
+                create_graded_assignment(db, data["course"], data["teacher"], data["students"])
+            rebuild_statistics(db)
+            class_id = data["class_"].id
+            course_id = data["course"].id
+
+            def leaderboard() -> Any:
+                return statistics_service.get_leaderboard(db, class_id=class_id, course_id=course_id)
+
+            window_elapsed = measure(leaderboard, repeat=5)
+            expected = leaderboard()
+
+            # 模拟不支持窗口函数的数据库，两种实现的结果必须一致
+            original = statistics_service.supports_window_functions
+            statistics_service.supports_window_functions = lambda db: False
+            try:
+                assert leaderboard() == expected
+                fallback_elapsed = measure(leaderboard, repeat=5)
+            finally:
+                statistics_service.supports_window_functions = original
+
+            # 逐个学生请求耗时较长，抽样50个学生后按人数折算
+            sample = data["students"][:50]
+
+            def per_student() -> None:
+                statistics_cache.clear()
+                for student in sample:
+                    get_user_statistics(user_id=student.id, db=db, current_user=data["teacher"])
+
+            per_student_elapsed = measure(per_student, repeat=1) * students_count / len(sample)
+        print(
+            f"{assignments_count:>6} | {window_elapsed:>12.2f} | {fallback_elapsed:>14.2f} | "
+            f"{per_student_elapsed:>12.2f}"
+        )
+
+
+def benchmark_system_overview() -> None:
+    """管理员系统概览：逐表 COUNT(*) 与读取计数表的耗时对比"""
+    from sqlalchemy import insert
+    from sqlmodel import func, select
+
+    from app.services.statistics_service import (
+        COUNTED_MODELS,
+        get_system_overview,
+        refresh_entity_counters,
+    )
+
+    print(f"{'用户数':>8} | {'COUNT(*)(ms)':>12} | {'计数表(ms)':>10}")
+    for users_count in [1000, 10000, 100000]:
+        reset_database()
+        with Session(engine) as db:
+            # 直接批量插入用户，随后重新计数
+            db.execute(insert(User), [
+                {
+                    "username": f"bench_user_{index}",
+                    "email": f"bench_user_{index}@example.com",
+                    "hashed_password": "x",
+                    "role": UserRole.STUDENT,
+                }
+                for index in range(users_count)
+            ])
+            refresh_entity_counters(db)
+            db.commit()
+
+            def count_tables() -> None:
+                for model in COUNTED_MODELS.values():
+                    db.exec(select(func.count()).select_from(model)).one()
+
+            count_elapsed = measure(count_tables)
+            counter_elapsed = measure(lambda: get_system_overview(db))
+        print(f"{users_count:>8} | {count_elapsed:>12.2f} | {counter_elapsed:>10.2f}")
+
+
+def benchmark_precompute() -> None:
+    """统计面板预计算：冷缓存与预热后的接口耗时，以及增量与全量预计算的耗时"""
+    from app.api.v1.endpoints.statistics import get_class_statistics, get_course_statistics
+    from app.services.precompute_service import run_precompute
+
+    students_count = 500
+    print(
+        f"{'作业数':>6} | {'冷缓存(ms)':>10} | {'预热后(ms)':>10} | "
+        f"{'增量预计算(ms)':>14} | {'全量预计算(ms)':>14}"
+    )
+    for assignments_count in [10, 40]:
+        reset_database()
+        with Session(engine) as db:
+            data = create_course_with_students(db, students_count)
+            for _ in range(assignments_count):
+                create_graded_assignment(db, data["course"], data["teacher"], data["students"])
+            rebuild_statistics(db)
+            course_id = data["course"].id
+            class_id = data["class_"].id
+
+            def dashboards() -> None:
+                get_course_statistics(course_id=course_id, db=db, current_user=data["teacher"])
+                get_class_statistics(class_id=class_id, db=db, current_user=data["teacher"])
+
+            def cold() -> None:
+                statistics_cache.clear()
+                dashboards()
+
+            cold_elapsed = measure(cold, repeat=5)
+            run_precompute(full=True)
+            warm_elapsed = measure(dashboards)
+            # 没有写入时增量预计算只续期快照
+            incremental_elapsed = measure(lambda: run_precompute(full=False), repeat=5)
+            full_elapsed = measure(lambda: run_precompute(full=True), repeat=5)
+        print(
+            f"{assignments_count:>6} | {cold_elapsed:>10.2f} | {warm_elapsed:>10.2f} | "
+            f"{incremental_elapsed:>14.2f} | {full_elapsed:>14.2f}"
+        )
+
+
+def benchmark_single_flight() -> None:
+    """并发读取课程统计：每个请求各自计算与单飞合并的耗时和计算次数对比"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.api.v1.endpoints.statistics import _load_course_statistics
+    from app.db.session import get_session
+    from app.services.statistics_service import get_course_dashboard
+
+    students_count = 500
+    assignments_count = 20
+    reset_database()
+    with Session(engine) as db:
+        data = create_course_with_students(db, students_count)
+        for _ in range(assignments_count):
+            create_graded_assignment(db, data["course"], data["teacher"], data["students"])
+        rebuild_statistics(db)
+        course_id = data["course"].id
+
+    def uncoalesced() -> None:
+        with get_session() as db:
+            get_course_dashboard(db, db.get(Course, course_id))
+
+    print(f"{'并发数':>6} | {'各自计算(ms)':>12} | {'单飞合并(ms)':>12} | {'合并等待次数':>12}")
+    for concurrency in [1, 8, 32]:
+        def run(func: Callable[[], object]) -> None:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(lambda _: func(), range(concurrency)))
+
+        def coalesced() -> None:
+            statistics_cache.clear()
+            run(lambda: _load_course_statistics(course_id))
+
+        uncoalesced_elapsed = measure(lambda: run(uncoalesced), repeat=5)
+        coalesced_before = statistics_cache.coalesced
+        coalesced_elapsed = measure(coalesced, repeat=5)
+        # measure 另外执行一次预热
+        waits = (statistics_cache.coalesced - coalesced_before) / 6
+        print(
+            f"{concurrency:>6} | {uncoalesced_elapsed:>12.2f} | {coalesced_elapsed:>12.2f} | {waits:>12.1f}"
+        )
+
+
+def benchmark_connection_pool() -> None:
+    """每个请求打开会话执行一次查询：不使用连接池(NullPool)与连接池的耗时对比"""
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    from app.db.pool import InstrumentedQueuePool
+
+    reset_database()
+    with Session(engine) as db:
+        data = create_course_with_students(db, 10)
+        user_id = data["students"][0].id
+
+    print(f"{'连接池':>22} | {'并发数':>6} | {'每个请求(ms)':>12}")
+    for pool_class in [NullPool, InstrumentedQueuePool]:
+        pool_engine = create_engine(
+            engine.url,
+            poolclass=pool_class,
+            connect_args={"check_same_thread": False},
+            **({"pool_size": 4, "max_overflow": 4, "pool_pre_ping": True} if pool_class is InstrumentedQueuePool else {}),
+        )
+
+        def request() -> None:
+            with Session(pool_engine) as db:
+                db.get(User, user_id)
+
+        for concurrency in [1, 8]:
+            requests_count = 200
+
+            def run() -> None:
+                with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                    list(pool.map(lambda _: request(), range(requests_count)))
+
+            elapsed = measure(run, repeat=5) / requests_count
+            print(f"{pool_class.__name__:>22} | {concurrency:>6} | {elapsed:>12.3f}")
+        pool_engine.dispose()
+
+
+def benchmark_sqlite_writes() -> None:
+    """并发提交作业的写入吞吐量：默认配置与 SQLite 生产模式(WAL + 单个写连接)对比"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy.exc import OperationalError
+    from sqlmodel import select
+
+    from app.db.session import RoutingSession, create_engines
+
+    writers, readers, submissions_per_writer = 16, 4, 25
+    print(f"{'模式':>10} | {'写入/秒':>8} | {'失败':>6} | {'读取/秒':>8} | {'最慢写入(ms)':>12}")
+    for production_mode in [False, True]:
+        # 两种模式使用各自的数据库文件，WAL 模式会写入数据库文件
+        url = f"sqlite:///{os.path.join(BENCHMARK_DIR, f'writes_{int(production_mode)}.db')}"
+        mode_engine, writer_engine = create_engines(url, sqlite_production_mode=production_mode)
+        SQLModel.metadata.create_all(mode_engine)
+
+        def open_session() -> Session:
+            if writer_engine is None:
+                return Session(mode_engine)
+            return RoutingSession(mode_engine, writer_engine)
+
+        with open_session() as db:
+            data = create_course_with_students(db, writers)
+            assignment = create_graded_assignment(db, data["course"], data["teacher"], data["students"][:1])
+            assignment_id = assignment.id
+            student_ids = [student.id for student in data["students"]]
+            rebuild_statistics(db)
+
+        failures: List[str] = []
+        latencies: List[float] = []
+        reads = 0
+        done = threading.Event()
+
+        def submit(student_id: int) -> None:
+            for index in range(submissions_per_writer):
+                started = time.perf_counter()
+                try:
+                    with open_session() as db:
+                        db.get(Assignment, assignment_id)
+                        db.add(Submission(
+                            assignment_id=assignment_id,
+                            student_id=student_id,
+                            file_url=f"bench/{student_id}/{index}.txt",
+                        ))
+                        db.commit()
+                except OperationalError as error:
+                    failures.append(str(error.orig))
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        def read() -> None:
+            nonlocal reads
+            while not done.is_set():
+                with open_session() as db:
+                    db.exec(select(Submission).where(Submission.assignment_id == assignment_id)).all()
+                reads += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers + readers) as pool:
+            reader_futures = [pool.submit(read) for _ in range(readers)]
+            list(pool.map(submit, student_ids))
+            elapsed = time.perf_counter() - started
+            done.set()
+            for future in reader_futures:
+                future.result()
+
+        mode = "生产模式" if production_mode else "默认"
+        print(
+            f"{mode:>10} | {len(latencies) / elapsed:>8.1f} | {len(failures):>6} | "
+            f"{reads / elapsed:>8.1f} | {max(latencies, default=0):>12.1f}"
+        )
+        for engine_ in (mode_engine, writer_engine):
+            if engine_ is not None:
+                engine_.dispose()
+
+
+def benchmark_async_endpoints() -> None:
+    """200 个并发客户端提交作业：async def 接口中使用同步会话与异步会话的吞吐量和事件循环延迟对比"""
+    import asyncio
+    import io
+    import multiprocessing
+    import socket
+
+    import httpx
+    import uvicorn
+    from fastapi import Depends, FastAPI, File, UploadFile
+    from sqlmodel.ext.asyncio.session import AsyncSession
+
+    from app.api.deps import get_async_db
+    from app.core.config import settings
+    from app.db.session import get_session
+    from app.services.file_service import create_submission_record, save_submission_file, store_submission_file
+
+    settings.LOCAL_STORAGE_PATH = os.path.join(BENCHMARK_DIR, "uploads")
+    reset_database()
+    with Session(engine) as db:
+        data = create_course_with_students(db, 1)
+        assignment = create_graded_assignment(db, data["course"], data["teacher"], [])
+        assignment_id, student_id = assignment.id, data["students"][0].id
+        rebuild_statistics(db)
+
+    bench_app = FastAPI()
+
+    # 改造前的写法：async def 接口中直接调用同步会话，数据库操作阻塞事件循环。
+    # 会话在接口内关闭：依赖注入的同步会话要到响应发送后才归还连接，并发数超过连接池容量时，
+    # 在事件循环中等待连接的请求会阻止其他请求归还连接，直到获取连接超时
+    @bench_app.post("/blocking")
+    async def blocking_submission(file: UploadFile = File(...)) -> int:
+        file_url = store_submission_file(file, assignment_id)
+        with get_session() as db:
+            return create_submission_record(db, assignment_id, student_id, file_url).id
+
+    @bench_app.post("/async")
+    async def async_submission(file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)) -> int:
+        return (await save_submission_file(db, file, assignment_id, student_id)).id
+
+    # 事件循环的响应延迟：阻塞的接口执行期间，其他请求(包括这个空接口)都无法被处理
+    @bench_app.get("/ping")
+    async def ping() -> int:
+        return 1
+
+    # 服务端在独立进程中运行，客户端的耗时才包含服务端事件循环的排队时间
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    def serve() -> None:
+        # 子进程不能复用父进程的数据库连接
+        engine.dispose()
+        uvicorn.run(bench_app, host="127.0.0.1", port=port, log_level="warning")
+
+    clients, requests_per_client = 200, 5
+
+    async def run(path: str) -> Dict[str, float]:
+        latencies: List[float] = []
+        ping_latencies: List[float] = []
+        limits = httpx.Limits(max_connections=clients + 1)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+            async def submit() -> None:
+                for _ in range(requests_per_client):
+                    started = time.perf_counter()
+                    response = await client.post(
+                        path, files={"file": ("bench.txt", io.BytesIO(b"bench"), "text/plain")}
+                    )
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - started) * 1000)
+
+            async def probe() -> None:
+                while len(latencies) < clients * requests_per_client:
+                    started = time.perf_counter()
+                    await client.get("/ping")
+                    ping_latencies.append((time.perf_counter() - started) * 1000)
+                    await asyncio.sleep(0.01)
+
+            started = time.perf_counter()
+            await asyncio.gather(probe(), *[submit() for _ in range(clients)])
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        ping_latencies.sort()
+        return {
+            "throughput": len(latencies) / elapsed,
+            "p50": latencies[len(latencies) // 2],
+            "p99": latencies[int(len(latencies) * 0.99)],
+            "ping_p99": ping_latencies[int(len(ping_latencies) * 0.99)],
+        }
+
+    server = multiprocessing.get_context("fork").Process(target=serve, daemon=True)
+    server.start()
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/ping")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        print(
+            f"{'会话':>8} | {'提交/秒':>8} | {'P50(ms)':>8} | {'P99(ms)':>8} | {'空接口P99(ms)':>13}"
+        )
+        for name, path in [("同步", "/blocking"), ("异步", "/async")]:
+            result = asyncio.run(run(path))
+            print(
+                f"{name:>8} | {result['throughput']:>8.1f} | {result['p50']:>8.1f} | "
+                f"{result['p99']:>8.1f} | {result['ping_p99']:>13.1f}"
+            )
+    finally:
+        server.terminate()
+        server.join()
+
+
+def benchmark_login() -> None:
+    """300 个并发客户端登录：在事件循环中直接计算 bcrypt 与使用有界密码哈希线程池的吞吐量、503 次数和事件循环延迟对比"""
+    import asyncio
+    import multiprocessing
+    import socket
+
+    import httpx
+    import uvicorn
+    from fastapi import Depends, FastAPI
+    from fastapi.security import OAuth2PasswordRequestForm
+
+    from app.api.v1.endpoints import auth
+    from app.core.security import get_password_hash, password_hash_pool
+    from app.services.auth_service import authenticate_user
+
+    users_count = 300
+    reset_database()
+    with Session(engine) as db:
+        # 哈希计算很慢，所有用户共用同一个密码哈希
+        hashed_password = get_password_hash("password")
+        for index in range(users_count):
+            db.add(User(username=f"login{index}", email=f"login{index}@example.com", hashed_password=hashed_password))
+        db.commit()
+
+    bench_app = FastAPI()
+    bench_app.include_router(auth.router, prefix="/pool")
+
+    # 改造前的写法：async def 接口中直接验证密码，bcrypt 计算期间事件循环无法处理其他请求
+    @bench_app.post("/inline/login")
+    async def inline_login(form_data: OAuth2PasswordRequestForm = Depends()) -> int:
+        return authenticate_user(username=form_data.username, password=form_data.password).id
+
+    @bench_app.get("/ping")
+    async def ping() -> int:
+        return 1
+
+    @bench_app.get("/pool-stats")
+    async def pool_stats() -> Dict[str, Any]:
+        return password_hash_pool.stats()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    def serve() -> None:
+        engine.dispose()
+        uvicorn.run(bench_app, host="127.0.0.1", port=port, log_level="warning")
+
+    async def run(path: str) -> Dict[str, float]:
+        latencies: List[float] = []
+        ping_latencies: List[float] = []
+        rejected = 0
+        finished = 0
+        limits = httpx.Limits(max_connections=users_count + 1)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+            async def login(index: int) -> None:
+                nonlocal rejected, finished
+                started = time.perf_counter()
+                response = await client.post(path, data={"username": f"login{index}", "password": "password"})
+                if response.status_code == 503:
+                    rejected += 1
+                else:
+                    response.raise_for_status()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                finished += 1
+
+            async def probe() -> None:
+                while finished < users_count:
+                    started = time.perf_counter()
+                    await client.get("/ping")
+                    ping_latencies.append((time.perf_counter() - started) * 1000)
+                    await asyncio.sleep(0.01)
+
+            started = time.perf_counter()
+            await asyncio.gather(probe(), *[login(index) for index in range(users_count)])
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        ping_latencies.sort()
+        return {
+            "throughput": len(latencies) / elapsed,
+            "rejected": rejected,
+            "p50": latencies[len(latencies) // 2],
+            "p99": latencies[int(len(latencies) * 0.99)],
+            "ping_p99": ping_latencies[int(len(ping_latencies) * 0.99)],
+        }
+
+    server = multiprocessing.get_context("fork").Process(target=serve, daemon=True)
+    server.start()
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"{base_url}/ping")
+                break
+            except httpx.TransportError:
+                time.sleep(0.1)
+
+        print(f"线程池: {password_hash_pool.workers} 个线程，最多排队 {password_hash_pool.queue_size} 个")
+        print(
+            f"{'方式':>8} | {'登录/秒':>8} | {'503':>5} | {'P50(ms)':>8} | {'P99(ms)':>8} | {'空接口P99(ms)':>13}"
+        )
+        for name, path in [("事件循环", "/inline/login"), ("线程池", "/pool/login")]:
+            result = asyncio.run(run(path))
+            print(
+                f"{name:>8} | {result['throughput']:>8.1f} | {result['rejected']:>5} | {result['p50']:>8.1f} | "
+                f"{result['p99']:>8.1f} | {result['ping_p99']:>13.1f}"
+            )
+        print(f"线程池统计: {httpx.get(f'{base_url}/pool-stats').json()}")
+    finally:
+        server.terminate()
+        server.join()
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "assignment_stats": benchmark_assignment_stats,
+    "class_report": benchmark_class_report,
+    "gradebook": benchmark_gradebook,
+    "leaderboard": benchmark_leaderboard,
+    "system_overview": benchmark_system_overview,
+    "precompute": benchmark_precompute,
+    "single_flight": benchmark_single_flight,
+    "connection_pool": benchmark_connection_pool,
+    "sqlite_writes": benchmark_sqlite_writes,
+    "async_endpoints": benchmark_async_endpoints,
+    "login": benchmark_login,
+}
+
+
+def main():
+    """主函数"""
+    if len(sys.argv) > 1:
+        names = sys.argv[1:]
+    else:
+        print("=== 作业管理系统性能基准测试 ===")
+        for index, name in enumerate(BENCHMARKS, start=1):
+            print(f"{index}. {name}: {BENCHMARKS[name].__doc__}")
+        choice = input(f"\n请选择基准 (1-{len(BENCHMARKS)}): ")
+        if not choice.isdigit() or not 1 <= int(choice) <= len(BENCHMARKS):
+            print("无效选择")
+            return
+        names = [list(BENCHMARKS)[int(choice) - 1]]
+
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"未知基准: {name}")
+            continue
+        print(f"\n>>> {name}: {BENCHMARKS[name].__doc__}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+查询计划检查脚本
+在临时SQLite数据库中对接口的常用查询执行 EXPLAIN QUERY PLAN，
+确认每个查询都通过索引查找，而不是全表扫描
+
+用法:
+    python check_query_plans.py          # 检查全部查询，存在全表扫描时返回非零退出码
+    python check_query_plans.py -v       # 同时打印每个查询的执行计划
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# 使用独立的临时数据库，避免影响开发数据
+CHECK_DIR = tempfile.mkdtemp(prefix="homework_query_plans_")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(CHECK_DIR, 'query_plans.db')}"
+atexit.register(shutil.rmtree, CHECK_DIR, True)
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import func
+from sqlmodel import SQLModel, select
+
+import app.db.base  # noqa: F401  注册全部模型
+from app.db.session import engine
+from app.models.assignment import Assignment
+from app.models.class_model import ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.notification import Notification
+from app.models.submission import Submission
+from app.utils.query_plans import explain, full_scans
+
+# 检查脚本不需要打印SQL
+engine.echo = False
+
+# 接口中的常用查询：(说明, 生成查询语句的函数)，参数值不影响执行计划
+HOT_QUERIES: List[Tuple[str, Callable[[], Any]]] = [
+    (
+        "权限检查：用户是否为班级成员",
+        lambda: select(ClassMember).where(ClassMember.class_id == 1, ClassMember.user_id == 1),
+    ),
+    (
+        "用户所在班级",
+        lambda: select(ClassMember).where(ClassMember.user_id == 1),
+    ),
+    (
+        "班级成员列表",
+        lambda: select(ClassMember).where(ClassMember.class_id == 1),
+    ),
+    (
+        "班级学生数",
+        lambda: select(func.count(ClassMember.id)).where(
+            ClassMember.class_id == 1,
+            ClassMember.role == "student",
+        ),
+    ),
+    (
+        "班级的课程",
+        lambda: select(Course).where(Course.class_id == 1),
+    ),
+    (
+        "用户所在班级的课程",
+        lambda: select(Course).where(
+            Course.class_id.in_(select(ClassMember.class_id).where(ClassMember.user_id == 1))
+        ),
+    ),
+    (
+        "教师所教的课程",
+        lambda: select(Course).where(Course.teacher_id == 1),
+    ),
+    (
+        "课程的作业",
+        lambda: select(Assignment).where(Assignment.course_id == 1).order_by(Assignment.id),
+    ),
+    (
+        "课程的作业数",
+        lambda: select(func.count(Assignment.id)).where(Assignment.course_id == 1),
+    ),
+    (
+        "课程最近截止的已批改作业",
+        lambda: select(Assignment.id)
+        .join(Submission, Submission.assignment_id == Assignment.id)
+        .join(Grading, Grading.submission_id == Submission.id)
+        .where(Assignment.course_id == 1)
+        .order_by(Assignment.due_date.desc(), Assignment.id.desc())
+        .limit(1),
+    ),
+    (
+        "作业的提交",
+        lambda: select(Submission).where(Submission.assignment_id == 1),
+    ),
+    (
+        "学生的提交",
+        lambda: select(Submission).where(Submission.student_id == 1),
+    ),
+    (
+        "学生在作业上的提交",
+        lambda: select(Submission).where(Submission.assignment_id == 1, Submission.student_id == 1),
+    ),
+    (
+        "提交的批改",
+        lambda: select(Grading).where(Grading.submission_id == 1),
+    ),
+    (
+        "作业的提交和批改",
+        lambda: select(Submission.id, Grading.score)
+        .join(Grading, Grading.submission_id == Submission.id)
+        .where(Submission.assignment_id == 1),
+    ),
+    (
+        "通知列表",
+        lambda: select(Notification)
+        .where(Notification.user_id == 1)
+        .order_by(Notification.created_at.desc())
+        .offset(0)
+        .limit(100),
+    ),
+    (
+        "按已读状态筛选通知",
+        lambda: select(Notification)
+        .where(Notification.user_id == 1, Notification.is_read == False)  # noqa: E712
+        .order_by(Notification.created_at.desc())
+        .offset(0)
+        .limit(100),
+    ),
+]
+
+
+def explain_statement(statement: Any) -> List[Dict[str, Any]]:
+    """
+    获取查询的执行计划
+
+    Args:
+        statement: 查询语句
+
+    Returns:
+        执行计划的每一步
+    """
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    with engine.connect() as connection:
+        return explain(connection, str(compiled), tables=set(SQLModel.metadata.tables))
+
+
+def main() -> int:
+    """主函数"""
+    verbose = "-v" in sys.argv[1:]
+    SQLModel.metadata.create_all(engine)
+
+    failures = 0
+    for description, build in HOT_QUERIES:
+        plan = explain_statement(build())
+        scanned = full_scans(plan, set(SQLModel.metadata.tables))
+        if scanned:
+            failures += 1
+            print(f"❌ {description}: 全表扫描 {', '.join(scanned)}")
+        else:
+            print(f"✅ {description}")
+        if verbose or scanned:
+            for step in plan:
+                print(f"    {step['detail']}")
+
+    print(f"\n{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} 个查询使用索引")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+接口查询回归检查脚本
+在临时SQLite数据库中生成数据，依次请求 app/api/v1/api.py 中的每个路由，记录每个请求执行的SQL语句，
+并对每条语句执行 EXPLAIN：
+
+- 语句数超过路由的预算(通常是循环中逐条查询，即 N+1 查询)时失败
+- 对大表(行数不少于 LARGE_TABLE_ROWS)做全表扫描时失败，路由声明允许的扫描除外
+- 路由没有对应的检查用例时失败，新增路由需要在 ROUTE_CASES 中补充用例和预算
+
+用法:
+    python check_route_queries.py        # 检查全部路由，存在问题时返回非零退出码
+    python check_route_queries.py -v     # 同时打印每个请求的SQL语句和执行计划
+
+设置 SQLALCHEMY_DATABASE_URI 为空的 MySQL 数据库时会在该库中建表和生成数据，执行计划使用 MySQL EXPLAIN。
+"""
+
+import atexit
+import os
+import random
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 使用独立的临时数据库和上传目录，避免影响开发数据
+CHECK_DIR = tempfile.mkdtemp(prefix="homework_route_queries_")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", f"sqlite:///{os.path.join(CHECK_DIR, 'route_queries.db')}")
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(CHECK_DIR, "uploads")
+# 后台预计算会在检查期间执行查询，关闭
+os.environ["STATISTICS_PRECOMPUTE_INTERVAL_SECONDS"] = "0"
+atexit.register(shutil.rmtree, CHECK_DIR, True)
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from fastapi.routing import APIRoute
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func
+from sqlmodel import Session, SQLModel, select
+
+import app.db.base  # noqa: F401  注册全部模型
+from app.api.v1.api import api_router
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.db.async_session import async_engine, async_writer_engine
+from app.db.replicas import replica_router
+from app.db.session import engine, writer_engine
+from app.main import app
+from app.models.assignment import Assignment
+from app.models.class_model import Class, ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.notification import Notification, NotificationType
+from app.models.submission import Submission
+from app.models.user import User, UserRole
+from app.services.statistics_service import rebuild_statistics, statistics_cache
+from app.utils.query_plans import explain, full_scans, is_explainable
+
+# 检查脚本不需要打印SQL
+engine.echo = False
+
+API_PREFIX = f"{settings.API_V1_STR}/v1"
+
+# 行数不少于该值的表视为大表，小表(例如只有几行的班级表)全表扫描不影响性能
+LARGE_TABLE_ROWS = 500
+
+STUDENTS_COUNT = 200
+COURSES_COUNT = 2
+ASSIGNMENTS_PER_COURSE = 6
+NOTIFICATIONS_PER_STUDENT = 5
+
+
+class RouteCase(NamedTuple):
+    """
+    一个路由的检查用例
+    """
+    method: str
+    route: str                          # 路由路径，与 api_router 中的定义一致
+    user: Optional[str]                 # 发起请求的用户(种子数据中的键)，None 表示不登录
+    budget: int                         # 允许执行的SQL语句数
+    url: Optional[str] = None           # 实际请求路径，默认为 route，{名称} 替换为种子数据中的ID
+    json: Optional[Dict[str, Any]] = None
+    data: Optional[Dict[str, Any]] = None
+    files: Optional[Dict[str, Any]] = None
+    params: Optional[Dict[str, Any]] = None
+    allow_scans: Tuple[str, ...] = ()   # 允许全表扫描的表，例如管理员分页浏览全部记录
+    expected_status: int = 200
+
+
+# 检查用例，按顺序执行：先读后写，删除放在最后并使用专门生成的数据
+ROUTE_CASES: List[RouteCase] = [
+    # 认证
+    RouteCase("POST", "/auth/login", None, 1, data={"username": "route_teacher", "password": "route_password"}),
+    RouteCase(
+        "POST", "/auth/register", None, 5,
+        json={"username": "route_registered", "email": "route_registered@example.com", "password": "route_password"},
+    ),
+    # 用户
+    RouteCase("GET", "/users/", "admin", 2, allow_scans=("users",)),
+    RouteCase("GET", "/users/me", "student", 1),
+    RouteCase("GET", "/users/{user_id}", "admin", 2, url="/users/{student}"),
+    RouteCase("PUT", "/users/me", "student", 4, json={"email": "route_student_new@example.com"}),
+    RouteCase("PUT", "/users/{user_id}", "admin", 5, url="/users/{student}", json={"email": "route_student@example.com"}),
+    # 班级
+    RouteCase("POST", "/classes/", "teacher", 9, json={"name": "route_new_class"}),
+    RouteCase("GET", "/classes/", "student", 3),
+    RouteCase("GET", "/classes/{class_id}", "student", 3, url="/classes/{class}"),
+    RouteCase("PUT", "/classes/{class_id}", "teacher", 4, url="/classes/{class}", json={"description": "route"}),
+    RouteCase("GET", "/classes/{class_id}/members", "teacher", 4, url="/classes/{class}/members"),
+    RouteCase(
+        "POST", "/classes/{class_id}/members", "teacher", 12, url="/classes/{class}/members",
+        json={"class_id": 0, "user_id": 0, "role": "student"},
+    ),
+    RouteCase(
+        "POST", "/classes/{class_id}/invite", "teacher", 13, url="/classes/{class}/invite",
+        params={"user_email": "route_invitee@example.com"},
+    ),
+    # 课程
+    RouteCase("POST", "/courses/", "teacher", 7, json={"name": "route_new_course", "class_id": 0}),
+    RouteCase("GET", "/courses/", "student", 3),
+    RouteCase("GET", "/courses/{course_id}", "student", 3, url="/courses/{course}"),
+    RouteCase("PUT", "/courses/{course_id}", "teacher", 5, url="/courses/{course}", json={"description": "route"}),
+    RouteCase("GET", "/courses/class/{class_id}", "student", 4, url="/courses/class/{class}"),
+    # 作业
+    RouteCase("GET", "/assignments/", "student", 4),
+    RouteCase("GET", "/assignments/{assignment_id}", "student", 4, url="/assignments/{assignment}"),
+    RouteCase("GET", "/assignments/course/{course_id}", "student", 4, url="/assignments/course/{course}"),
+    RouteCase(
+        "PUT", "/assignments/{assignment_id}", "teacher", 8, url="/assignments/{assignment}",
+        json={"description": "route"},
+    ),
+    # 提交
+    RouteCase("GET", "/submissions/", "student", 2),
+    RouteCase("GET", "/submissions/{submission_id}", "student", 2, url="/submissions/{submission}"),
+    # 批改
+    RouteCase("GET", "/gradings/{grading_id}", "student", 3, url="/gradings/{grading}"),
+    RouteCase("GET", "/gradings/submission/{submission_id}", "student", 3, url="/gradings/submission/{submission}"),
+    # 分数落入新的草图分箱时在保存点中插入，多出 SAVEPOINT 和 RELEASE 两条语句
+    RouteCase("PUT", "/gradings/{grading_id}", "teacher", 20, url="/gradings/{grading}", json={"score": 88}),
+    # 通知
+    RouteCase("GET", "/notifications/", "student", 2),
+    RouteCase("GET", "/notifications/{notification_id}", "student", 2, url="/notifications/{notification}"),
+    RouteCase("PUT", "/notifications/{notification_id}/read", "student", 4, url="/notifications/{notification}/read"),
+    RouteCase("PUT", "/notifications/read-all", "student", 3),
+    # 统计(每次请求前清空统计缓存，检查的是未命中缓存时的查询)
+    RouteCase("GET", "/statistics/assignments/{assignment_id}", "teacher", 7, url="/statistics/assignments/{assignment}"),
+    RouteCase(
+        "GET", "/statistics/assignments/{assignment_id}/timeline", "teacher", 4,
+        url="/statistics/assignments/{assignment}/timeline",
+    ),
+    RouteCase("GET", "/statistics/courses/{course_id}/timeline", "teacher", 4, url="/statistics/courses/{course}/timeline"),
+    RouteCase("GET", "/statistics/courses/{course_id}", "teacher", 7, url="/statistics/courses/{course}"),
+    RouteCase("GET", "/statistics/courses/{course_id}/gradebook", "teacher", 4, url="/statistics/courses/{course}/gradebook"),
+    RouteCase(
+        "GET", "/statistics/courses/{course_id}/leaderboard", "teacher", 4,
+        url="/statistics/courses/{course}/leaderboard",
+    ),
+    # 学生面板的语句数回归检查：学生所在班级有 COURSES_COUNT × ASSIGNMENTS_PER_COURSE 个作业，
+    # 面板由一次联表查询生成，与课程数和作业数无关；逐个作业查询提交和批改会超出预算
+    RouteCase("GET", "/statistics/users/{user_id}", "student", 3, url="/statistics/users/{student}"),
+    # 已知问题：教师面板按课程逐个统计作业数和学生数，每门课程2条语句
+    RouteCase(
+        "GET", "/statistics/users/{user_id}", "teacher", 5 + 2 * (COURSES_COUNT + 1),
+        url="/statistics/users/{teacher}",
+    ),
+    RouteCase("GET", "/statistics/users/{user_id}", "admin", 2, url="/statistics/users/{admin}"),
+    RouteCase("GET", "/statistics/classes/{class_id}", "teacher", 6, url="/statistics/classes/{class}"),
+    RouteCase("GET", "/statistics/classes/{class_id}/report", "teacher", 6, url="/statistics/classes/{class}/report"),
+    RouteCase(
+        "GET", "/statistics/classes/{class_id}/leaderboard", "teacher", 5,
+        url="/statistics/classes/{class}/leaderboard",
+    ),
+    # 导出
+    RouteCase("GET", "/exports/courses/{course_id}/gradebook", "teacher", 3, url="/exports/courses/{course}/gradebook"),
+    RouteCase("GET", "/exports/classes/{class_id}/gradebook", "teacher", 4, url="/exports/classes/{class}/gradebook"),
+    # 系统
+    RouteCase("GET", "/system/cache", "admin", 1),
+    RouteCase("GET", "/system/precompute", "admin", 1),
+    RouteCase("GET", "/system/pool", "admin", 1),
+    RouteCase("GET", "/system/requests", "admin", 1),
+    RouteCase("GET", "/system/replicas", "admin", 1),
+    # 写入
+    # 已知问题：发布作业时逐个学生创建并提交通知，每个学生2条语句(异步会话提交后不过期对象，不再重新加载)
+    RouteCase(
+        "POST", "/assignments/", "teacher", 12 + 2 * STUDENTS_COUNT,
+        json={"title": "route_new_assignment", "course_id": 0, "due_date": "2026-12-01T00:00:00"},
+    ),
+    RouteCase(
+        "POST", "/assignments/with-attachment", "teacher", 12 + 2 * STUDENTS_COUNT,
+        data={"title": "route_attachment", "course_id": 0, "due_date": "2026-12-01T00:00:00"},
+        files={"attachment": ("route.txt", b"route", "text/plain")},
+    ),
+    RouteCase(
+        "POST", "/submissions/", "student", 8,
+        data={"assignment_id": 0},
+        files={"file": ("route.txt", b"route", "text/plain")},
+    ),
+    RouteCase(
+        "POST", "/gradings/", "teacher", 24,
+        json={"submission_id": 0, "score": 75},
+    ),
+    # 删除
+    RouteCase("DELETE", "/notifications/{notification_id}", "student", 3, url="/notifications/{spare_notification}"),
+    RouteCase("DELETE", "/submissions/{submission_id}", "student", 10, url="/submissions/{spare_submission}"),
+    # 删除作业和课程时同时移除其汇总行和草图，并重新合并课程草图
+    RouteCase("DELETE", "/assignments/{assignment_id}", "teacher", 11, url="/assignments/{spare_assignment}"),
+    RouteCase("DELETE", "/courses/{course_id}", "teacher", 7, url="/courses/{spare_course}"),
+    RouteCase(
+        "DELETE", "/classes/{class_id}/members/{user_id}", "teacher", 6,
+        url="/classes/{class}/members/{spare_member}",
+    ),
+    RouteCase("DELETE", "/classes/{class_id}", "admin", 8, url="/classes/{spare_class}"),
+    # 删除用户时按 teacher_id 加载用户批改过的记录，该列没有索引；删除用户很少发生，允许扫描
+    RouteCase("DELETE", "/users/{user_id}", "admin", 10, url="/users/{spare_user}", allow_scans=("gradings",)),
+]
+
+
+def seed_database() -> Dict[str, int]:
+    """
+    生成检查数据：一个班级、若干课程和作业，大部分学生有提交和批改
+
+    Returns:
+        用例中引用的ID，键为 RouteCase.url 中的名称
+    """
+    from app.core.security import get_password_hash
+
+    rnd = random.Random(17)
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        def add(obj: Any) -> Any:
+            db.add(obj)
+            db.commit()
+            db.refresh(obj)
+            return obj
+
+        teacher = add(User(
+            username="route_teacher",
+            email="route_teacher@example.com",
+            hashed_password=get_password_hash("route_password"),
+            role=UserRole.TEACHER,
+        ))
+        admin = add(User(
+            username="route_admin", email="route_admin@example.com", hashed_password="x", role=UserRole.ADMIN,
+        ))
+        students = [
+            User(username=f"route_student_{index}", email=f"route_student_{index}@example.com", hashed_password="x")
+            for index in range(STUDENTS_COUNT)
+        ]
+        db.add_all(students)
+        db.commit()
+        student = students[0]
+        student.email = "route_student@example.com"
+        add(student)
+        invitee = add(User(username="route_invitee", email="route_invitee@example.com", hashed_password="x"))
+        new_member = add(User(username="route_new_member", email="route_new_member@example.com", hashed_password="x"))
+        spare_user = add(User(username="route_spare", email="route_spare@example.com", hashed_password="x"))
+
+        class_ = add(Class(name="route_class", created_by=teacher.id))
+        spare_class = add(Class(name="route_spare_class", created_by=teacher.id))
+        db.add(ClassMember(class_id=class_.id, user_id=teacher.id, role="teacher"))
+        db.add_all([ClassMember(class_id=class_.id, user_id=s.id) for s in students])
+        db.commit()
+
+        courses = [
+            Course(name=f"route_course_{index}", class_id=class_.id, teacher_id=teacher.id)
+            for index in range(COURSES_COUNT)
+        ]
+        db.add_all(courses)
+        db.commit()
+        spare_course = add(Course(name="route_spare_course", class_id=class_.id, teacher_id=teacher.id))
+
+        assignments = []
+        for course in courses:
+            for index in range(ASSIGNMENTS_PER_COURSE):
+                assignments.append(Assignment(
+                    title=f"route_assignment_{course.id}_{index}",
+                    course_id=course.id,
+                    due_date=now - timedelta(days=ASSIGNMENTS_PER_COURSE - index),
+                ))
+        db.add_all(assignments)
+        db.commit()
+        upcoming = add(Assignment(title="route_upcoming", course_id=courses[0].id, due_date=now + timedelta(days=3)))
+        spare_assignment = add(Assignment(title="route_spare", course_id=courses[0].id, due_date=now))
+
+        submissions = [
+            Submission(
+                assignment_id=assignment.id,
+                student_id=s.id,
+                file_url="route.txt",
+                submission_time=assignment.due_date - timedelta(hours=rnd.uniform(-12, 72)),
+            )
+            for assignment in assignments
+            for s in students
+            if s.id == student.id or rnd.random() < 0.9
+        ]
+        db.add_all(submissions)
+        db.commit()
+        gradings = [
+            Grading(submission_id=submission.id, score=round(rnd.uniform(40, 100), 1), teacher_id=teacher.id)
+            for submission in submissions
+            if submission.student_id == student.id or rnd.random() < 0.8
+        ]
+        db.add_all(gradings)
+        db.commit()
+        ungraded = add(Submission(assignment_id=upcoming.id, student_id=students[1].id, file_url="route.txt"))
+        spare_submission = add(Submission(assignment_id=upcoming.id, student_id=student.id, file_url="route.txt"))
+
+        notifications = [
+            Notification(
+                user_id=s.id,
+                title=f"route_notification_{index}",
+                content="route",
+                type=NotificationType.ASSIGNMENT,
+            )
+            for s in students
+            for index in range(NOTIFICATIONS_PER_STUDENT)
+        ]
+        db.add_all(notifications)
+        db.commit()
+        spare_notification = add(Notification(
+            user_id=student.id, title="route_spare", content="route", type=NotificationType.REMINDER,
+        ))
+
+        rebuild_statistics(db)
+        db.commit()
+
+        graded = db.exec(
+            select(Submission.id, Grading.id)
+            .join(Grading, Grading.submission_id == Submission.id)
+            .where(Submission.student_id == student.id)
+            .order_by(Submission.id)
+        ).first()
+
+        return {
+            "admin": admin.id,
+            "teacher": teacher.id,
+            "student": student.id,
+            "invitee": invitee.id,
+            "new_member": new_member.id,
+            "spare_user": spare_user.id,
+            "spare_member": new_member.id,
+            "class": class_.id,
+            "spare_class": spare_class.id,
+            "course": courses[0].id,
+            "spare_course": spare_course.id,
+            "assignment": assignments[0].id,
+            "upcoming_assignment": upcoming.id,
+            "spare_assignment": spare_assignment.id,
+            "submission": graded[0],
+            "grading": graded[1],
+            "ungraded_submission": ungraded.id,
+            "spare_submission": spare_submission.id,
+            "notification": db.exec(
+                select(Notification.id).where(Notification.user_id == student.id).order_by(Notification.id)
+            ).first(),
+            "spare_notification": spare_notification.id,
+        }
+
+
+def fill_request_ids(case: RouteCase, ids: Dict[str, int]) -> RouteCase:
+    """
+    把请求体中占位的0替换为种子数据中的ID
+    """
+    body_ids = {
+        "/classes/{class_id}/members": {"class_id": ids["class"], "user_id": ids["new_member"]},
+        "/courses/": {"class_id": ids["class"]},
+        "/assignments/": {"course_id": ids["course"]},
+        "/assignments/with-attachment": {"course_id": ids["course"]},
+        "/submissions/": {"assignment_id": ids["upcoming_assignment"]},
+        "/gradings/": {"submission_id": ids["ungraded_submission"]},
+    }
+    replacements = body_ids.get(case.route) if case.method == "POST" else None
+    if not replacements:
+        return case
+    if case.json is not None:
+        return case._replace(json={**case.json, **replacements})
+    return case._replace(data={**case.data, **replacements})
+
+
+def table_row_counts() -> Dict[str, int]:
+    """
+    获取每张表的行数
+    """
+    with Session(engine) as db:
+        return {
+            name: db.exec(select(func.count()).select_from(table)).one()
+            for name, table in SQLModel.metadata.tables.items()
+        }
+
+
+class StatementRecorder:
+    """
+    记录引擎执行的SQL语句
+    """
+
+    def __init__(self) -> None:
+        self.statements: List[Tuple[str, Any]] = []
+        self.enabled = False
+        replica_engines = tuple(replica.engine for replica in replica_router.replicas)
+        for recorded in (engine, writer_engine, async_engine, async_writer_engine) + replica_engines:
+            if recorded is None:
+                continue
+            # 异步引擎的事件注册在对应的同步引擎上
+            event.listen(getattr(recorded, "sync_engine", recorded), "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        # SQLite 生产模式下写事务开始时执行的 BEGIN IMMEDIATE 不计入语句数
+        if self.enabled and statement != "BEGIN IMMEDIATE":
+            self.statements.append((statement, parameters))
+
+    def start(self) -> None:
+        self.statements = []
+        self.enabled = True
+
+    def stop(self) -> List[Tuple[str, Any]]:
+        self.enabled = False
+        return self.statements
+
+
+def uncovered_routes() -> List[str]:
+    """
+    找出没有检查用例的路由
+
+    Returns:
+        "方法 路径" 列表
+    """
+    covered = {(case.method, case.route) for case in ROUTE_CASES}
+    missing = []
+    for route in api_router.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in sorted(route.methods):
+            if (method, route.path) not in covered:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+def check_route(
+    client: TestClient,
+    case: RouteCase,
+    ids: Dict[str, int],
+    recorder: StatementRecorder,
+    large_tables: set,
+    verbose: bool,
+) -> List[str]:
+    """
+    请求一个路由并检查执行的SQL语句
+
+    Returns:
+        发现的问题，没有问题时为空列表
+    """
+    case = fill_request_ids(case, ids)
+    headers = {}
+    if case.user is not None:
+        headers["Authorization"] = f"Bearer {create_access_token(ids[case.user])}"
+    url = API_PREFIX + (case.url or case.route).format(**ids)
+
+    statistics_cache.clear()
+    recorder.start()
+    try:
+        response = client.request(
+            case.method,
+            url,
+            headers=headers,
+            json=case.json,
+            data=case.data,
+            files=case.files,
+            params=case.params,
+        )
+        # 流式响应在读取响应体时才执行查询
+        response.read()
+    finally:
+        statements = recorder.stop()
+
+    problems = []
+    if response.status_code != case.expected_status:
+        problems.append(f"状态码 {response.status_code}，预期 {case.expected_status}: {response.text[:200]}")
+    if len(statements) > case.budget:
+        problems.append(f"执行了 {len(statements)} 条SQL语句，超过预算 {case.budget}")
+
+    tables = set(SQLModel.metadata.tables)
+    with engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = explain(connection, statement, parameters, tables=tables) if is_explainable(statement) else []
+            scanned = [
+                table for table in full_scans(plan, large_tables)
+                if table not in case.allow_scans
+            ]
+            if scanned:
+                problems.append(f"全表扫描大表 {', '.join(sorted(set(scanned)))}: {' '.join(statement.split())[:200]}")
+            if verbose:
+                print(f"    {' '.join(statement.split())[:160]}")
+                for step in plan:
+                    print(f"        {step['detail']}")
+
+    label = f"{case.method} {case.route} ({case.user or '匿名'})"
+    status_text = "❌" if problems else "✅"
+    print(f"{status_text} {label}: {len(statements)}/{case.budget} 条语句")
+    for problem in problems:
+        print(f"    {problem}")
+    return problems
+
+
+def main() -> int:
+    """主函数"""
+    verbose = "-v" in sys.argv[1:]
+    SQLModel.metadata.create_all(engine)
+    ids = seed_database()
+    counts = table_row_counts()
+    large_tables = {name for name, count in counts.items() if count >= LARGE_TABLE_ROWS}
+    print(f"大表(不少于 {LARGE_TABLE_ROWS} 行): {', '.join(sorted(large_tables))}\n")
+
+    missing = uncovered_routes()
+    for route in missing:
+        print(f"❌ {route}: 没有检查用例")
+
+    recorder = StatementRecorder()
+    client = TestClient(app)
+    failures = 0
+    for case in ROUTE_CASES:
+        if check_route(client, case, ids, recorder, large_tables, verbose):
+            failures += 1
+
+    print(f"\n{len(ROUTE_CASES) - failures}/{len(ROUTE_CASES)} 个用例通过，{len(missing)} 个路由没有用例")
+    return 1 if failures or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,7 @@ from app.models.class_model import Class, ClassMember
 from app.models.course import Course, CourseStatus
 from app.models.assignment import Assignment
 from app.core.security import get_password_hash
+from app.services.statistics_service import rebuild_statistics
 
 
 def init_database():
@@ -130,6 +131,15 @@ def reset_database():
     create_sample_data()
 
 
+def rebuild_statistics_tables():
+    """从提交和批改记录重建统计汇总表"""
+    print("正在重建统计汇总表...")
+    init_database()
+    with get_session() as session:
+        rebuilt = rebuild_statistics(session)
+    print(f"✅ 统计汇总表重建完成，共 {rebuilt} 行")
+
+
 def main():
     """主函数"""
     print("=== 作业管理系统数据库管理工具 ===")
@@ -137,9 +147,10 @@ def main():
     print("2. 创建示例数据")
     print("3. 重置数据库")
     print("4. 完整初始化（初始化+示例数据）")
+    print("5. 重建统计汇总表")
     print("0. 退出")
     
-    choice = input("\n请选择操作 (0-4): ")
+    choice = input("\n请选择操作 (0-5): ")
     
     if choice == "1":
         init_database()
@@ -150,6 +161,8 @@ def main():
     elif choice == "4":
         init_database()
         create_sample_data()
+    elif choice == "5":
+        rebuild_statistics_tables()
     elif choice == "0":
         print("再见！")
     else:
@@ -0,0 +1,170 @@
+"""
+测试公共配置
+导入应用之前把数据库和上传目录指向临时目录，避免影响开发数据
+"""
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pytest
+
+# 使用独立的临时数据库和上传目录，配置在导入应用时读取，必须在导入 app 之前设置
+TEST_DIR = tempfile.mkdtemp(prefix="homework_tests_")
+os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}"
+os.environ["LOCAL_STORAGE_PATH"] = os.path.join(TEST_DIR, "uploads")
+# 后台预计算会在测试期间执行查询，关闭
+os.environ["STATISTICS_PRECOMPUTE_INTERVAL_SECONDS"] = "0"
+atexit.register(shutil.rmtree, TEST_DIR, True)
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlmodel import Session, SQLModel
+
+import app.db.base  # noqa: F401  注册全部模型
+from app.db.session import engine
+from app.services.permission_service import permission_cache
+from app.services.principal_service import principal_cache
+from app.services.statistics_service import statistics_cache
+
+# 测试不需要打印SQL
+engine.echo = False
+
+
+@pytest.fixture
+def db() -> Iterator[Session]:
+    """
+    空数据库的会话，每个测试重新建表并清空进程内缓存(重建后的ID会与之前的测试重复)
+    """
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    for cache in (statistics_cache, principal_cache, permission_cache):
+        cache.clear()
+    with Session(engine) as session:
+        yield session
+    statistics_cache.clear()
+
+
+@pytest.fixture(scope="session")
+def recorder() -> Any:
+    """
+    记录全部引擎执行的SQL语句，与 check_route_queries.py 使用同一个记录器
+    """
+    from check_route_queries import StatementRecorder
+
+    return StatementRecorder()
+
+
+class FakeRedisError(Exception):
+    """
+    模拟 redis.RedisError
+    """
+
+
+class FakeRedis:
+    """
+    内存中的 Redis 客户端，只实现缓存用到的命令；unavailable 为 True 时所有命令抛出 FakeRedisError
+    """
+
+    def __init__(self) -> None:
+        self.data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self.unavailable = False
+
+    def _check(self) -> None:
+        if self.unavailable:
+            raise FakeRedisError("connection refused")
+
+    def _alive(self, name: str) -> bool:
+        entry = self.data.get(name)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[name]
+            return False
+        return entry is not None
+
+    def get(self, name: str) -> Optional[bytes]:
+        self._check()
+        if not self._alive(name):
+            return None
+        value = self.data[name][0]
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def set(self, name: str, value: Any, px: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        self._check()
+        if nx and self._alive(name):
+            return None
+        if isinstance(value, str):
+            value = value.encode()
+        self.data[name] = (value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def pexpire(self, name: str, px: int) -> bool:
+        self._check()
+        if not self._alive(name):
+            return False
+        self.data[name] = (self.data[name][0], time.monotonic() + px / 1000)
+        return True
+
+    def pttl(self, name: str) -> int:
+        self._check()
+        if not self._alive(name):
+            return -2
+        expires_at = self.data[name][1]
+        return -1 if expires_at is None else int((expires_at - time.monotonic()) * 1000)
+
+    def delete(self, *names: str) -> int:
+        self._check()
+        removed = 0
+        for name in names:
+            if self._alive(name):
+                del self.data[name]
+                removed += 1
+        return removed
+
+    def incr(self, name: str) -> int:
+        self._check()
+        value = int(self.get(name) or 0) + 1
+        expires_at = self.data[name][1] if self._alive(name) else None
+        self.data[name] = (value, expires_at)
+        return value
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """
+    按顺序执行排队命令的管道
+    """
+
+    def __init__(self, client: FakeRedis) -> None:
+        self._client = client
+        self._commands: List[Tuple[str, tuple]] = []
+
+    def incr(self, name: str) -> "FakePipeline":
+        self._commands.append(("incr", (name,)))
+        return self
+
+    def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [getattr(self._client, command)(*args) for command, args in commands]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch: pytest.MonkeyPatch) -> FakeRedis:
+    """
+    用内存实现替换 redis 模块，按同一个 URL 创建的客户端共用同一份数据
+    """
+    client = FakeRedis()
+    module = types.ModuleType("redis")
+    module.RedisError = FakeRedisError
+    module.Redis = types.SimpleNamespace(from_url=lambda url, **kwargs: client)
+    monkeypatch.setitem(sys.modules, "redis", module)
+    return client
@@ -0,0 +1,213 @@
+"""
+TTLCache 并发测试：单飞合并、过期后返回旧值并后台刷新、失效丢弃正在进行的加载
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import pytest
+
+from app.utils.cache import TTLCache, cached
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float = 2) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待超时")
+        time.sleep(0.005)
+
+
+class GatedLoader:
+    """
+    调用后阻塞到 release，记录调用次数
+    """
+
+    def __init__(self, value: object) -> None:
+        self.value = value
+        self.calls = 0
+        self.started = threading.Event()
+        self.gate = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self) -> object:
+        with self._lock:
+            self.calls += 1
+        self.started.set()
+        assert self.gate.wait(5)
+        if isinstance(self.value, BaseException):
+            raise self.value
+        return self.value
+
+    def release(self) -> None:
+        self.gate.set()
+
+
+def test_concurrent_callers_share_one_load():
+    cache = TTLCache(ttl_seconds=60)
+    loader = GatedLoader("value")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(cache.get_or_load, "key", loader) for _ in range(8)]
+        wait_until(lambda: cache.stats()["coalesced"] == 7)
+        assert cache.stats()["in_flight"] == 1
+        loader.release()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == ["value"] * 8
+    assert loader.calls == 1
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get("key") == "value"
+
+
+def test_load_error_reaches_every_waiter_and_is_not_cached():
+    cache = TTLCache(ttl_seconds=60)
+    loader = GatedLoader(ValueError("boom"))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(cache.get_or_load, "key", loader) for _ in range(4)]
+        wait_until(lambda: cache.stats()["coalesced"] == 3)
+        loader.release()
+        for future in futures:
+            with pytest.raises(ValueError):
+                future.result(timeout=5)
+
+    assert loader.calls == 1
+    assert cache.get("key") is None
+    assert cache.get_or_load("key", lambda: "retry") == "retry"
+
+
+def test_expired_entry_served_while_refreshing_in_background():
+    cache = TTLCache(ttl_seconds=0.05, stale_seconds=60)
+    cache.get_or_load("key", lambda: "old")
+    time.sleep(0.1)
+    loader = GatedLoader("new")
+
+    # 过期但在保留时间内：立即返回旧值，不等待加载
+    assert cache.get_or_load("key", loader) == "old"
+    assert loader.started.wait(5)
+    # 刷新进行中时再次读取仍返回旧值，不重复提交刷新
+    assert cache.get_or_load("key", loader) == "old"
+    stats = cache.stats()
+    assert stats["stale_hits"] == 2
+    assert stats["refreshes"] == 1
+
+    loader.release()
+    wait_until(lambda: cache.get("key") == "new")
+    assert loader.calls == 1
+
+
+def test_failed_background_refresh_keeps_old_value():
+    cache = TTLCache(ttl_seconds=0.05, stale_seconds=60)
+    cache.get_or_load("key", lambda: "old")
+    time.sleep(0.1)
+    loader = GatedLoader(RuntimeError("database unavailable"))
+
+    assert cache.get_or_load("key", loader) == "old"
+    loader.release()
+    wait_until(lambda: cache.stats()["in_flight"] == 0)
+
+    assert cache.get_or_load("key", lambda: "unused") == "old"
+
+
+def test_entry_past_stale_window_is_loaded_synchronously():
+    cache = TTLCache(ttl_seconds=0.02, stale_seconds=0.02)
+    cache.get_or_load("key", lambda: "old")
+    time.sleep(0.1)
+
+    assert cache.get_or_load("key", lambda: "new") == "new"
+    assert cache.stats()["refreshes"] == 0
+
+
+def test_invalidate_discards_in_flight_result():
+    cache = TTLCache(ttl_seconds=60)
+    stale_loader = GatedLoader("read before the write")
+    results: List[object] = []
+
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_load("key", stale_loader)))
+    leader.start()
+    assert stale_loader.started.wait(5)
+
+    cache.invalidate(["key"])
+    # 失效后的请求不再等待失效前开始的加载，而是重新加载
+    fresh_loader = GatedLoader("read after the write")
+    fresh_loader.release()
+    assert cache.get_or_load("key", fresh_loader) == "read after the write"
+
+    stale_loader.release()
+    leader.join(5)
+    # 失效前开始的加载结果只返回给自己的调用者，不覆盖缓存
+    assert results == ["read before the write"]
+    assert cache.get("key") == "read after the write"
+    assert stale_loader.calls == 1
+    assert fresh_loader.calls == 1
+
+
+def test_invalidate_during_background_refresh_discards_result():
+    cache = TTLCache(ttl_seconds=0.05, stale_seconds=60)
+    cache.get_or_load("key", lambda: "old")
+    time.sleep(0.1)
+    loader = GatedLoader("refreshed before the write")
+
+    assert cache.get_or_load("key", loader) == "old"
+    assert loader.started.wait(5)
+    flight = cache._flights["key"]
+    cache.invalidate(["key"])
+    loader.release()
+    assert flight.done.wait(5)
+
+    assert cache.get("key") is None
+
+
+def test_clear_discards_in_flight_result():
+    cache = TTLCache(ttl_seconds=60)
+    loader = GatedLoader("value")
+    leader = threading.Thread(target=cache.get_or_load, args=("key", loader))
+    leader.start()
+    assert loader.started.wait(5)
+
+    cache.clear()
+    loader.release()
+    leader.join(5)
+
+    assert cache.get("key") is None
+
+
+def test_refresh_joins_in_flight_load():
+    cache = TTLCache(ttl_seconds=60)
+    loader = GatedLoader("value")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        first = executor.submit(cache.get_or_load, "key", loader)
+        assert loader.started.wait(5)
+        second = executor.submit(cache.refresh, "key", loader)
+        wait_until(lambda: cache.stats()["coalesced"] == 1)
+        loader.release()
+        assert first.result(timeout=5) == second.result(timeout=5) == "value"
+
+    assert loader.calls == 1
+
+
+def test_cached_decorator_coalesces_by_key():
+    cache = TTLCache(ttl_seconds=60)
+    gate = threading.Event()
+    calls: List[int] = []
+
+    @cached(cache, key=lambda course_id: ("course", course_id))
+    def load_course(course_id: int) -> dict:
+        calls.append(course_id)
+        assert gate.wait(5)
+        return {"course_id": course_id}
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        futures = [executor.submit(load_course, course_id) for course_id in (1, 1, 1, 2, 2, 2)]
+        wait_until(lambda: cache.stats()["coalesced"] == 4)
+        gate.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == [{"course_id": 1}] * 3 + [{"course_id": 2}] * 3
+    assert sorted(calls) == [1, 2]
+    assert load_course(1) == {"course_id": 1}
+    assert sorted(calls) == [1, 2]
@@ -0,0 +1,84 @@
+"""
+统计缓存跨进程失效测试：两个 TTLCache 共用同一个 Redis 中的版本号，模拟两个 worker
+"""
+
+from app.utils.cache import RedisCacheVersions, TTLCache
+
+
+def make_worker_cache() -> TTLCache:
+    return TTLCache(ttl_seconds=60, stale_seconds=300, versions=RedisCacheVersions("redis://test"))
+
+
+def test_invalidation_reaches_other_process(fake_redis):
+    worker_a, worker_b = make_worker_cache(), make_worker_cache()
+    worker_a.get_or_load(("course", 1), lambda: "old")
+    worker_b.get_or_load(("course", 1), lambda: "old")
+
+    worker_a.invalidate([("course", 1)])
+
+    assert worker_b.get(("course", 1)) is None
+    assert worker_b.get_or_load(("course", 1), lambda: "new") == "new"
+    assert worker_b.stats()["remote_invalidations"] == 1
+    # 其他键不受影响
+    assert worker_b.get_or_load(("course", 2), lambda: "other") == "other"
+    worker_a.invalidate([("course", 1)])
+    assert worker_b.get(("course", 2)) == "other"
+
+
+def test_stale_entry_not_served_after_remote_invalidation(fake_redis):
+    worker_a, worker_b = make_worker_cache(), make_worker_cache()
+    worker_b.set(("class", 1), "old", ttl_seconds=0)
+
+    worker_a.invalidate([("class", 1)])
+
+    # 已过期但仍在保留时间内的条目也不能作为旧值返回
+    assert worker_b.get_or_load(("class", 1), lambda: "new") == "new"
+
+
+def test_load_started_before_remote_invalidation_is_discarded(fake_redis):
+    worker_a, worker_b = make_worker_cache(), make_worker_cache()
+
+    def loader():
+        # 加载期间另一个进程提交写入并失效
+        worker_a.invalidate([("assignment", 1)])
+        return "read before the write"
+
+    assert worker_b.get_or_load(("assignment", 1), loader) == "read before the write"
+    assert worker_b.get_or_load(("assignment", 1), lambda: "new") == "new"
+
+
+def test_precompute_freshness_sees_remote_invalidation(fake_redis):
+    worker_a, worker_b = make_worker_cache(), make_worker_cache()
+    worker_b.refresh(("course", 1), lambda: "snapshot", ttl_seconds=600)
+    assert worker_b.is_fresh(("course", 1))
+
+    worker_a.invalidate([("course", 1)])
+
+    assert not worker_b.is_fresh(("course", 1))
+
+
+def test_redis_unavailable_falls_back_to_local_invalidation(fake_redis):
+    cache = make_worker_cache()
+    cache.get_or_load("key", lambda: "before outage")
+
+    fake_redis.unavailable = True
+    # 无法确认版本号时不使用加载时记录了版本号的条目
+    assert cache.get_or_load("key", lambda: "during outage") == "during outage"
+    assert cache.get_or_load("key", lambda: "unused") == "during outage"
+    cache.invalidate(["key"])
+    assert cache.get_or_load("key", lambda: "reloaded") == "reloaded"
+    assert cache.stats()["version_errors"] > 0
+
+    fake_redis.unavailable = False
+    assert cache.get_or_load("key", lambda: "after outage") == "after outage"
+
+
+def test_without_versions_invalidation_is_local():
+    worker_a, worker_b = TTLCache(), TTLCache()
+    worker_a.set("key", "old")
+    worker_b.set("key", "old")
+
+    worker_a.invalidate(["key"])
+
+    assert worker_a.get("key") is None
+    assert worker_b.get("key") == "old"
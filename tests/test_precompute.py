@@ -0,0 +1,183 @@
+"""
+统计面板预计算测试：按最近写入时间跳过没有变化的面板，多个进程中只有一个运行预计算
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.assignment import Assignment
+from app.models.class_model import Class, ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.statistics import AssignmentStatistics
+from app.models.submission import Submission
+from app.models.user import User, UserRole
+from app.services import precompute_service
+from app.services.statistics_service import rebuild_statistics, statistics_cache
+from app.utils.scheduler import FileLock, IntervalScheduler, RedisLock
+
+
+@pytest.fixture
+def seeded(db, monkeypatch):
+    """
+    一个班级的两门进行中课程，每门课程一个已批改的作业
+    """
+    monkeypatch.setattr(settings, "STATISTICS_PRECOMPUTE_INTERVAL_SECONDS", 300)
+    monkeypatch.setattr(precompute_service, "_built_at", {})
+    # 测试中写入和计算间隔很短，不留余量
+    monkeypatch.setattr(precompute_service, "_WRITE_MARGIN", timedelta(0))
+
+    teacher = User(username="teacher", email="teacher@example.com", hashed_password="x", role=UserRole.TEACHER)
+    student = User(username="student", email="student@example.com", hashed_password="x")
+    db.add_all([teacher, student])
+    db.commit()
+    class_ = Class(name="class", created_by=teacher.id)
+    db.add(class_)
+    db.commit()
+    db.add_all([
+        ClassMember(class_id=class_.id, user_id=teacher.id, role="teacher"),
+        ClassMember(class_id=class_.id, user_id=student.id),
+    ])
+    courses = [Course(name=f"course_{index}", class_id=class_.id, teacher_id=teacher.id) for index in range(2)]
+    db.add_all(courses)
+    db.commit()
+    assignments = [
+        Assignment(title="assignment", course_id=course.id, due_date=datetime.utcnow()) for course in courses
+    ]
+    db.add_all(assignments)
+    db.commit()
+    submissions = [Submission(assignment_id=a.id, student_id=student.id, file_url="a.txt") for a in assignments]
+    db.add_all(submissions)
+    db.commit()
+    db.add_all([Grading(submission_id=s.id, score=80, teacher_id=teacher.id) for s in submissions])
+    rebuild_statistics(db)
+    db.commit()
+    return {
+        "teacher": teacher.id,
+        "class": class_.id,
+        "courses": [course.id for course in courses],
+        "assignments": [assignment.id for assignment in assignments],
+    }
+
+
+def last_counts():
+    return {name: job["last_counts"] for name, job in precompute_service.precompute_metrics.stats().items()}
+
+
+def test_idle_snapshots_are_renewed_instead_of_recomputed(seeded):
+    precompute_service.run_precompute(full=False)
+    assert last_counts()["course_dashboards"] == {"computed": 2, "skipped": 0}
+    key = ("course", seeded["courses"][0])
+    expires_at = statistics_cache._entries[key][1]
+
+    for _ in range(3):
+        precompute_service.run_precompute(full=False)
+        assert last_counts()["course_dashboards"] == {"computed": 0, "skipped": 2}
+        assert last_counts()["class_dashboards"] == {"computed": 0, "skipped": 1}
+        assert last_counts()["teacher_dashboards"] == {"computed": 0, "skipped": 1}
+    # 跳过时快照续期到下一次运行之后，不会过期后被重新计算
+    assert statistics_cache._entries[key][1] > expires_at
+
+
+def test_write_from_another_process_triggers_recompute(seeded, db):
+    precompute_service.run_precompute(full=False)
+
+    # 其他进程写入时本进程的缓存没有失效，只有汇总行的更新时间变化
+    db.execute(
+        update(AssignmentStatistics)
+        .where(AssignmentStatistics.assignment_id == seeded["assignments"][0])
+        .values(updated_at=datetime.utcnow() + timedelta(seconds=1))
+    )
+    db.commit()
+    precompute_service.run_precompute(full=False)
+
+    assert last_counts()["course_dashboards"] == {"computed": 1, "skipped": 1}
+    assert last_counts()["class_dashboards"] == {"computed": 1, "skipped": 0}
+    assert last_counts()["teacher_dashboards"] == {"computed": 1, "skipped": 0}
+
+
+def test_invalidated_snapshot_is_recomputed(seeded):
+    precompute_service.run_precompute(full=False)
+
+    statistics_cache.invalidate([("course", seeded["courses"][1])])
+    precompute_service.run_precompute(full=False)
+
+    assert last_counts()["course_dashboards"] == {"computed": 1, "skipped": 1}
+
+
+def test_snapshots_recomputed_after_max_age(seeded, monkeypatch):
+    precompute_service.run_precompute(full=False)
+
+    monkeypatch.setattr(settings, "STATISTICS_PRECOMPUTE_MAX_AGE_SECONDS", 0)
+    precompute_service.run_precompute(full=False)
+
+    assert last_counts()["course_dashboards"] == {"computed": 2, "skipped": 0}
+
+
+def test_file_lock_has_single_holder(tmp_path):
+    path = str(tmp_path / "precompute.lock")
+    first, second = FileLock(path), FileLock(path)
+
+    assert first.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_scheduler_without_lock_skips_task(tmp_path):
+    path = str(tmp_path / "precompute.lock")
+    holder = FileLock(path)
+    assert holder.acquire()
+    runs = []
+    ran = threading.Event()
+
+    def task():
+        runs.append(1)
+        ran.set()
+
+    scheduler = IntervalScheduler(name="test-precompute", interval_seconds=0.01, task=task, lock=FileLock(path))
+    scheduler.start()
+    try:
+        assert not ran.wait(0.1)
+        assert not scheduler.holds_lock
+        # 持有锁的进程退出后由其他进程接替
+        holder.release()
+        assert ran.wait(2)
+        assert scheduler.holds_lock
+    finally:
+        scheduler.stop(timeout=2)
+    assert not scheduler.holds_lock
+
+
+def test_redis_lock_has_single_holder(fake_redis):
+    first = RedisLock("redis://test", name="precompute:lock", ttl_seconds=60)
+    second = RedisLock("redis://test", name="precompute:lock", ttl_seconds=60)
+
+    assert first.acquire()
+    # 持有者再次获取时续期
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+
+    fake_redis.unavailable = True
+    assert not second.acquire()
+    assert second.errors == 1
+
+
+def test_redis_lock_expires_when_holder_stops_renewing(fake_redis):
+    first = RedisLock("redis://test", name="precompute:lock", ttl_seconds=0.05)
+    second = RedisLock("redis://test", name="precompute:lock", ttl_seconds=0.05)
+
+    assert first.acquire()
+    assert not second.acquire()
+    time.sleep(0.1)
+    assert second.acquire()
+    assert not first.acquire()
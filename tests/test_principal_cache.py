@@ -0,0 +1,121 @@
+"""
+Redis 用户快照缓存测试：使用内存中的 Redis 客户端，验证读写、TTL 和修改、删除用户后的失效
+"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.models.user import User, UserRole
+from app.services import principal_service
+from app.services.principal_service import RedisPrincipalCache
+
+API_PREFIX = f"{settings.API_V1_STR}/v1"
+
+
+def test_get_or_load_stores_json_with_ttl(fake_redis):
+    cache = RedisPrincipalCache("redis://test", ttl_seconds=60)
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return {"id": 1, "username": "student"}
+
+    assert cache.get_or_load(1, loader) == {"id": 1, "username": "student"}
+    assert cache.get_or_load(1, loader) == {"id": 1, "username": "student"}
+
+    assert calls == [1]
+    assert fake_redis.get("principal:1") == b'{"id": 1, "username": "student"}'
+    assert 59_000 < fake_redis.pttl("principal:1") <= 60_000
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["errors"]) == (1, 1, 0)
+
+
+def test_entry_expires_after_ttl(fake_redis):
+    cache = RedisPrincipalCache("redis://test", ttl_seconds=0.05)
+    cache.get_or_load(1, lambda: {"version": 1})
+
+    time.sleep(0.1)
+
+    assert cache.get_or_load(1, lambda: {"version": 2}) == {"version": 2}
+
+
+def test_invalidate_deletes_keys(fake_redis):
+    cache = RedisPrincipalCache("redis://test", ttl_seconds=60)
+    cache.get_or_load(1, lambda: {"version": 1})
+    cache.get_or_load(2, lambda: {"version": 1})
+
+    assert cache.invalidate([1, 3]) == 1
+    assert cache.invalidate([]) == 0
+
+    assert fake_redis.get("principal:1") is None
+    assert fake_redis.get("principal:2") is not None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_redis_unavailable_falls_back_to_loader(fake_redis):
+    cache = RedisPrincipalCache("redis://test", ttl_seconds=60)
+    fake_redis.unavailable = True
+
+    assert cache.get_or_load(1, lambda: {"version": 1}) == {"version": 1}
+    assert cache.get_or_load(1, lambda: {"version": 2}) == {"version": 2}
+    assert cache.invalidate([1]) == 0
+    assert cache.stats()["errors"] == 3
+
+
+@pytest.fixture
+def redis_principals(db, fake_redis, monkeypatch):
+    """
+    使用 Redis 用户快照缓存的应用，返回管理员和学生的请求头
+    """
+    monkeypatch.setattr(principal_service, "principal_cache", RedisPrincipalCache("redis://test", ttl_seconds=60))
+    admin = User(username="admin", email="admin@example.com", hashed_password="x", role=UserRole.ADMIN)
+    student = User(username="student", email="student@example.com", hashed_password="x")
+    db.add_all([admin, student])
+    db.commit()
+    return {
+        "student_id": student.id,
+        "admin": {"Authorization": f"Bearer {create_access_token(admin.id)}"},
+        "student": {"Authorization": f"Bearer {create_access_token(student.id)}"},
+    }
+
+
+def test_update_user_invalidates_snapshot(fake_redis, redis_principals):
+    client = TestClient(app)
+    student_id = redis_principals["student_id"]
+    me = client.get(f"{API_PREFIX}/users/me", headers=redis_principals["student"])
+    assert me.json()["email"] == "student@example.com"
+    assert fake_redis.get(f"principal:{student_id}") is not None
+
+    response = client.put(
+        f"{API_PREFIX}/users/{student_id}",
+        headers=redis_principals["admin"],
+        json={"email": "renamed@example.com"},
+    )
+    assert response.status_code == 200
+    assert fake_redis.get(f"principal:{student_id}") is None
+    me = client.get(f"{API_PREFIX}/users/me", headers=redis_principals["student"])
+    assert me.json()["email"] == "renamed@example.com"
+
+    # 停用后下一个请求即被拒绝
+    response = client.put(
+        f"{API_PREFIX}/users/{student_id}", headers=redis_principals["admin"], json={"is_active": False}
+    )
+    assert response.status_code == 200
+    assert client.get(f"{API_PREFIX}/users/me", headers=redis_principals["student"]).status_code == 400
+
+
+def test_delete_user_invalidates_snapshot(fake_redis, redis_principals):
+    client = TestClient(app)
+    student_id = redis_principals["student_id"]
+    assert client.get(f"{API_PREFIX}/users/me", headers=redis_principals["student"]).status_code == 200
+
+    response = client.delete(f"{API_PREFIX}/users/{student_id}", headers=redis_principals["admin"])
+    assert response.status_code == 200
+
+    assert fake_redis.get(f"principal:{student_id}") is None
+    assert client.get(f"{API_PREFIX}/users/me", headers=redis_principals["student"]).status_code == 404
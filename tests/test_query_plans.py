@@ -0,0 +1,19 @@
+"""
+常用查询的执行计划测试：每个查询都通过索引查找，不对数据表做全表扫描
+
+查询列表与 check_query_plans.py 共用，新增查询时只需补充 HOT_QUERIES。
+"""
+
+import pytest
+from sqlmodel import SQLModel
+
+from app.utils.query_plans import full_scans
+from check_query_plans import HOT_QUERIES, explain_statement
+
+
+@pytest.mark.parametrize("build", [build for _, build in HOT_QUERIES], ids=[name for name, _ in HOT_QUERIES])
+def test_hot_query_uses_index(db, build):
+    plan = explain_statement(build())
+
+    assert plan
+    assert full_scans(plan, set(SQLModel.metadata.tables)) == [], [step["detail"] for step in plan]
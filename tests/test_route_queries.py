@@ -0,0 +1,59 @@
+"""
+接口查询回归测试：每个路由一个用例，语句数不超过预算，不对大表做全表扫描
+
+用例、预算和种子数据与 check_route_queries.py 共用，新增路由时只需在 ROUTE_CASES 中补充用例。
+用例按 ROUTE_CASES 的顺序在同一份种子数据上执行，部分用例依赖之前的用例(例如先添加再移除班级成员、
+之前的请求已缓存当前用户)，需要整个模块一起运行。
+"""
+
+from typing import Dict, Set, Tuple
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import SQLModel
+
+from app.db.session import engine
+from app.main import app
+from app.services.permission_service import permission_cache
+from app.services.principal_service import principal_cache
+from app.services.statistics_service import statistics_cache
+from check_route_queries import (
+    LARGE_TABLE_ROWS,
+    ROUTE_CASES,
+    check_route,
+    seed_database,
+    table_row_counts,
+    uncovered_routes,
+)
+
+
+@pytest.fixture(scope="module")
+def seeded() -> Tuple[Dict[str, int], Set[str]]:
+    """
+    重新建表并生成检查数据
+
+    Returns:
+        (用例中引用的ID, 大表名称集合)
+    """
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    for cache in (statistics_cache, principal_cache, permission_cache):
+        cache.clear()
+    ids = seed_database()
+    large_tables = {name for name, count in table_row_counts().items() if count >= LARGE_TABLE_ROWS}
+    return ids, large_tables
+
+
+def test_every_route_has_case():
+    assert uncovered_routes() == []
+
+
+@pytest.mark.parametrize(
+    "case", ROUTE_CASES, ids=[f"{case.method} {case.route} ({case.user or 'anonymous'})" for case in ROUTE_CASES]
+)
+def test_route_queries(seeded, recorder, case):
+    ids, large_tables = seeded
+
+    problems = check_route(TestClient(app), case, ids, recorder, large_tables, verbose=False)
+
+    assert problems == []
@@ -0,0 +1,78 @@
+"""
+分数草图分位数测试
+"""
+
+import random
+from collections import Counter
+from typing import List
+
+import numpy as np
+import pytest
+
+from app.utils.score_sketch import PERCENTILES, SKETCH_BINS, sketch_bin, sketch_quantiles
+
+
+def quantiles_of(scores: List[float], total_points: float):
+    """
+    按作业统计的方式为分数建草图并估算分位数
+    """
+    bins = Counter(sketch_bin(score, total_points) for score in scores)
+    return sketch_quantiles(bins.items(), scale=total_points, lower=min(scores), upper=max(scores))
+
+
+def expected_quantiles(scores: List[float]):
+    return {name: float(np.percentile(scores, quantile * 100)) for name, quantile in PERCENTILES}
+
+
+@pytest.mark.parametrize(
+    "scores, total_points, median",
+    [
+        ([0, 100], 100, 50),
+        ([10, 25, 40, 50], 50, 32.5),
+        ([60, 70, 80, 90, 95, 100], 100, 85),
+        ([42], 100, 42),
+    ],
+)
+def test_median_interpolates_between_scores(scores, total_points, median):
+    assert quantiles_of(scores, total_points)["p50"] == pytest.approx(median)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_numpy_for_scores_on_bin_edges(seed):
+    # 按 0.1 分取整的百分制分数正好落在分箱下界，结果应与按原始分数计算相同
+    rnd = random.Random(seed)
+    scores = [round(rnd.uniform(0, 100), 1) for _ in range(rnd.randint(1, 60))]
+
+    actual = quantiles_of(scores, 100)
+    for name, value in expected_quantiles(scores).items():
+        assert actual[name] == pytest.approx(value, abs=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_error_within_one_bin(seed):
+    rnd = random.Random(seed)
+    total_points = rnd.choice([10, 30, 100, 150])
+    scores = [rnd.uniform(0, total_points) for _ in range(rnd.randint(1, 60))]
+
+    actual = quantiles_of(scores, total_points)
+    for name, value in expected_quantiles(scores).items():
+        assert abs(actual[name] - value) <= total_points / SKETCH_BINS + 1e-9
+
+
+def test_merged_course_sketch_matches_numpy():
+    # 课程草图由不同总分的作业草图按分箱相加得到，按得分率计算分位数
+    rnd = random.Random(1)
+    bins = Counter()
+    rates = []
+    for total_points in (10, 20, 50, 100):
+        scores = [round(rnd.uniform(0, total_points), 1) for _ in range(30)]
+        bins.update(sketch_bin(score, total_points) for score in scores)
+        rates.extend(score * 100 / total_points for score in scores)
+
+    actual = sketch_quantiles(bins.items(), scale=100, lower=0, upper=100)
+    for name, value in expected_quantiles(rates).items():
+        assert abs(actual[name] - value) <= 100 / SKETCH_BINS + 1e-9
+
+
+def test_empty_sketch():
+    assert sketch_quantiles([], scale=100) == {name: 0 for name, _ in PERCENTILES}
@@ -0,0 +1,100 @@
+"""
+学生统计的查询数测试：语句数固定，不随课程和作业数量增长(没有 N+1 查询)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.main import app
+from app.models.assignment import Assignment
+from app.models.class_model import Class, ClassMember
+from app.models.course import Course
+from app.models.grading import Grading
+from app.models.submission import Submission
+from app.models.user import User, UserRole
+from app.services.statistics_service import get_student_dashboard, rebuild_statistics, statistics_cache
+
+# 学生统计接口(当前用户已缓存)：读取被查看的用户 1 条，课程、作业、提交和分数联表 1 条
+STUDENT_STATISTICS_STATEMENTS = 2
+
+
+def seed_student(db, courses_count: int, assignments_per_course: int) -> int:
+    """
+    生成一个学生，所在的两个班级共有 courses_count 门课程，部分作业已提交、部分已批改
+
+    Returns:
+        学生ID
+    """
+    teacher = User(username="teacher", email="teacher@example.com", hashed_password="x", role=UserRole.TEACHER)
+    student = User(username="student", email="student@example.com", hashed_password="x")
+    db.add_all([teacher, student])
+    db.commit()
+    classes = [Class(name=f"class_{index}", created_by=teacher.id) for index in range(2)]
+    db.add_all(classes)
+    db.commit()
+    db.add_all([ClassMember(class_id=class_.id, user_id=student.id) for class_ in classes])
+    courses = [
+        Course(name=f"course_{index}", class_id=classes[index % 2].id, teacher_id=teacher.id)
+        for index in range(courses_count)
+    ]
+    db.add_all(courses)
+    db.commit()
+    now = datetime.utcnow()
+    assignments = [
+        Assignment(title=f"assignment_{course.id}_{index}", course_id=course.id, due_date=now + timedelta(days=index))
+        for course in courses
+        for index in range(assignments_per_course)
+    ]
+    db.add_all(assignments)
+    db.commit()
+    submissions = [
+        Submission(assignment_id=assignment.id, student_id=student.id, file_url="a.txt")
+        for assignment in assignments[::2]
+    ]
+    db.add_all(submissions)
+    db.commit()
+    db.add_all([Grading(submission_id=s.id, score=70 + s.id % 30, teacher_id=teacher.id) for s in submissions[::2]])
+    rebuild_statistics(db)
+    db.commit()
+    return student.id
+
+
+@pytest.mark.parametrize("courses_count, assignments_per_course", [(1, 1), (3, 4), (8, 6)])
+def test_student_statistics_statement_count(db, recorder, courses_count, assignments_per_course):
+    student_id = seed_student(db, courses_count, assignments_per_course)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {create_access_token(student_id)}"}
+    url = f"{settings.API_V1_STR}/v1/statistics/users/{student_id}"
+    # 先请求一次，使当前用户进入缓存，与 check_route_queries.py 中的状态一致
+    assert client.get(url, headers=headers).status_code == 200
+
+    statistics_cache.clear()
+    recorder.start()
+    try:
+        response = client.get(url, headers=headers)
+    finally:
+        statements = recorder.stop()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert len(body["courses"]) == courses_count
+    assert sum(course["total_assignments"] for course in body["courses"]) == courses_count * assignments_per_course
+    assert len(statements) == STUDENT_STATISTICS_STATEMENTS
+
+
+def test_student_dashboard_uses_one_query(db, recorder):
+    student_id = seed_student(db, courses_count=5, assignments_per_course=5)
+    student = db.get(User, student_id)
+
+    recorder.start()
+    try:
+        dashboard = get_student_dashboard(db, student)
+    finally:
+        statements = recorder.stop()
+
+    assert len(statements) == 1
+    assert len(dashboard["courses"]) == 5